@@ -0,0 +1,158 @@
+"""
+Single-elimination bracket engine.
+
+The bracket is a complete binary tree over slot positions. Round r of a
+tournament with N slots has N / 2**r matches at bracket positions
+0 .. N / 2**r - 1. Round 1 position p pairs slots 2p + 1 and 2p + 2; the
+winner of (r, p) plays in (r + 1, p // 2), as player 1 when p is even and
+player 2 when p is odd. Advancing a round is therefore index arithmetic over
+the previous round's matches, with no slot lookups.
+
+create_round writes a whole round (matches, contests, scores and busy
+intervals) with client-generated ids and one bulk INSERT per table, so even
+a 512-match opening round of a 1024-player tournament is a handful of
+statements in the caller's transaction. Swiss rounds (swiss.py) are written
+the same way, with the board number as the position.
+"""
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from .models import (
+    Contest, ContestScore, ContestStatus, Tournament, TournamentFormat, TournamentMatch,
+    TournamentMatchStatus, TournamentSlot, UserBusyInterval
+)
+
+SUPPORTED_SIZES = (4, 8, 16, 32, 64, 128, 256, 512, 1024)
+MATCH_DURATION = timedelta(hours=2)
+
+# (bracket position, slot1 id, user1 id, slot2 id, user2 id)
+Pairing = Tuple[int, object, object, object, object]
+
+
+def num_rounds(num_participants: int) -> int:
+    """Rounds in a bracket of num_participants (a power of two)"""
+    return num_participants.bit_length() - 1
+
+
+def total_rounds(tournament: Tournament) -> int:
+    """Rounds a tournament plays: fixed at creation for Swiss, log2(size) for elimination"""
+    if tournament.format == TournamentFormat.SWISS:
+        return tournament.num_rounds
+    return num_rounds(tournament.num_participants)
+
+
+def matches_in_round(num_participants: int, round_number: int) -> int:
+    return num_participants >> round_number
+
+
+def parent_position(position: int) -> int:
+    """Position in the next round that the winner of position advances to"""
+    return position // 2
+
+
+def round_one_pairings(slots: List[TournamentSlot]) -> List[Pairing]:
+    """Pair slots 1-2, 3-4, ... by slot number; pairs with an empty slot are skipped"""
+    by_number = {slot.slot_number: slot for slot in slots}
+    pairings = []
+    for position in range(len(slots) // 2):
+        slot1 = by_number.get(2 * position + 1)
+        slot2 = by_number.get(2 * position + 2)
+        if slot1 and slot2 and slot1.user_id and slot2.user_id:
+            pairings.append((position, slot1.id, slot1.user_id, slot2.id, slot2.user_id))
+    return pairings
+
+
+def winner_slot(match: TournamentMatch):
+    """(slot id, user id) of a completed match's winner"""
+    if match.winner_id == match.user1_id:
+        return match.slot1_id, match.user1_id
+    return match.slot2_id, match.user2_id
+
+
+def next_round_pairings(previous_matches: List[TournamentMatch]) -> List[Pairing]:
+    """
+    Pair the winners of a completed round. Each winner moves to its parent
+    position; a parent is paired once both of its children have a winner.
+    """
+    sides: Dict[int, List[Optional[tuple]]] = {}
+    for match in previous_matches:
+        if match.winner_id is None or match.bracket_position is None:
+            continue
+        parent = parent_position(match.bracket_position)
+        sides.setdefault(parent, [None, None])[match.bracket_position % 2] = winner_slot(match)
+
+    pairings = []
+    for position in sorted(sides):
+        first, second = sides[position]
+        if first and second:
+            pairings.append((position, first[0], first[1], second[0], second[1]))
+    return pairings
+
+
+def create_round(tournament: Tournament, round_number: int, pairings: List[Pairing], start_time: datetime, db: Session) -> List:
+    """
+    Bulk-create the matches of a round with their contests, initial scores
+    and participants' busy intervals (no commit). Returns the new match ids.
+    """
+    if not pairings:
+        return []
+    end_time = start_time + MATCH_DURATION
+    now = datetime.utcnow()
+
+    match_rows = []
+    contest_rows = []
+    score_rows = []
+    busy_rows = []
+    for position, slot1_id, user1_id, slot2_id, user2_id in pairings:
+        match_id = uuid.uuid4()
+        contest_id = uuid.uuid4()
+        match_rows.append({
+            "id": match_id,
+            "tournament_id": tournament.id,
+            "round_number": round_number,
+            "bracket_position": position,
+            "slot1_id": slot1_id,
+            "slot2_id": slot2_id,
+            "user1_id": user1_id,
+            "user2_id": user2_id,
+            "status": TournamentMatchStatus.SCHEDULED,
+            "created_at": now,
+            "start_time": start_time,
+            "end_time": end_time,
+        })
+        contest_rows.append({
+            "id": contest_id,
+            "tournament_match_id": match_id,
+            "user1_id": user1_id,
+            "user2_id": user2_id,
+            "difficulty": tournament.difficulty,
+            "start_time": start_time,
+            "end_time": end_time,
+            "status": ContestStatus.SCHEDULED,
+            "created_at": now,
+        })
+        for user_id in (user1_id, user2_id):
+            score_rows.append({"contest_id": contest_id, "user_id": user_id, "total_points": 0})
+            busy_rows.append({
+                "user_id": user_id,
+                "contest_id": contest_id,
+                "start_time": start_time,
+                "end_time": end_time,
+                "is_tournament": True,
+            })
+
+    # Matches and contests reference each other: insert matches first, then
+    # contests, then link matches to their contests by primary key
+    db.execute(insert(TournamentMatch), match_rows)
+    db.execute(insert(Contest), contest_rows)
+    db.execute(
+        update(TournamentMatch),
+        [{"id": match["id"], "contest_id": contest["id"]} for match, contest in zip(match_rows, contest_rows)]
+    )
+    db.execute(insert(ContestScore), score_rows)
+    db.execute(insert(UserBusyInterval), busy_rows)
+    return [row["id"] for row in match_rows]
@@ -0,0 +1,129 @@
+"""
+Versioned snapshot cache for tournament brackets.
+
+Each tournament has a monotonically increasing version, bumped by every write
+that can change its bracket or who may view it: match completion and next
+round generation, tournament start, invite accept/reject, slot joins and
+schedule edits. A snapshot is stored together with the version it was built
+at, so a bump makes it unreachable without any scanning. Snapshots hold
+pre-serialized JSON, an ETag and the ids allowed to view the bracket, so a
+revalidation from an authorized client is answered with 304 without touching
+the database. A TTL bounds staleness for writes made by other processes.
+
+Once a TTL has passed since both its last bump and its snapshot expiring, a
+tournament is forgotten (at most one sweep per TTL), so the cache only holds
+recently viewed or written tournaments. Its version restarts at 0; ETags
+still differ whenever the body does.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+DEFAULT_TTL_SECONDS = 60
+# Brackets are per-user authorized: browsers may keep a copy but must revalidate
+CACHE_CONTROL = "private, no-cache"
+
+# (version, body, etag, viewer ids, expires_at)
+BracketSnapshot = Tuple[int, bytes, str, frozenset, float]
+
+
+def _key(tournament_id) -> str:
+    """Canonical key for a tournament id given as UUID or path string"""
+    try:
+        return str(UUID(str(tournament_id)))
+    except ValueError:
+        return str(tournament_id)
+
+
+class BracketCache:
+    def __init__(self, ttl: int = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._versions: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+        self._snapshots: Dict[str, BracketSnapshot] = {}
+        self._next_sweep = time.monotonic() + ttl
+        self._lock = threading.Lock()
+
+    def version(self, tournament_id) -> int:
+        return self._versions.get(_key(tournament_id), 0)
+
+    def bump(self, tournament_id) -> int:
+        """Move a tournament to a new version, retiring its snapshot"""
+        key = _key(tournament_id)
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+            self._bumped_at[key] = now
+            self._snapshots.pop(key, None)
+        return version
+
+    def _sweep(self, now: float) -> None:
+        # Caller holds the lock. A version is kept for a TTL after its bump so
+        # that builds started before the bump cannot store a stale snapshot.
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.ttl
+        for key, snapshot in list(self._snapshots.items()):
+            if snapshot[4] <= now:
+                del self._snapshots[key]
+        for key, bumped_at in list(self._bumped_at.items()):
+            if bumped_at + self.ttl <= now:
+                del self._bumped_at[key]
+        for key in [key for key in self._versions if key not in self._snapshots and key not in self._bumped_at]:
+            del self._versions[key]
+
+    def _current(self, key: str) -> Optional[BracketSnapshot]:
+        snapshot = self._snapshots.get(key)
+        if snapshot is None or snapshot[0] != self._versions.get(key, 0) or snapshot[4] <= time.monotonic():
+            return None
+        return snapshot
+
+    def respond(self, request: Request, tournament_id, user_id, build: Callable) -> Response:
+        """
+        Serve the bracket of a tournament for user_id.
+
+        build() is called on a miss and returns (bracket, viewer_ids); it is
+        expected to raise 404/403 itself. Cached snapshots enforce the viewer
+        ids they were built with.
+        """
+        key = _key(tournament_id)
+        snapshot = self._current(key)
+        if snapshot is None:
+            with self._lock:
+                self._sweep(time.monotonic())
+                version = self._versions.get(key, 0)
+            bracket, viewer_ids = build()
+            body = json.dumps(jsonable_encoder(bracket), separators=(",", ":")).encode()
+            etag = f'"{version}-{hashlib.sha1(body).hexdigest()}"'
+            snapshot = (version, body, etag, frozenset(str(v) for v in viewer_ids), time.monotonic() + self.ttl)
+            with self._lock:
+                # A bump during the build leaves the snapshot unreachable
+                self._snapshots[key] = snapshot
+        elif str(user_id) not in snapshot[3]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not authorized to view this tournament"
+            )
+
+        _, body, etag, _, _ = snapshot
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self) -> None:
+        """Drop every snapshot (versions are kept so they stay monotonic)"""
+        with self._lock:
+            self._snapshots.clear()
+
+
+# Global instance
+bracket_cache = BracketCache()
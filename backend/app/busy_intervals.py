@@ -0,0 +1,161 @@
+"""
+Schedule conflict detection over user_busy_intervals.
+
+Every scheduled or active contest has one row per participant holding the
+contest's time range. Rows are added when a contest is created and removed
+when it completes, so the table only ever holds live bookings and a conflict
+check for any number of users and time windows is one query on the
+(user_id, start_time, end_time) index.
+
+On PostgreSQL migrations.py also adds a GiST exclusion constraint
+(user_id WITH =, tsrange(start_time, end_time) WITH &&) WHERE NOT is_tournament,
+so two overlapping non-tournament bookings for the same user are rejected by
+the database even if two requests race past the application check. Callers
+inserting such rows should be ready for an IntegrityError at flush/commit time.
+
+Tournament rounds are exempt: a round is only booked when the previous one
+finishes and must be generated whatever was booked in the meantime. Instead,
+new challenges are checked against the scheduled rounds of every tournament
+their players are seated in (find_round_reservations).
+"""
+from datetime import datetime
+from typing import Iterable, List, Sequence, Tuple
+
+from sqlalchemy import and_, delete, exists, insert, or_
+from sqlalchemy.orm import Session, joinedload
+
+from .bracket import MATCH_DURATION
+from .models import (
+    Contest, ContestStatus, Tournament, TournamentFormat, TournamentMatch, TournamentMatchStatus,
+    TournamentRoundSchedule, TournamentSlot, TournamentStatus, UserBusyInterval
+)
+
+
+def busy_interval_rows(contest: Contest) -> List[dict]:
+    """Rows booking both participants of a contest"""
+    return [
+        {
+            "user_id": user_id,
+            "contest_id": contest.id,
+            "start_time": contest.start_time,
+            "end_time": contest.end_time,
+            "is_tournament": contest.tournament_match_id is not None,
+        }
+        for user_id in (contest.user1_id, contest.user2_id)
+    ]
+
+
+def add_busy_intervals(contests: Iterable[Contest], db: Session) -> None:
+    """Book the participants of newly created contests (no commit; contests must be flushed)"""
+    rows = [row for contest in contests for row in busy_interval_rows(contest)]
+    if rows:
+        db.execute(insert(UserBusyInterval), rows)
+
+
+def release_busy_intervals(contest_ids, db: Session) -> None:
+    """Free the bookings of contests that are no longer scheduled or active (no commit)"""
+    contest_ids = list(contest_ids)
+    if contest_ids:
+        db.execute(
+            delete(UserBusyInterval)
+            .where(UserBusyInterval.contest_id.in_(contest_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def find_conflicts(
+    user_ids,
+    windows: Sequence[Tuple],
+    db: Session,
+    include_tournament: bool = True,
+    inclusive: bool = False
+) -> List[UserBusyInterval]:
+    """
+    Bookings of any of user_ids that overlap any of the (start, end) windows,
+    earliest first, with the booked user, the contest and both its users loaded.
+
+    Ranges touching at an endpoint do not overlap unless inclusive is set.
+    """
+    user_ids = list(user_ids)
+    if not user_ids or not windows:
+        return []
+
+    if inclusive:
+        overlaps = [
+            and_(UserBusyInterval.start_time <= end, UserBusyInterval.end_time >= start)
+            for start, end in windows
+        ]
+    else:
+        overlaps = [
+            and_(UserBusyInterval.start_time < end, UserBusyInterval.end_time > start)
+            for start, end in windows
+        ]
+
+    query = db.query(UserBusyInterval).options(
+        joinedload(UserBusyInterval.user),
+        joinedload(UserBusyInterval.contest).joinedload(Contest.user1),
+        joinedload(UserBusyInterval.contest).joinedload(Contest.user2)
+    ).filter(
+        UserBusyInterval.user_id.in_(user_ids),
+        or_(*overlaps)
+    )
+    if not include_tournament:
+        query = query.filter(UserBusyInterval.is_tournament.is_(False))
+    return query.order_by(UserBusyInterval.start_time, UserBusyInterval.user_id).all()
+
+
+def find_round_reservations(user_ids, start: datetime, end: datetime, db: Session) -> List[Tuple]:
+    """
+    (user_id, round schedule) pairs, earliest round first, for scheduled
+    rounds overlapping [start, end) of pending or active tournaments in which
+    one of user_ids holds a seat. Players knocked out of an elimination
+    tournament no longer hold its later rounds.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+
+    knocked_out = exists().where(
+        TournamentMatch.tournament_id == TournamentSlot.tournament_id,
+        TournamentMatch.status == TournamentMatchStatus.COMPLETED,
+        or_(TournamentMatch.user1_id == TournamentSlot.user_id, TournamentMatch.user2_id == TournamentSlot.user_id),
+        TournamentMatch.winner_id != TournamentSlot.user_id
+    )
+    return db.query(TournamentSlot.user_id, TournamentRoundSchedule).join(
+        Tournament, Tournament.id == TournamentSlot.tournament_id
+    ).join(
+        TournamentRoundSchedule, TournamentRoundSchedule.tournament_id == TournamentSlot.tournament_id
+    ).filter(
+        TournamentSlot.user_id.in_(user_ids),
+        Tournament.status.in_([TournamentStatus.PENDING, TournamentStatus.ACTIVE]),
+        TournamentRoundSchedule.start_time < end,
+        TournamentRoundSchedule.start_time > start - MATCH_DURATION,
+        or_(Tournament.format == TournamentFormat.SWISS, ~knocked_out)
+    ).order_by(TournamentRoundSchedule.start_time, TournamentSlot.user_id).all()
+
+
+def intervals_overlap(interval: UserBusyInterval, start, end, inclusive: bool = False) -> bool:
+    if inclusive:
+        return interval.start_time <= end and interval.end_time >= start
+    return interval.start_time < end and interval.end_time > start
+
+
+def backfill_busy_intervals(db: Session, batch_size: int = 10000) -> int:
+    """
+    Rebuild user_busy_intervals from all scheduled and active contests.
+    Replaces the table contents in one transaction and returns the number of
+    rows written.
+    """
+    contests = db.query(Contest).filter(
+        Contest.status.in_([ContestStatus.SCHEDULED, ContestStatus.ACTIVE])
+    ).all()
+    rows = [row for contest in contests for row in busy_interval_rows(contest)]
+    try:
+        db.execute(delete(UserBusyInterval).execution_options(synchronize_session=False))
+        for start in range(0, len(rows), batch_size):
+            db.execute(insert(UserBusyInterval), rows[start:start + batch_size])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
@@ -1,13 +1,18 @@
 import httpx
-from typing import List, Dict, Optional
+import time
+from typing import List, Dict, Optional, Tuple
 from .config import settings
 import asyncio
 
+# Solved sets feed problem selection only; a few minutes of staleness is harmless
+SOLVED_CACHE_SECONDS = 600
+
 
 class CodeforcesAPI:
     def __init__(self):
         self.base_url = settings.codeforces_api_url
         self.client = httpx.AsyncClient(timeout=30.0)
+        self._solved_cache: Dict[str, Tuple[float, set]] = {}
 
     async def _make_request(self, method: str, params: Optional[Dict] = None) -> Dict:
         """Make a request to Codeforces API with rate limiting"""
@@ -31,7 +36,10 @@ class CodeforcesAPI:
         return await self._make_request("user.status", params)
 
     async def get_user_solved_problems(self, handle: str) -> set:
-        """Get set of solved problem codes (e.g., {'1234A', '567B'})"""
+        """Get set of solved problem codes (e.g., {'1234A', '567B'}), cached for SOLVED_CACHE_SECONDS"""
+        cached = self._solved_cache.get(handle)
+        if cached and time.monotonic() - cached[0] < SOLVED_CACHE_SECONDS:
+            return cached[1]
         try:
             submissions = await self.get_user_submissions(handle)
             solved = set()
@@ -42,6 +50,11 @@ class CodeforcesAPI:
                     index = problem.get("index")
                     if contest_id and index:
                         solved.add(f"{contest_id}{index}")
+            now = time.monotonic()
+            # Drop expired entries so the cache only holds recently polled handles
+            for stale in [h for h, (fetched, _) in self._solved_cache.items() if now - fetched >= SOLVED_CACHE_SECONDS]:
+                del self._solved_cache[stale]
+            self._solved_cache[handle] = (now, solved)
             return solved
         except Exception as e:
             print(f"Error getting solved problems for {handle}: {e}")
@@ -129,6 +142,30 @@ class CodeforcesAPI:
             print(f"Error checking submission for {handle}: {e}")
             return None
 
+    async def get_accepted_since(self, handle: str, since: int) -> Dict[str, Dict]:
+        """
+        Earliest accepted submission per problem code since a timestamp, from a
+        single user.status call, so all of a contest's problems are checked
+        against one fetch.
+        """
+        try:
+            submissions = await self.get_user_submissions(handle)
+        except Exception as e:
+            print(f"Error getting submissions for {handle}: {e}")
+            return {}
+        accepted = {}
+        for submission in submissions:
+            if submission.get("creationTimeSeconds", 0) < since:
+                break
+            if submission.get("verdict") == "OK":
+                problem = submission.get("problem", {})
+                contest_id = problem.get("contestId")
+                index = problem.get("index")
+                if contest_id and index:
+                    # Newest first: later (older) entries overwrite, leaving the earliest
+                    accepted[f"{contest_id}{index}"] = submission
+        return accepted
+
     async def check_any_submission(self, handle: str, problem_code: str, since: int) -> Optional[Dict]:
         """Check if user has submitted ANY solution (regardless of verdict) to a specific problem since a given timestamp"""
         try:
@@ -3,6 +3,7 @@ from datetime import datetime
 from .database import SessionLocal
 from .models import User
 from .codeforces_api import cf_api
+from .notifications import notification_hub
 
 
 async def check_user_confirmation(user_id: str, handle: str, registration_timestamp: datetime) -> bool:
@@ -48,6 +49,7 @@ async def check_pending_confirmations():
                 user.is_confirmed = True
                 user.confirmation_deadline = None
                 db.commit()
+                notification_hub.notify([user.id], "confirmed")
                 print(f"User {user.handle} confirmed successfully")
         
         # Handle expired confirmations (deadline passed)
@@ -0,0 +1,180 @@
+"""
+In-process pub/sub for live contest state.
+
+The submission checker and scheduler publish an event whenever they change a
+contest: a problem solve and the new scores, a status transition, or the
+problem set being selected. Every open GET /api/contests/{id}/events stream
+holds a bounded queue subscribed to its contest and forwards those events as
+Server-Sent Events, so viewers read nothing until something changes.
+
+Publishing to a contest nobody is watching costs a dict lookup; helpers that
+need to query for a payload check has_subscribers first. Events only reach
+streams served by the same process.
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+from uuid import UUID
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from .models import ContestProblem, ContestScore, ContestStatus, User
+from .schemas import ContestProblemResponse, ContestResponse, ContestScoreResponse
+
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 15
+
+
+def _key(key) -> str:
+    try:
+        return str(UUID(str(key)))
+    except ValueError:
+        return str(key)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class EventBus:
+    """Bounded (event, data) queues of subscribers, keyed by contest or user id"""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, key) -> asyncio.Queue:
+        """New queue for a key; call from the event loop that will read it"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(_key(key), set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, key, queue: asyncio.Queue) -> None:
+        key = _key(key)
+        with self._lock:
+            subscribers = self._subscribers.get(key, set())
+            for subscriber in [s for s in subscribers if s[1] is queue]:
+                subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(key, None)
+
+    def has_subscribers(self, key) -> bool:
+        return _key(key) in self._subscribers
+
+    def publish(self, key, event: str, data) -> int:
+        """Deliver an event to every subscriber of a key (from any thread); returns the number of subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(_key(key), ()))
+        item = (event, jsonable_encoder(data))
+        current = _running_loop()
+        for loop, queue in subscribers:
+            if loop is current:
+                self._offer(queue, item)
+            else:
+                loop.call_soon_threadsafe(self._offer, queue, item)
+        return len(subscribers)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, item) -> None:
+        # A viewer that stopped reading loses its oldest events, not the newest
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+
+# Global instance
+contest_events = EventBus()
+
+
+def publish_status(contest_ids: Iterable, contest_status: ContestStatus) -> None:
+    for contest_id in contest_ids:
+        contest_events.publish(contest_id, "status", {"status": contest_status.value})
+
+
+def publish_solve(problem: ContestProblem, user_id, solved_at: datetime, db: Session) -> None:
+    """A problem was awarded: publish the solve and the contest's new scores"""
+    if not contest_events.has_subscribers(problem.contest_id):
+        return
+    contest_events.publish(problem.contest_id, "solve", {
+        "problem_id": problem.id,
+        "problem_index": problem.problem_index,
+        "solved_by": user_id,
+        "solved_at": solved_at.replace(tzinfo=timezone.utc).isoformat(),
+    })
+    scores = db.query(ContestScore.user_id, User.handle, ContestScore.total_points).join(
+        User, User.id == ContestScore.user_id
+    ).filter(ContestScore.contest_id == problem.contest_id).all()
+    contest_events.publish(problem.contest_id, "scores", {"scores": [
+        ContestScoreResponse(user_id=user_id, user_handle=handle, total_points=points)
+        for user_id, handle, points in scores
+    ]})
+
+
+def publish_problems(contest_ids: Iterable, db: Session) -> None:
+    """A problem set was selected; streams hold it back until the contest starts"""
+    watched = [contest_id for contest_id in contest_ids if contest_events.has_subscribers(contest_id)]
+    if not watched:
+        return
+    problems: Dict[str, list] = {}
+    for problem in db.query(ContestProblem).filter(ContestProblem.contest_id.in_(watched)).all():
+        problems.setdefault(_key(problem.contest_id), []).append(ContestProblemResponse.model_validate(problem))
+    for contest_id in watched:
+        contest_events.publish(contest_id, "problems", {"problems": problems.get(_key(contest_id), [])})
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}\n\n"
+
+
+async def contest_event_stream(
+    request: Request,
+    contest_id,
+    snapshot: ContestResponse,
+    hidden_problems: Optional[list],
+    queue: asyncio.Queue
+):
+    """
+    SSE body: the snapshot, then every published event. Problems (known at
+    subscribe time or published later) are held back until the start time.
+    The stream ends after the contest completes.
+    """
+    start_time = snapshot.start_time
+    try:
+        yield format_event("snapshot", snapshot)
+        if snapshot.status == ContestStatus.COMPLETED.value:
+            return
+
+        while True:
+            if hidden_problems is not None and datetime.utcnow() >= start_time:
+                yield format_event("problems", {"problems": hidden_problems})
+                hidden_problems = None
+
+            timeout = KEEPALIVE_SECONDS
+            if hidden_problems is not None:
+                timeout = min(timeout, max((start_time - datetime.utcnow()).total_seconds(), 0))
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                if hidden_problems is None:
+                    yield ": keepalive\n\n"
+                continue
+
+            if event == "problems" and datetime.utcnow() < start_time:
+                hidden_problems = data["problems"]
+                continue
+            yield format_event(event, data)
+            if event == "status" and data["status"] == ContestStatus.COMPLETED.value:
+                return
+    finally:
+        contest_events.unsubscribe(contest_id, queue)
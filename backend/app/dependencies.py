@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from typing import Optional
 from uuid import UUID
 from .database import get_db
 from .models import User
@@ -59,3 +60,19 @@ async def get_confirmed_user(
             detail="Account not confirmed. Please complete the confirmation process by submitting a solution to the Watermelon problem (4A) on Codeforces.",
         )
     return current_user
+
+
+def user_from_token(token: Optional[str], db: Session) -> Optional[User]:
+    """
+    User for an access token, or None if it is invalid. For connections that
+    cannot send the Authorization header (WebSocket); confirmation is not required.
+    """
+    # The token comes from client JSON; anything but a string is invalid
+    payload = decode_access_token(token) if isinstance(token, str) and token else None
+    if payload is None or payload.get("sub") is None:
+        return None
+    try:
+        user_id = UUID(payload["sub"])
+    except ValueError:
+        return None
+    return db.query(User).filter(User.id == user_id).first()
@@ -0,0 +1,77 @@
+"""
+Snapshot cache for public, anonymous feeds (latest/top contests, leaderboard).
+
+These responses only change when a contest completes, so each one is built
+once, stored as pre-serialized JSON bytes with an ETag, and served from memory
+until the contest-completion path calls invalidate(). A TTL bounds staleness
+for changes made outside this process (e.g. replay_ratings.py or another
+worker). The store is a small get/set/clear object so a shared backend can be
+swapped in for multi-process deployments.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+DEFAULT_TTL_SECONDS = 300
+CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=30"
+
+# (body, etag, expires_at)
+Snapshot = Tuple[bytes, str, float]
+
+
+class MemoryStore:
+    """In-process snapshot store"""
+
+    def __init__(self):
+        self._data: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Snapshot]:
+        return self._data.get(key)
+
+    def set(self, key: str, snapshot: Snapshot) -> None:
+        with self._lock:
+            self._data[key] = snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class FeedCache:
+    def __init__(self, store=None, ttl: int = DEFAULT_TTL_SECONDS):
+        self.store = store or MemoryStore()
+        self.ttl = ttl
+
+    def get_snapshot(self, key: str, build: Callable) -> Snapshot:
+        """Return the cached snapshot for key, building it with build() on a miss"""
+        snapshot = self.store.get(key)
+        if snapshot is not None and snapshot[2] > time.monotonic():
+            return snapshot
+
+        body = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        snapshot = (body, etag, time.monotonic() + self.ttl)
+        self.store.set(key, snapshot)
+        return snapshot
+
+    def respond(self, request: Request, key: str, build: Callable) -> Response:
+        """Serve a snapshot with ETag/Cache-Control, answering 304 when the client copy is current"""
+        body, etag, _ = self.get_snapshot(key, build)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self) -> None:
+        """Drop every snapshot; called whenever contest results or ratings change"""
+        self.store.clear()
+
+
+# Global instance
+feed_cache = FeedCache()
@@ -0,0 +1,179 @@
+"""
+Handle search for /api/users/search.
+
+Prefix matches are returned first, then (for queries of 3+ characters)
+handles containing the query elsewhere; each group is ordered
+alphabetically, so an exact match comes first. Matching is case-insensitive.
+
+On PostgreSQL the search runs in SQL against two indexes created by
+migrations.py: a text_pattern_ops btree on lower(handle) for prefixes and a
+pg_trgm GIN index for substrings. Other databases (SQLite) use HandleIndex,
+an in-memory sorted list for prefixes plus a trigram posting list for
+substrings, loaded on first use and updated when users register.
+"""
+import bisect
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from .models import User
+
+MIN_SUBSTRING_LENGTH = 3
+REFRESH_SECONDS = 300
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _escape_like(query: str) -> str:
+    return query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class HandleIndex:
+    """In-memory prefix and trigram index over user handles"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._clear()
+
+    def _clear(self) -> None:
+        self.ids: List = []
+        self.handles: List[str] = []
+        self.ratings: List[int] = []
+        self.position_of: Dict[str, int] = {}
+        self.prefix_keys: List[tuple] = []  # sorted (lower handle, position)
+        self.postings: Dict[str, array] = {}
+
+    def _append(self, user_id, handle: str, rating: int) -> int:
+        position = len(self.ids)
+        self.ids.append(user_id)
+        self.handles.append(handle)
+        self.ratings.append(rating)
+        self.position_of[str(user_id)] = position
+        lower = handle.lower()
+        for gram in _trigrams(lower):
+            self.postings.setdefault(gram, array("i")).append(position)
+        return position
+
+    def load(self, db: Session) -> None:
+        """(Re)build the index from the users table"""
+        users = db.query(User.id, User.handle, User.rating).all()
+        with self._lock:
+            self._clear()
+            postings = {}
+            for position, (user_id, handle, rating) in enumerate(users):
+                self.ids.append(user_id)
+                self.handles.append(handle)
+                self.ratings.append(rating or 0)
+                self.position_of[str(user_id)] = position
+                for gram in _trigrams(handle.lower()):
+                    posting = postings.get(gram)
+                    if posting is None:
+                        postings[gram] = [position]
+                    else:
+                        posting.append(position)
+            # Compact int arrays keep a million-user index small
+            self.postings = {gram: array("i", posting) for gram, posting in postings.items()}
+            self.prefix_keys = sorted((h.lower(), i) for i, h in enumerate(self.handles))
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > REFRESH_SECONDS:
+            self.load(db)
+
+    def invalidate(self) -> None:
+        """Force a reload on next use"""
+        with self._lock:
+            self._loaded_at = None
+
+    def add(self, user_id, handle: str, rating: int) -> None:
+        """Index a newly registered user"""
+        with self._lock:
+            if self._loaded_at is None or str(user_id) in self.position_of:
+                return  # Not loaded yet (the first load reads it) or already indexed
+            position = self._append(user_id, handle, rating)
+            bisect.insort(self.prefix_keys, (handle.lower(), position))
+
+    def update_ratings(self, ratings: Dict) -> None:
+        with self._lock:
+            for user_id, rating in ratings.items():
+                position = self.position_of.get(str(user_id))
+                if position is not None:
+                    self.ratings[position] = rating
+
+    def search(self, query: str, limit: int, exclude_id=None) -> List[Dict]:
+        """Matching users as dicts with id, handle and rating"""
+        q = query.lower()
+        with self._lock:
+            excluded = self.position_of.get(str(exclude_id)) if exclude_id is not None else None
+            # Prefix matches are a contiguous, alphabetical run of prefix_keys
+            positions = []
+            index = bisect.bisect_left(self.prefix_keys, (q,))
+            while index < len(self.prefix_keys) and len(positions) < limit:
+                lower, position = self.prefix_keys[index]
+                if not lower.startswith(q):
+                    break
+                if position != excluded:
+                    positions.append(position)
+                index += 1
+
+            if len(positions) < limit and len(q) >= MIN_SUBSTRING_LENGTH:
+                # Intersect trigram posting lists, smallest first, then verify
+                lists = sorted((self.postings.get(gram) for gram in _trigrams(q)), key=lambda p: len(p) if p else 0)
+                if lists[0]:
+                    candidates = set(lists[0])
+                    for posting in lists[1:]:
+                        candidates.intersection_update(posting)
+                        if not candidates:
+                            break
+                    substring = [
+                        p for p in candidates
+                        if p != excluded and q in self.handles[p].lower() and not self.handles[p].lower().startswith(q)
+                    ]
+                    substring.sort(key=lambda p: self.handles[p].lower())
+                    positions.extend(substring[:limit - len(positions)])
+
+            return [
+                {"id": self.ids[p], "handle": self.handles[p], "rating": self.ratings[p]}
+                for p in positions
+            ]
+
+
+def search_handles_sql(query: str, limit: int, db: Session, exclude_id=None) -> List[Dict]:
+    """PostgreSQL search using the lower(handle) pattern and trigram indexes"""
+    q = query.lower()
+    pattern = _escape_like(q)
+    lower_handle = func.lower(User.handle)
+
+    base = db.query(User.id, User.handle, User.rating)
+    if exclude_id is not None:
+        base = base.filter(User.id != exclude_id)
+
+    if len(q) < MIN_SUBSTRING_LENGTH:
+        matches = base.filter(lower_handle.like(pattern + "%", escape="\\"))
+    else:
+        matches = base.filter(lower_handle.like("%" + pattern + "%", escape="\\"))
+
+    rows = matches.order_by(
+        case((lower_handle.like(pattern + "%", escape="\\"), 0), else_=1),
+        lower_handle
+    ).limit(limit).all()
+    return [{"id": row.id, "handle": row.handle, "rating": row.rating} for row in rows]
+
+
+def search_handles(query: str, limit: int, db: Session, exclude_id=None) -> List[Dict]:
+    """Search handles with the best index available for the database"""
+    if db.get_bind().dialect.name == "postgresql":
+        return search_handles_sql(query, limit, db, exclude_id)
+    handle_index.ensure_loaded(db)
+    return handle_index.search(query, limit, exclude_id)
+
+
+# Global instance
+handle_index = HandleIndex()
@@ -0,0 +1,186 @@
+"""
+In-memory rank index for the leaderboard.
+
+Users are ordered by rating (highest first), ties broken by id. A Fenwick
+tree over rating values counts users per rating, so "how many users rank
+above rating r" and "which rating holds position k" are O(log R) for a
+rating range of size R; each rating keeps a sorted list of the ids at that
+rating. Pages, rank-of-user and users-around-a-user are answered without
+touching the database.
+
+The index is loaded from users on first use, updated in place when ratings
+are applied or users register, and reloaded after REFRESH_SECONDS so changes
+made by other processes (replay_ratings.py, other workers) are picked up.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from .models import User
+
+REFRESH_SECONDS = 300
+RATING_PADDING = 1000
+
+
+class RankIndex:
+    """Order-statistic index of users by (rating desc, id)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._clear()
+
+    def _clear(self, min_rating: int = 0, max_rating: int = 0) -> None:
+        self.rating_of: Dict = {}
+        self.handle_of: Dict = {}
+        self.ids_at: Dict[int, List[str]] = {}
+        self.min_rating = min_rating
+        self.max_rating = max_rating
+        self.tree = [0] * (max_rating - min_rating + 2)
+
+    # Fenwick tree positions: 1 is the highest rating, so prefix sums count
+    # users rated at least a given value
+    def _pos(self, rating: int) -> int:
+        return self.max_rating - rating + 1
+
+    def _add(self, rating: int, delta: int) -> None:
+        i = self._pos(rating)
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def _count_at_least(self, rating: int) -> int:
+        i = min(self._pos(rating), len(self.tree) - 1)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _rating_at(self, k: int) -> int:
+        """Rating of the user at 1-based position k (k <= number of users)"""
+        pos = 0
+        step = 1 << (len(self.tree).bit_length())
+        while step:
+            nxt = pos + step
+            if nxt < len(self.tree) and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return self.max_rating - pos
+
+    # Users are keyed by str(id) so ids sort the same way everywhere
+    def _insert(self, key: str, handle: str, rating: int) -> None:
+        if rating < self.min_rating or rating > self.max_rating:
+            # Outside the tree's range: rebuild with a wider range
+            users = [(k, self.handle_of[k], r) for k, r in self.rating_of.items()]
+            users.append((key, handle, rating))
+            self._build(users)
+            return
+        self.rating_of[key] = rating
+        self.handle_of[key] = handle
+        bisect.insort(self.ids_at.setdefault(rating, []), key)
+        self._add(rating, 1)
+
+    def _remove(self, key: str) -> None:
+        rating = self.rating_of.pop(key)
+        self.handle_of.pop(key)
+        ids = self.ids_at[rating]
+        del ids[bisect.bisect_left(ids, key)]
+        if not ids:
+            del self.ids_at[rating]
+        self._add(rating, -1)
+
+    def _build(self, users) -> None:
+        ratings = [rating for _, _, rating in users]
+        low = min(ratings, default=0) - RATING_PADDING
+        high = max(ratings, default=0) + RATING_PADDING
+        self._clear(low, high)
+        for key, handle, rating in users:
+            self.rating_of[key] = rating
+            self.handle_of[key] = handle
+            self.ids_at.setdefault(rating, []).append(key)
+        for rating, ids in self.ids_at.items():
+            ids.sort()
+            self._add(rating, len(ids))
+
+    def load(self, db: Session) -> None:
+        """(Re)build the index from the users table"""
+        users = db.query(User.id, User.handle, User.rating).all()
+        with self._lock:
+            self._build([(str(user_id), handle, rating or 0) for user_id, handle, rating in users])
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > REFRESH_SECONDS:
+            self.load(db)
+
+    def invalidate(self) -> None:
+        """Force a reload on next use"""
+        with self._lock:
+            self._loaded_at = None
+
+    @property
+    def total(self) -> int:
+        return len(self.rating_of)
+
+    def upsert(self, user_id, handle: str, rating: int) -> None:
+        """Add a user or move them to a new rating"""
+        key = str(user_id)
+        with self._lock:
+            if self._loaded_at is None:
+                return  # Not loaded yet; the first load reads the current rating
+            if key in self.rating_of:
+                if self.rating_of[key] == rating:
+                    return
+                self._remove(key)
+            self._insert(key, handle, rating)
+
+    def update_ratings(self, ratings: Dict) -> None:
+        """Apply new ratings for users already in the index"""
+        with self._lock:
+            for user_id, rating in ratings.items():
+                handle = self.handle_of.get(str(user_id))
+                if handle is not None:
+                    self.upsert(user_id, handle, rating)
+
+    def rank_of(self, user_id) -> Optional[int]:
+        """1-based leaderboard position of a user, or None if unknown"""
+        key = str(user_id)
+        with self._lock:
+            rating = self.rating_of.get(key)
+            if rating is None:
+                return None
+            above = self._count_at_least(rating + 1)
+            return above + bisect.bisect_left(self.ids_at[rating], key) + 1
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, UUID, str, int]]:
+        """Entries (rank, user_id, handle, rating) for positions offset+1 .. offset+limit"""
+        with self._lock:
+            result = []
+            position = offset + 1
+            end = min(offset + limit, self.total)
+            while position <= end:
+                rating = self._rating_at(position)
+                ids = self.ids_at[rating]
+                start = position - self._count_at_least(rating + 1) - 1
+                for key in ids[start:start + end - position + 1]:
+                    result.append((position, UUID(key), self.handle_of[key], rating))
+                    position += 1
+            return result
+
+    def around(self, user_id, radius: int) -> List[Tuple[int, UUID, str, int]]:
+        """Entries within radius positions of a user (including the user)"""
+        rank = self.rank_of(user_id)
+        if rank is None:
+            return []
+        offset = max(0, rank - 1 - radius)
+        return self.page(offset, rank - offset + radius)
+
+
+# Global instance
+rank_index = RankIndex()
@@ -19,8 +19,9 @@ except Exception as e:
 
 # Import routers and other components
 try:
-    from .routers import auth, users, challenges, contests, tournaments
+    from .routers import auth, users, challenges, contests, tournaments, rooms, notifications
     from .submission_checker import start_scheduler, scheduler
+    from .notifications import notification_hub
     from .migrations import run_migrations
 except Exception as e:
     print(f"[ERROR] Failed to import modules: {e}", file=sys.stderr)
@@ -28,6 +29,7 @@ except Exception as e:
     traceback.print_exc(file=sys.stderr)
     # Set defaults to prevent crashes
     scheduler = None
+    notification_hub = None
     start_scheduler = lambda: None
     run_migrations = lambda: None
 
@@ -61,8 +63,14 @@ async def lifespan(app: FastAPI):
         traceback.print_exc(file=sys.stderr)
         # Continue even if scheduler fails to start
     
+    # Start the notification fan-out (LISTEN thread for the postgres backend)
+    if notification_hub:
+        notification_hub.start()
+    
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    if notification_hub:
+        notification_hub.stop()
 
 
 app = FastAPI(title="CP VS API", version="1.0.0", lifespan=lifespan)
@@ -105,6 +113,8 @@ try:
     app.include_router(contests.router)
     app.include_router(contests.public_router)
     app.include_router(tournaments.router)
+    app.include_router(rooms.router)
+    app.include_router(notifications.router)
 except NameError:
     print("[ERROR] Failed to include routers - some modules may not have loaded", file=sys.stderr)
 
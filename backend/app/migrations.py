@@ -3,14 +3,111 @@ Database migration utilities for adding new columns and tables.
 """
 from sqlalchemy import text, inspect
 from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
 from .database import engine
 from .models import (
     Base, RatingHistory, Tournament, TournamentSlot, TournamentInvite,
-    TournamentMatch, TournamentRoundSchedule
+    TournamentMatch, TournamentRoundSchedule, TournamentRoundProblem, UserBusyInterval
 )
+from .busy_intervals import backfill_busy_intervals
+from datetime import datetime
 import os
 
 
+# Versioned index migrations: (version, index name, table, columns).
+# Applied in order and recorded in schema_migrations. Never edit or reorder an
+# applied entry; append a new version instead. The same indexes are declared in
+# models.py so fresh databases get them from create_all.
+INDEX_MIGRATIONS = [
+    (1, "ix_contest_scores_contest_user", "contest_scores", "contest_id, user_id"),
+    (2, "ix_contest_problems_contest_solved_by", "contest_problems", "contest_id, solved_by"),
+    (3, "ix_contests_status_start_time", "contests", "status, start_time"),
+    (4, "ix_contests_status_end_time", "contests", "status, end_time"),
+    (5, "ix_contests_user1_status", "contests", "user1_id, status"),
+    (6, "ix_contests_user2_status", "contests", "user2_id, status"),
+    (7, "ix_challenges_challenged_status", "challenges", "challenged_id, status"),
+    (8, "ix_tournament_matches_tournament_round_position", "tournament_matches", "tournament_id, round_number, bracket_position"),
+]
+
+
+BUSY_INTERVAL_CONSTRAINT = "ex_user_busy_intervals_no_overlap"
+
+
+def ensure_busy_interval_constraint(bind: Engine = None):
+    """
+    Add the PostgreSQL exclusion constraint blocking overlapping bookings of
+    the same user, or recreate it if it predates the tournament exemption.
+
+    Tournament rows are left out (WHERE NOT is_tournament): a round is booked
+    only when the previous one finishes and must not fail on what was booked
+    in the meantime. busy_intervals.find_round_reservations keeps new
+    challenges out of scheduled rounds instead.
+    """
+    bind = bind or engine
+    with bind.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        definition = conn.execute(text(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conname = :name"
+        ), {"name": BUSY_INTERVAL_CONSTRAINT}).scalar()
+        if definition is not None and "WHERE" in definition:
+            return
+        if definition is not None:
+            conn.execute(text(f"ALTER TABLE user_busy_intervals DROP CONSTRAINT {BUSY_INTERVAL_CONSTRAINT}"))
+        conn.execute(text(f"""
+            ALTER TABLE user_busy_intervals
+            ADD CONSTRAINT {BUSY_INTERVAL_CONSTRAINT}
+            EXCLUDE USING gist (user_id WITH =, tsrange(start_time, end_time) WITH &&)
+            WHERE (NOT is_tournament)
+        """))
+
+
+def run_index_migrations(bind: Engine = None):
+    """
+    Apply pending INDEX_MIGRATIONS and record them in schema_migrations.
+
+    On PostgreSQL indexes are built with CREATE INDEX CONCURRENTLY (outside a
+    transaction) so writes to hot tables are not blocked; an invalid index left
+    behind by an interrupted build is dropped and rebuilt.
+    """
+    bind = bind or engine
+    is_postgres = bind.dialect.name == 'postgresql'
+    
+    with bind.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR NOT NULL,
+                applied_at TIMESTAMP NOT NULL
+            )
+        """))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    
+    for version, name, table, columns in INDEX_MIGRATIONS:
+        if version in applied:
+            continue
+        
+        print(f"Applying index migration {version}: {name} ON {table}({columns})...")
+        if is_postgres:
+            with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                invalid = conn.execute(text("""
+                    SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE c.relname = :name AND NOT i.indisvalid
+                """), {"name": name}).first()
+                if invalid:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
+        else:
+            with bind.begin() as conn:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+        
+        with bind.begin() as conn:
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()}
+            )
+        print(f"[OK] Index migration {version} applied")
+
+
 def clear_all_data(conn):
     """Clear all data from all tables"""
     inspector = inspect(engine)
@@ -29,6 +126,26 @@ def clear_all_data(conn):
         conn.execute(text("DELETE FROM rating_history"))
         print(f"  [OK] Deleted {count} records from rating_history")
     
+    if 'user_busy_intervals' in tables:
+        count = conn.execute(text("SELECT COUNT(*) FROM user_busy_intervals")).scalar()
+        conn.execute(text("DELETE FROM user_busy_intervals"))
+        print(f"  [OK] Deleted {count} records from user_busy_intervals")
+    
+    if 'room_problems' in tables:
+        count = conn.execute(text("SELECT COUNT(*) FROM room_problems")).scalar()
+        conn.execute(text("DELETE FROM room_problems"))
+        print(f"  [OK] Deleted {count} records from room_problems")
+    
+    if 'room_participants' in tables:
+        count = conn.execute(text("SELECT COUNT(*) FROM room_participants")).scalar()
+        conn.execute(text("DELETE FROM room_participants"))
+        print(f"  [OK] Deleted {count} records from room_participants")
+    
+    if 'rooms' in tables:
+        count = conn.execute(text("SELECT COUNT(*) FROM rooms")).scalar()
+        conn.execute(text("DELETE FROM rooms"))
+        print(f"  [OK] Deleted {count} records from rooms")
+    
     if 'contest_scores' in tables:
         count = conn.execute(text("SELECT COUNT(*) FROM contest_scores")).scalar()
         conn.execute(text("DELETE FROM contest_scores"))
@@ -39,6 +156,11 @@ def clear_all_data(conn):
         conn.execute(text("DELETE FROM contest_problems"))
         print(f"  [OK] Deleted {count} records from contest_problems")
     
+    if 'tournament_round_problems' in tables:
+        count = conn.execute(text("SELECT COUNT(*) FROM tournament_round_problems")).scalar()
+        conn.execute(text("DELETE FROM tournament_round_problems"))
+        print(f"  [OK] Deleted {count} records from tournament_round_problems")
+    
     if 'contests' in tables:
         count = conn.execute(text("SELECT COUNT(*) FROM contests")).scalar()
         conn.execute(text("DELETE FROM contests"))
@@ -216,6 +338,85 @@ def run_migrations():
                 else:
                     print("[OK] 'tournament_match_id' column already exists in contests table")
             
+            # Add format and num_rounds to tournaments; existing tournaments are
+            # single elimination, whose round count derives from num_participants
+            if 'tournaments' in inspector.get_table_names():
+                columns = [col['name'] for col in inspector.get_columns('tournaments')]
+                if 'format' not in columns:
+                    print("Adding 'format' column to tournaments table...")
+                    if engine.dialect.name == 'postgresql':
+                        conn.execute(text("""
+                            DO $$
+                            BEGIN
+                                CREATE TYPE tournamentformat AS ENUM ('SINGLE_ELIMINATION', 'SWISS');
+                            EXCEPTION
+                                WHEN duplicate_object THEN NULL;
+                            END $$;
+                        """))
+                        conn.execute(text(
+                            "ALTER TABLE tournaments ADD COLUMN IF NOT EXISTS format tournamentformat "
+                            "NOT NULL DEFAULT 'SINGLE_ELIMINATION'"
+                        ))
+                    else:
+                        # SQLite
+                        conn.execute(text(
+                            "ALTER TABLE tournaments ADD COLUMN format VARCHAR(18) NOT NULL DEFAULT 'SINGLE_ELIMINATION'"
+                        ))
+                    print("[OK] Added 'format' column to tournaments table")
+                else:
+                    print("[OK] 'format' column already exists in tournaments table")
+                
+                if 'num_rounds' not in columns:
+                    print("Adding 'num_rounds' column to tournaments table...")
+                    conn.execute(text("ALTER TABLE tournaments ADD COLUMN num_rounds INTEGER"))
+                    print("[OK] Added 'num_rounds' column to tournaments table")
+                else:
+                    print("[OK] 'num_rounds' column already exists in tournaments table")
+                
+                if 'shared_problems' not in columns:
+                    print("Adding 'shared_problems' column to tournaments table...")
+                    if engine.dialect.name == 'postgresql':
+                        conn.execute(text("ALTER TABLE tournaments ADD COLUMN IF NOT EXISTS shared_problems BOOLEAN NOT NULL DEFAULT FALSE"))
+                    else:
+                        # SQLite
+                        conn.execute(text("ALTER TABLE tournaments ADD COLUMN shared_problems BOOLEAN NOT NULL DEFAULT 0"))
+                    print("[OK] Added 'shared_problems' column to tournaments table")
+                else:
+                    print("[OK] 'shared_problems' column already exists in tournaments table")
+            
+            # Add round_problem_id to contest_problems (the shared round set a problem was copied from)
+            if 'contest_problems' in inspector.get_table_names():
+                columns = [col['name'] for col in inspector.get_columns('contest_problems')]
+                if 'round_problem_id' not in columns:
+                    print("Adding 'round_problem_id' column to contest_problems table...")
+                    if engine.dialect.name == 'postgresql':
+                        conn.execute(text("ALTER TABLE contest_problems ADD COLUMN IF NOT EXISTS round_problem_id UUID"))
+                    else:
+                        # SQLite
+                        conn.execute(text("ALTER TABLE contest_problems ADD COLUMN round_problem_id VARCHAR(36)"))
+                    print("[OK] Added 'round_problem_id' column to contest_problems table")
+                else:
+                    print("[OK] 'round_problem_id' column already exists in contest_problems table")
+            
+            # Add bracket_position to tournament_matches; existing matches get the
+            # position of the block of slots their first player came from
+            if 'tournament_matches' in inspector.get_table_names():
+                columns = [col['name'] for col in inspector.get_columns('tournament_matches')]
+                if 'bracket_position' not in columns:
+                    print("Adding 'bracket_position' column to tournament_matches table...")
+                    conn.execute(text("ALTER TABLE tournament_matches ADD COLUMN bracket_position INTEGER"))
+                    conn.execute(text("""
+                        UPDATE tournament_matches
+                        SET bracket_position = (
+                            SELECT (s.slot_number - 1) / (1 << tournament_matches.round_number)
+                            FROM tournament_slots s
+                            WHERE s.id = tournament_matches.slot1_id
+                        )
+                    """))
+                    print("[OK] Added 'bracket_position' column to tournament_matches table")
+                else:
+                    print("[OK] 'bracket_position' column already exists in tournament_matches table")
+            
         # Create rating_history table if it doesn't exist (outside transaction)
         if 'rating_history' not in inspector.get_table_names():
             print("Creating 'rating_history' table...")
@@ -236,6 +437,7 @@ def run_migrations():
             ('tournament_invites', TournamentInvite),
             ('tournament_round_schedules', TournamentRoundSchedule),
             ('tournament_matches', TournamentMatch),
+            ('tournament_round_problems', TournamentRoundProblem),
         ]
         
         for table_name, model_class in tournament_tables:
@@ -253,6 +455,36 @@ def run_migrations():
             else:
                 print(f"[OK] '{table_name}' table already exists")
         
+        # Enforce one rating_history entry per (contest, user)
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS uq_rating_history_contest_user
+                    ON rating_history(contest_id, user_id)
+                """))
+            print("[OK] Unique index on rating_history(contest_id, user_id) verified")
+        except Exception as index_error:
+            print(f"[WARNING] Failed to create unique index on rating_history: {index_error}")
+            print("  Duplicate (contest_id, user_id) rows must be removed before it can be created")
+        
+        # Handle search indexes: prefix (pattern ops) and substring (trigram) lookups on lower(handle)
+        if engine.dialect.name == 'postgresql':
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                    conn.execute(text("""
+                        CREATE INDEX IF NOT EXISTS ix_users_handle_lower_prefix
+                        ON users (lower(handle) text_pattern_ops)
+                    """))
+                    conn.execute(text("""
+                        CREATE INDEX IF NOT EXISTS ix_users_handle_trgm
+                        ON users USING gin (lower(handle) gin_trgm_ops)
+                    """))
+                print("[OK] Handle search indexes verified")
+            except Exception as index_error:
+                print(f"[WARNING] Failed to create handle search indexes: {index_error}")
+                print("  Handle search will fall back to sequential scans")
+        
         # Ensure all other tables exist (outside transaction for create_all)
         print("Ensuring all tables exist...")
         try:
@@ -264,6 +496,31 @@ def run_migrations():
             traceback.print_exc()
             # Don't fail - tables might already exist
         
+        # Busy intervals: fill from live contests on first run, then block
+        # overlapping non-tournament bookings per user in the database (PostgreSQL only)
+        try:
+            with Session(bind=engine) as session:
+                if session.query(UserBusyInterval.id).first() is None:
+                    written = backfill_busy_intervals(session)
+                    print(f"[OK] Backfilled {written} user_busy_intervals rows")
+        except Exception as backfill_error:
+            print(f"[WARNING] Failed to backfill user_busy_intervals: {backfill_error}")
+        
+        if engine.dialect.name == 'postgresql':
+            try:
+                ensure_busy_interval_constraint()
+                print("[OK] Busy interval exclusion constraint verified")
+            except Exception as constraint_error:
+                print(f"[WARNING] Failed to add busy interval exclusion constraint: {constraint_error}")
+                print("  Existing overlapping bookings must be resolved before it can be added")
+        
+        # Composite indexes for hot query shapes
+        try:
+            run_index_migrations()
+        except Exception as index_error:
+            print(f"[WARNING] Index migration failed: {index_error}")
+            print("  Pending index migrations will be retried on next startup")
+        
     except Exception as e:
         print(f"[WARNING] Migration error: {e}")
         print("Attempting to continue - tables will be created by create_all()")
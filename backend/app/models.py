@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum as SQLEnum, TypeDecorator, Boolean
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum as SQLEnum, TypeDecorator, Boolean, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 import enum
 from .database import Base
+from .rating import INITIAL_RATING
 
 
 # UUID type that works with both PostgreSQL and SQLite
@@ -67,6 +68,11 @@ class TournamentStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+class TournamentFormat(str, enum.Enum):
+    SINGLE_ELIMINATION = "single_elimination"
+    SWISS = "swiss"
+
+
 class TournamentInviteStatus(str, enum.Enum):
     PENDING = "pending"
     ACCEPTED = "accepted"
@@ -85,7 +91,7 @@ class User(Base):
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     handle = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
-    rating = Column(Integer, default=1000, nullable=False, index=True)
+    rating = Column(Integer, default=INITIAL_RATING, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_confirmed = Column(Boolean, default=False, nullable=False, index=True)
     confirmation_deadline = Column(DateTime, nullable=True)
@@ -99,10 +105,14 @@ class User(Base):
     tournament_slots = relationship("TournamentSlot", back_populates="user")
     tournament_invites_sent = relationship("TournamentInvite", foreign_keys="TournamentInvite.invited_user_id", back_populates="invited_user")
     tournaments_created = relationship("Tournament", foreign_keys="Tournament.creator_id", back_populates="creator")
+    stats = relationship("UserStats", back_populates="user", uselist=False)
 
 
 class Challenge(Base):
     __tablename__ = "challenges"
+    __table_args__ = (
+        Index("ix_challenges_challenged_status", "challenged_id", "status"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     challenger_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
@@ -120,6 +130,12 @@ class Challenge(Base):
 
 class Contest(Base):
     __tablename__ = "contests"
+    __table_args__ = (
+        Index("ix_contests_status_start_time", "status", "start_time"),
+        Index("ix_contests_status_end_time", "status", "end_time"),
+        Index("ix_contests_user1_status", "user1_id", "status"),
+        Index("ix_contests_user2_status", "user2_id", "status"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     challenge_id = Column(GUID(), ForeignKey("challenges.id"), nullable=True, unique=True)
@@ -144,6 +160,9 @@ class Contest(Base):
 
 class ContestProblem(Base):
     __tablename__ = "contest_problems"
+    __table_args__ = (
+        Index("ix_contest_problems_contest_solved_by", "contest_id", "solved_by"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     contest_id = Column(GUID(), ForeignKey("contests.id"), nullable=False)
@@ -152,16 +171,21 @@ class ContestProblem(Base):
     problem_url = Column(String, nullable=False)
     points = Column(Integer, nullable=False)  # 100, 200, 300, 400, 500, 600
     division = Column(Integer, nullable=False)
+    round_problem_id = Column(GUID(), ForeignKey("tournament_round_problems.id"), nullable=True)  # Set when copied from a shared round set
     solved_by = Column(GUID(), ForeignKey("users.id"), nullable=True)
     solved_at = Column(DateTime, nullable=True)
 
     # Relationships
     contest = relationship("Contest", back_populates="problems")
     solver = relationship("User")
+    round_problem = relationship("TournamentRoundProblem")
 
 
 class ContestScore(Base):
     __tablename__ = "contest_scores"
+    __table_args__ = (
+        Index("ix_contest_scores_contest_user", "contest_id", "user_id"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     contest_id = Column(GUID(), ForeignKey("contests.id"), nullable=False)
@@ -176,6 +200,10 @@ class ContestScore(Base):
 
 class RatingHistory(Base):
     __tablename__ = "rating_history"
+    __table_args__ = (
+        # One entry per user per contest, so ratings can never be applied twice
+        UniqueConstraint("contest_id", "user_id", name="uq_rating_history_contest_user"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
@@ -190,13 +218,123 @@ class RatingHistory(Base):
     contest = relationship("Contest", back_populates="rating_history")
 
 
+class UserStats(Base):
+    """Per-user contest totals, maintained incrementally when ratings are applied"""
+    __tablename__ = "user_stats"
+
+    user_id = Column(GUID(), ForeignKey("users.id"), primary_key=True)
+    total_contests = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    draws = Column(Integer, default=0, nullable=False)
+    best_rating = Column(Integer, nullable=True)
+    current_win_streak = Column(Integer, default=0, nullable=False)
+    longest_win_streak = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User", back_populates="stats")
+
+
+class HeadToHead(Base):
+    """Record between two users, keyed by the ordered pair (user_a_id < user_b_id as strings)"""
+    __tablename__ = "head_to_head"
+
+    user_a_id = Column(GUID(), ForeignKey("users.id"), primary_key=True)
+    user_b_id = Column(GUID(), ForeignKey("users.id"), primary_key=True)
+    user_a_wins = Column(Integer, default=0, nullable=False)
+    user_b_wins = Column(Integer, default=0, nullable=False)
+    draws = Column(Integer, default=0, nullable=False)
+    last_played_at = Column(DateTime, nullable=True)
+
+
+class UserBusyInterval(Base):
+    """Time a user is booked for a scheduled or active contest (one row per user and contest)"""
+    __tablename__ = "user_busy_intervals"
+    __table_args__ = (
+        UniqueConstraint("user_id", "contest_id", name="uq_user_busy_intervals_user_contest"),
+        Index("ix_user_busy_intervals_user_range", "user_id", "start_time", "end_time"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    contest_id = Column(GUID(), ForeignKey("contests.id"), nullable=False, index=True)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    is_tournament = Column(Boolean, default=False, nullable=False)
+
+    # Relationships
+    user = relationship("User")
+    contest = relationship("Contest")
+
+
+class Room(Base):
+    """Free-for-all contest: any number of participants play the same problems"""
+    __tablename__ = "rooms"
+    __table_args__ = (
+        Index("ix_rooms_status_start_time", "status", "start_time"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    creator_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    difficulty = Column(Integer, nullable=False)  # 1-4
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    status = Column(SQLEnum(ContestStatus), default=ContestStatus.SCHEDULED)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    creator = relationship("User", foreign_keys=[creator_id])
+    participants = relationship("RoomParticipant", back_populates="room", cascade="all, delete-orphan")
+    problems = relationship("RoomProblem", back_populates="room", cascade="all, delete-orphan")
+
+
+class RoomParticipant(Base):
+    __tablename__ = "room_participants"
+    __table_args__ = (
+        UniqueConstraint("room_id", "user_id", name="uq_room_participants_room_user"),
+        Index("ix_room_participants_user_id", "user_id"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    room_id = Column(GUID(), ForeignKey("rooms.id"), nullable=False)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    total_points = Column(Integer, default=0, nullable=False)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    room = relationship("Room", back_populates="participants")
+    user = relationship("User")
+
+
+class RoomProblem(Base):
+    __tablename__ = "room_problems"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    room_id = Column(GUID(), ForeignKey("rooms.id"), nullable=False, index=True)
+    problem_index = Column(String, nullable=False)  # 'A' to 'F'
+    problem_code = Column(String, nullable=False)
+    problem_url = Column(String, nullable=False)
+    points = Column(Integer, nullable=False)
+    division = Column(Integer, nullable=False)
+    solved_by = Column(GUID(), ForeignKey("users.id"), nullable=True)  # First solver among all participants
+    solved_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    room = relationship("Room", back_populates="problems")
+    solver = relationship("User")
+
+
 class Tournament(Base):
     __tablename__ = "tournaments"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     creator_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
-    num_participants = Column(Integer, nullable=False)  # 4, 8, 16, 32, or 64
+    num_participants = Column(Integer, nullable=False)  # Elimination: power of two from 4 to 1024; Swiss: even, 4 to 1024
     difficulty = Column(Integer, nullable=False)  # 1-4
+    format = Column(SQLEnum(TournamentFormat), default=TournamentFormat.SINGLE_ELIMINATION, nullable=False)
+    num_rounds = Column(Integer, nullable=True)  # Swiss only; elimination derives it from num_participants
+    shared_problems = Column(Boolean, default=False, nullable=False)  # One problem set per round for all matches
     status = Column(SQLEnum(TournamentStatus), default=TournamentStatus.PENDING)
     created_at = Column(DateTime, default=datetime.utcnow)
     start_time = Column(DateTime, nullable=True)  # When all slots filled
@@ -207,6 +345,7 @@ class Tournament(Base):
     invites = relationship("TournamentInvite", back_populates="tournament", cascade="all, delete-orphan")
     matches = relationship("TournamentMatch", back_populates="tournament", cascade="all, delete-orphan")
     round_schedules = relationship("TournamentRoundSchedule", back_populates="tournament", cascade="all, delete-orphan")
+    round_problems = relationship("TournamentRoundProblem", back_populates="tournament", cascade="all, delete-orphan")
 
 
 class TournamentSlot(Base):
@@ -255,12 +394,37 @@ class TournamentRoundSchedule(Base):
     tournament = relationship("Tournament", back_populates="round_schedules")
 
 
+class TournamentRoundProblem(Base):
+    """A problem of a round's shared set; each contest of the round copies it into contest_problems"""
+    __tablename__ = "tournament_round_problems"
+    __table_args__ = (
+        UniqueConstraint("tournament_id", "round_number", "problem_index", name="uq_tournament_round_problems_round_index"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    tournament_id = Column(GUID(), ForeignKey("tournaments.id"), nullable=False)
+    round_number = Column(Integer, nullable=False)
+    problem_index = Column(String, nullable=False)  # 'A' to 'F'
+    problem_code = Column(String, nullable=False)
+    problem_url = Column(String, nullable=False)
+    points = Column(Integer, nullable=False)
+    division = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    tournament = relationship("Tournament", back_populates="round_problems")
+
+
 class TournamentMatch(Base):
     __tablename__ = "tournament_matches"
+    __table_args__ = (
+        Index("ix_tournament_matches_tournament_round_position", "tournament_id", "round_number", "bracket_position"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     tournament_id = Column(GUID(), ForeignKey("tournaments.id"), nullable=False)
     round_number = Column(Integer, nullable=False)  # 1, 2, 3...
+    bracket_position = Column(Integer, nullable=True)  # 0-based within the round; winner advances to position // 2
     slot1_id = Column(GUID(), ForeignKey("tournament_slots.id"), nullable=False)
     slot2_id = Column(GUID(), ForeignKey("tournament_slots.id"), nullable=False)
     user1_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,186 @@
+"""
+Per-user notifications pushed over WebSocket.
+
+Routers and scheduler jobs call notification_hub.notify(user_ids, event, data)
+once their change is committed, and every open /api/notifications/ws
+connection of those users receives {"event": ..., "data": ...}:
+
+- challenge_received: a challenge was sent to the user (with their pending count)
+- pending_challenges: the user's pending challenge count changed
+- challenge_accepted: the user's challenge was accepted and its contest created
+- tournament_invite: the user was invited to a tournament slot
+- confirmed: the user's account confirmation went through
+- contest_starting: one of the user's contests has started
+
+Messages go through a fan-out backend before reaching local connections, so
+several API instances can share one hub. The in-memory backend (the default)
+delivers within the process. With NOTIFICATION_BACKEND=postgres every message
+is sent with pg_notify and each instance LISTENs on the channel and delivers
+to the connections it serves.
+"""
+import json
+import os
+import select
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from .contest_events import EventBus
+from .database import engine
+
+
+class NotificationBackend(ABC):
+    """Fan-out transport: publish() must reach the deliver callback of every instance"""
+
+    def attach(self, deliver: Callable[[dict], None]) -> None:
+        self.deliver = deliver
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    def publish(self, message: dict) -> None:
+        """Send a message to every instance; must not block the event loop"""
+
+
+class InMemoryBackend(NotificationBackend):
+    """Single-process fan-out"""
+
+    def publish(self, message: dict) -> None:
+        self.deliver(message)
+
+
+class PostgresBackend(NotificationBackend):
+    """
+    Cross-instance fan-out with PostgreSQL LISTEN/NOTIFY (payloads stay well
+    under the 8000-byte limit). Messages are sent in order by one background
+    thread over its own connection, so notify() never waits on the database.
+    """
+
+    CHANNEL = "notifications"
+    POLL_SECONDS = 5
+
+    def __init__(self, engine, channel: str = CHANNEL):
+        self.engine = engine
+        self.channel = channel
+        self._stopping = threading.Event()
+        self._thread = None
+        self._publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notification-publisher")
+        self._publish_conn = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="notification-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._publisher.shutdown(wait=True)
+
+    def publish(self, message: dict) -> None:
+        self._publisher.submit(self._send, json.dumps(message))
+
+    def _connect(self):
+        """A dedicated autocommit DBAPI connection, taken out of the pool for good"""
+        raw = self.engine.raw_connection()
+        raw.detach()
+        conn = raw.driver_connection
+        conn.autocommit = True
+        return conn
+
+    def _send(self, payload: str) -> None:
+        # Runs on the publisher thread; one reconnect if the connection went away
+        for attempt in range(2):
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                with self._publish_conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                return
+            except Exception as e:
+                self._close(self._publish_conn)
+                self._publish_conn = None
+                if attempt:
+                    print(f"[WARNING] Failed to send notification: {e}")
+
+    @staticmethod
+    def _close(conn) -> None:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _listen(self) -> None:
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                print(f"[OK] Listening for notifications on channel {self.channel}")
+
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], self.POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.deliver(json.loads(conn.notifies.pop(0).payload))
+            except Exception as e:
+                print(f"[WARNING] Notification listener error: {e}")
+                self._stopping.wait(self.POLL_SECONDS)
+            finally:
+                self._close(conn)
+
+
+def create_backend(name: Optional[str] = None) -> NotificationBackend:
+    """Backend named by NOTIFICATION_BACKEND ("memory" or "postgres")"""
+    name = (name or os.getenv("NOTIFICATION_BACKEND", "memory")).lower()
+    if name == "postgres":
+        if engine is not None and engine.dialect.name == "postgresql":
+            return PostgresBackend(engine)
+        print("[WARNING] NOTIFICATION_BACKEND=postgres needs a PostgreSQL database; using the in-memory backend")
+    elif name != "memory":
+        print(f"[WARNING] Unknown NOTIFICATION_BACKEND {name!r}; using the in-memory backend")
+    return InMemoryBackend()
+
+
+class NotificationHub:
+    def __init__(self, backend: NotificationBackend):
+        self.backend = backend
+        self.connections = EventBus()
+        backend.attach(self._deliver)
+
+    def start(self) -> None:
+        self.backend.start()
+
+    def stop(self) -> None:
+        self.backend.stop()
+
+    def notify(self, user_ids: Iterable, event: str, data=None) -> None:
+        """Send an event to every connection of the given users; never raises"""
+        message = {
+            "user_ids": [str(user_id) for user_id in user_ids],
+            "event": event,
+            "data": jsonable_encoder(data or {}),
+        }
+        if not message["user_ids"]:
+            return
+        try:
+            self.backend.publish(message)
+        except Exception as e:
+            print(f"[WARNING] Failed to publish {event} notification: {e}")
+
+    def _deliver(self, message: dict) -> None:
+        for user_id in message["user_ids"]:
+            self.connections.publish(user_id, message["event"], message["data"])
+
+
+# Global instance
+notification_hub = NotificationHub(create_backend())
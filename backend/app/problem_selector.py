@@ -32,12 +32,21 @@ async def get_unsolved_problems(
     Select 6 problems (A-F) from the target division that neither user has solved.
     Returns list of problem dicts with problem_index, problem_code, problem_url, points, division
     """
+    return await get_problems_unsolved_by([handle1, handle2], difficulty)
+
+
+async def get_problems_unsolved_by(handles: List[str], difficulty: int) -> List[Dict]:
+    """
+    Select 6 problems (A-F) from the target division that none of the users
+    has solved, i.e. outside the union of their (cached) solved sets. Used for
+    two-player contests and for the shared problem set of a tournament round.
+    """
     division = DIFFICULTY_TO_DIVISION.get(difficulty, 3)
     
-    # Get solved problems for both users
-    solved1 = await cf_api.get_user_solved_problems(handle1)
-    solved2 = await cf_api.get_user_solved_problems(handle2)
-    solved_both = solved1.union(solved2)
+    # Get solved problems for every user (one cached lookup per handle)
+    solved_both: Set[str] = set()
+    for handle in handles:
+        solved_both |= await cf_api.get_user_solved_problems(handle)
     
     # Get all problems
     problems_data = await cf_api.get_problems()
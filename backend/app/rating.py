@@ -2,8 +2,12 @@
 Elo rating system implementation for CP VS contests.
 """
 
+# Rating of a new user, and the default Elo K-factor
+INITIAL_RATING = 1000
+K_FACTOR = 32
 
-def calculate_elo_rating(rating1: int, rating2: int, score1: float, score2: float, k_factor: int = 32) -> tuple:
+
+def calculate_elo_rating(rating1: int, rating2: int, score1: float, score2: float, k_factor: int = K_FACTOR) -> tuple:
     """
     Calculate new ratings using Elo system.
     
@@ -12,7 +16,7 @@ def calculate_elo_rating(rating1: int, rating2: int, score1: float, score2: floa
         rating2: Current rating of user 2
         score1: Score for user 1 (1.0 for win, 0.5 for draw, 0.0 for loss)
         score2: Score for user 2 (1.0 for win, 0.5 for draw, 0.0 for loss)
-        k_factor: K-factor for rating changes (default 32)
+        k_factor: K-factor for rating changes (default K_FACTOR)
     
     Returns:
         Tuple of (new_rating1, new_rating2, rating_change1, rating_change2)
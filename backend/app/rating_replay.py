@@ -0,0 +1,273 @@
+"""
+Full rating replay: recompute every rating from completed contest history.
+
+Completed contests are streamed in end_time order and Elo updates are run on
+NumPy arrays indexed by dense user ids. Contests are grouped into "waves" of
+consecutive contests that share no player; every contest in a wave is
+independent of the others, so a whole wave is updated with a few vectorized
+operations while the result stays identical to rating contest by contest.
+"""
+import csv
+import io
+import time
+import uuid
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session, aliased
+
+from .models import Contest, ContestScore, ContestStatus, RatingHistory, User
+from .user_stats import backfill_user_stats
+from .leaderboard import rank_index
+from .handle_search import handle_index
+from .rating import INITIAL_RATING, K_FACTOR
+
+
+def load_contest_results(db: Session, user_index: Dict, chunk_size: int = 10000) -> Dict[str, np.ndarray]:
+    """
+    Stream all completed contests (oldest first) into column arrays.
+
+    Returns a dict of arrays: contest_ids (object), end_times (object),
+    user1/user2 (dense user indexes) and points1/points2.
+    """
+    score1 = aliased(ContestScore)
+    score2 = aliased(ContestScore)
+    rows = db.query(
+        Contest.id, Contest.end_time, Contest.user1_id, Contest.user2_id,
+        score1.total_points, score2.total_points
+    ).join(
+        score1, (score1.contest_id == Contest.id) & (score1.user_id == Contest.user1_id)
+    ).join(
+        score2, (score2.contest_id == Contest.id) & (score2.user_id == Contest.user2_id)
+    ).filter(
+        Contest.status == ContestStatus.COMPLETED
+    ).order_by(Contest.end_time, Contest.id).yield_per(chunk_size)
+
+    contest_ids, end_times, user1, user2, points1, points2 = [], [], [], [], [], []
+    for contest_id, end_time, user1_id, user2_id, total1, total2 in rows:
+        if user1_id not in user_index or user2_id not in user_index:
+            continue
+        contest_ids.append(contest_id)
+        end_times.append(end_time)
+        user1.append(user_index[user1_id])
+        user2.append(user_index[user2_id])
+        points1.append(total1 or 0)
+        points2.append(total2 or 0)
+
+    return {
+        "contest_ids": np.array(contest_ids, dtype=object),
+        "end_times": np.array(end_times, dtype=object),
+        "user1": np.array(user1, dtype=np.int64),
+        "user2": np.array(user2, dtype=np.int64),
+        "points1": np.array(points1, dtype=np.int64),
+        "points2": np.array(points2, dtype=np.int64),
+    }
+
+
+def build_waves(user1: np.ndarray, user2: np.ndarray) -> List[int]:
+    """
+    Split contests (already in chronological order) into waves.
+
+    A new wave starts whenever a contest involves a player already seen in the
+    current wave. Returns the wave boundaries as a list of start offsets
+    followed by the total length.
+    """
+    boundaries = [0]
+    seen = set()
+    for i, (a, b) in enumerate(zip(user1.tolist(), user2.tolist())):
+        if a in seen or b in seen:
+            boundaries.append(i)
+            seen = set()
+        seen.add(a)
+        seen.add(b)
+    boundaries.append(len(user1))
+    return boundaries
+
+
+def replay_elo(
+    user1: np.ndarray,
+    user2: np.ndarray,
+    points1: np.ndarray,
+    points2: np.ndarray,
+    num_users: int,
+    k_factor: int = K_FACTOR,
+    initial_rating: int = INITIAL_RATING
+) -> Dict[str, np.ndarray]:
+    """
+    Replay Elo updates for chronologically ordered contests.
+
+    Matches calculate_elo_rating and determine_contest_scores from rating.py:
+    expected scores from the rating difference, win/draw/loss from points, and
+    rounding half to even. Returns final ratings plus per-contest before/after
+    ratings for both players.
+    """
+    ratings = np.full(num_users, initial_rating, dtype=np.int64)
+    before1 = np.empty(len(user1), dtype=np.int64)
+    before2 = np.empty(len(user1), dtype=np.int64)
+    after1 = np.empty(len(user1), dtype=np.int64)
+    after2 = np.empty(len(user1), dtype=np.int64)
+
+    # 1.0 for a win, 0.5 for a draw, 0.0 for a loss
+    score1 = (np.sign(points1 - points2) + 1) / 2.0
+    score2 = 1.0 - score1
+
+    boundaries = build_waves(user1, user2)
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        if start == end:
+            continue
+        u1 = user1[start:end]
+        u2 = user2[start:end]
+        r1 = ratings[u1]
+        r2 = ratings[u2]
+
+        expected1 = 1 / (1 + 10 ** ((r2 - r1) / 400))
+        expected2 = 1 / (1 + 10 ** ((r1 - r2) / 400))
+        new1 = np.rint(r1 + k_factor * (score1[start:end] - expected1)).astype(np.int64)
+        new2 = np.rint(r2 + k_factor * (score2[start:end] - expected2)).astype(np.int64)
+
+        before1[start:end] = r1
+        before2[start:end] = r2
+        after1[start:end] = new1
+        after2[start:end] = new2
+        ratings[u1] = new1
+        ratings[u2] = new2
+
+    return {
+        "ratings": ratings,
+        "before1": before1,
+        "before2": before2,
+        "after1": after1,
+        "after2": after2,
+    }
+
+
+def _history_rows(results: Dict[str, np.ndarray], replay: Dict[str, np.ndarray], user_ids: List):
+    """Yield rating_history rows for the replayed contests"""
+    contest_ids = results["contest_ids"]
+    end_times = results["end_times"]
+    user1 = results["user1"].tolist()
+    user2 = results["user2"].tolist()
+    before1 = replay["before1"].tolist()
+    before2 = replay["before2"].tolist()
+    after1 = replay["after1"].tolist()
+    after2 = replay["after2"].tolist()
+
+    for i in range(len(contest_ids)):
+        for user, before, after in ((user1[i], before1[i], after1[i]), (user2[i], before2[i], after2[i])):
+            yield {
+                "id": uuid.uuid4(),
+                "user_id": user_ids[user],
+                "contest_id": contest_ids[i],
+                "rating_before": before,
+                "rating_after": after,
+                "rating_change": after - before,
+                "created_at": end_times[i],
+            }
+
+
+def _copy_history(db: Session, rows) -> None:
+    """Load rating_history rows with PostgreSQL COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            row["id"], row["user_id"], row["contest_id"], row["rating_before"],
+            row["rating_after"], row["rating_change"], row["created_at"].isoformat()
+        ])
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    cursor.copy_expert(
+        "COPY rating_history (id, user_id, contest_id, rating_before, rating_after, rating_change, created_at) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def _insert_history(db: Session, rows, batch_size: int = 10000) -> None:
+    """Load rating_history rows with batched executemany INSERTs"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.execute(insert(RatingHistory), batch)
+            batch = []
+    if batch:
+        db.execute(insert(RatingHistory), batch)
+
+
+def replay_ratings(db: Session, dry_run: bool = False, k_factor: int = K_FACTOR, top: int = 20) -> Dict:
+    """
+    Recompute all ratings from completed contests.
+
+    Every user starts at INITIAL_RATING. Unless dry_run is set, users.rating is
+    rewritten for users whose rating changed and rating_history is replaced
+    (COPY on PostgreSQL, batched INSERT elsewhere) in a single transaction,
+    then user_stats is rebuilt from the new history.
+    Returns a report with counts and the largest rating differences.
+    """
+    started = time.perf_counter()
+
+    users = db.query(User.id, User.handle, User.rating).all()
+    user_ids = [row[0] for row in users]
+    handles = [row[1] for row in users]
+    current = np.array([row[2] for row in users], dtype=np.int64)
+    user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    results = load_contest_results(db, user_index)
+    replay = replay_elo(
+        results["user1"], results["user2"], results["points1"], results["points2"],
+        len(user_ids), k_factor=k_factor
+    )
+    ratings = replay["ratings"]
+    elapsed = time.perf_counter() - started
+
+    delta = ratings - current
+    changed = np.flatnonzero(delta)
+    largest = changed[np.argsort(-np.abs(delta[changed]), kind="stable")][:top]
+
+    report = {
+        "contests": len(results["contest_ids"]),
+        "users": len(user_ids),
+        "users_changed": int(len(changed)),
+        "max_abs_change": int(np.abs(delta).max()) if len(delta) else 0,
+        "largest_changes": [
+            {
+                "handle": handles[i],
+                "current": int(current[i]),
+                "replayed": int(ratings[i]),
+                "change": int(delta[i]),
+            }
+            for i in largest
+        ],
+        "replay_seconds": round(elapsed, 3),
+        "dry_run": dry_run,
+    }
+
+    if dry_run:
+        return report
+
+    try:
+        if len(changed):
+            db.execute(update(User), [
+                {"id": user_ids[i], "rating": int(ratings[i])} for i in changed.tolist()
+            ])
+        db.execute(delete(RatingHistory).execution_options(synchronize_session=False))
+        rows = _history_rows(results, replay, user_ids)
+        if db.get_bind().dialect.name == 'postgresql':
+            _copy_history(db, rows)
+        else:
+            _insert_history(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Best ratings come from rating_history, which was just rewritten
+    backfill_user_stats(db)
+    rank_index.invalidate()
+    handle_index.invalidate()
+
+    report["total_seconds"] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,209 @@
+"""
+Free-for-all room contests.
+
+A room has any number of participants who all play the same six problems;
+each problem goes to whoever solved it first among all of them. Polling
+scales with participants, not pairs: every tick fetches each participant of
+every active room once (a single user.status call per handle, even for a
+user in several rooms), then resolves all unsolved problems of a room in
+one pass over those per-problem indexes.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import and_, exists, insert, or_, update
+from sqlalchemy.orm import Session
+
+from .codeforces_api import cf_api
+from .database import SessionLocal
+from .models import ContestStatus, Room, RoomParticipant, RoomProblem, User
+from .problem_selector import get_problems_unsolved_by
+
+MAX_PARTICIPANTS = 100
+ROOM_DURATION = timedelta(hours=2)
+# Concurrent Codeforces requests per polling tick
+POLL_CONCURRENCY = 8
+
+
+def first_solves(
+    problems: Sequence[RoomProblem],
+    accepted_by_user: Dict,
+    start_time: datetime,
+    end_time: datetime
+) -> List[Tuple[RoomProblem, object, datetime]]:
+    """
+    (problem, user id, solved_at) for each problem someone solved within the
+    room's window, awarded to the earliest accepted submission. accepted_by_user
+    maps user ids, in join order, to {problem code: submission}; equal
+    timestamps go to the participant who joined first.
+    """
+    start, end = int(start_time.timestamp()), int(end_time.timestamp())
+    solves = []
+    for problem in problems:
+        best_user, best_time = None, None
+        for user_id, accepted in accepted_by_user.items():
+            submission = accepted.get(problem.problem_code)
+            if submission is None:
+                continue
+            submitted = submission.get("creationTimeSeconds", 0)
+            if start <= submitted <= end and (best_time is None or submitted < best_time):
+                best_user, best_time = user_id, submitted
+        if best_user is not None:
+            solves.append((problem, best_user, datetime.fromtimestamp(best_time)))
+    return solves
+
+
+def record_room_solve(problem: RoomProblem, user_id, solved_at: datetime, db: Session) -> bool:
+    """Award a problem (only while unclaimed) and add its points to the solver (no commit)"""
+    claimed = db.execute(
+        update(RoomProblem)
+        .where(RoomProblem.id == problem.id, RoomProblem.solved_by.is_(None))
+        .values(solved_by=user_id, solved_at=solved_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed:
+        db.execute(
+            update(RoomParticipant)
+            .where(RoomParticipant.room_id == problem.room_id, RoomParticipant.user_id == user_id)
+            .values(total_points=RoomParticipant.total_points + problem.points)
+            .execution_options(synchronize_session=False)
+        )
+    return bool(claimed)
+
+
+async def fetch_accepted(since_by_handle: Dict[str, int]) -> Dict[str, Dict]:
+    """One submissions fetch per handle, indexed by problem code"""
+    semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+
+    async def fetch(handle, since):
+        async with semaphore:
+            return handle, await cf_api.get_accepted_since(handle, since)
+
+    return dict(await asyncio.gather(*(fetch(handle, since) for handle, since in since_by_handle.items())))
+
+
+async def check_rooms(db: Session, now: datetime = None) -> int:
+    """
+    One polling tick over every room: start rooms that reached their start
+    time, award first solves in active rooms, and complete rooms whose time is
+    up or whose problems are all solved. Returns the number of solves awarded.
+    """
+    if now is None:
+        now = datetime.utcnow()
+
+    db.execute(
+        update(Room)
+        .where(Room.status == ContestStatus.SCHEDULED, Room.start_time <= now)
+        .values(status=ContestStatus.ACTIVE)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    rooms = {room.id: room for room in db.query(Room).filter(Room.status == ContestStatus.ACTIVE).all()}
+    unsolved = defaultdict(list)
+    members = defaultdict(list)
+    if rooms:
+        for problem in db.query(RoomProblem).filter(
+            RoomProblem.room_id.in_(list(rooms)), RoomProblem.solved_by.is_(None)
+        ).all():
+            unsolved[problem.room_id].append(problem)
+        for room_id, user_id, handle in db.query(RoomParticipant.room_id, RoomParticipant.user_id, User.handle).join(
+            User, User.id == RoomParticipant.user_id
+        ).filter(RoomParticipant.room_id.in_(list(rooms))).order_by(RoomParticipant.joined_at).all():
+            members[room_id].append((user_id, handle))
+
+    # Each handle is fetched once, from the earliest start of the rooms it plays in
+    since_by_handle: Dict[str, int] = {}
+    for room_id, room in rooms.items():
+        if not unsolved[room_id] or now >= room.end_time:
+            continue
+        start = int(room.start_time.timestamp())
+        for _, handle in members[room_id]:
+            since_by_handle[handle] = min(since_by_handle.get(handle, start), start)
+    accepted = await fetch_accepted(since_by_handle) if since_by_handle else {}
+
+    awarded = 0
+    for room_id, room in rooms.items():
+        if not unsolved[room_id] or now >= room.end_time:
+            continue
+        accepted_by_user = {user_id: accepted.get(handle, {}) for user_id, handle in members[room_id]}
+        for problem, user_id, solved_at in first_solves(unsolved[room_id], accepted_by_user, room.start_time, room.end_time):
+            awarded += record_room_solve(problem, user_id, solved_at, db)
+
+    has_problems = exists().where(RoomProblem.room_id == Room.id)
+    has_unsolved = exists().where(RoomProblem.room_id == Room.id, RoomProblem.solved_by.is_(None))
+    db.execute(
+        update(Room)
+        .where(
+            Room.status == ContestStatus.ACTIVE,
+            or_(Room.end_time <= now, and_(has_problems, ~has_unsolved))
+        )
+        .values(status=ContestStatus.COMPLETED)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return awarded
+
+
+async def select_room_problems(db: Session, now: datetime = None) -> int:
+    """Select problems, unsolved by every participant, for rooms starting within a minute"""
+    if now is None:
+        now = datetime.utcnow()
+
+    rooms = db.query(Room).filter(
+        Room.status.in_([ContestStatus.SCHEDULED, ContestStatus.ACTIVE]),
+        Room.start_time <= now + timedelta(minutes=1),
+        Room.end_time > now,
+        ~exists().where(RoomProblem.room_id == Room.id)
+    ).all()
+
+    selected = 0
+    for room in rooms:
+        handles = [row[0] for row in db.query(User.handle).join(
+            RoomParticipant, RoomParticipant.user_id == User.id
+        ).filter(RoomParticipant.room_id == room.id).all()]
+        try:
+            problems = await get_problems_unsolved_by(handles, room.difficulty)
+            if problems:
+                db.execute(insert(RoomProblem), [
+                    {
+                        "room_id": room.id,
+                        "problem_index": prob_data["problem_index"],
+                        "problem_code": prob_data["problem_code"],
+                        "problem_url": prob_data["problem_url"],
+                        "points": prob_data["points"],
+                        "division": prob_data["division"],
+                    } for prob_data in problems
+                ])
+            db.commit()
+            selected += 1
+            print(f"Successfully selected {len(problems)} problems for room {room.id}")
+        except Exception as e:
+            db.rollback()
+            print(f"Error selecting problems for room {room.id}: {e}")
+    return selected
+
+
+async def check_active_rooms():
+    """Scheduler job: poll every room"""
+    db = SessionLocal()
+    try:
+        await check_rooms(db)
+    except Exception as e:
+        db.rollback()
+        print(f"Error in check_active_rooms: {e}")
+    finally:
+        db.close()
+
+
+async def select_upcoming_room_problems():
+    """Scheduler job: select problems for rooms about to start"""
+    db = SessionLocal()
+    try:
+        await select_room_problems(db)
+    except Exception as e:
+        print(f"Error in select_upcoming_room_problems: {e}")
+    finally:
+        db.close()
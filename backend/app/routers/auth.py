@@ -8,6 +8,9 @@ from ..auth import verify_password, get_password_hash, create_access_token
 from ..config import settings
 from ..dependencies import get_current_user, get_confirmed_user
 from ..codeforces_api import cf_api
+from ..leaderboard import rank_index
+from ..handle_search import handle_index
+from ..feed_cache import feed_cache
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -61,6 +64,10 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        rank_index.upsert(new_user.id, new_user.handle, new_user.rating)
+        handle_index.add(new_user.id, new_user.handle, new_user.rating)
+        # Cached leaderboard pages no longer match the rank index
+        feed_cache.invalidate()
         
         # Create a token for the user so they can check confirmation status
         # This token will work even though user is not confirmed
@@ -4,9 +4,11 @@ from sqlalchemy import or_
 from typing import List
 from datetime import datetime, timedelta
 from ..database import get_db
-from ..models import User, Challenge, ChallengeStatus, Contest, ContestStatus
+from ..models import User, Challenge, ChallengeStatus
 from ..schemas import ChallengeCreate, ChallengeResponse
 from ..dependencies import get_confirmed_user
+from ..busy_intervals import find_conflicts, find_round_reservations
+from ..notifications import notification_hub
 
 router = APIRouter(prefix="/api/challenges", tags=["challenges"])
 
@@ -63,31 +65,17 @@ async def create_challenge(
     proposed_start_time = challenge_data.suggested_start_time
     proposed_end_time = proposed_start_time + timedelta(hours=2)
     
-    # Check for overlapping contests
-    # A contest overlaps if: proposed_start < existing_end AND proposed_end > existing_start
-    overlapping_contest = db.query(Contest).filter(
-        Contest.status.in_([ContestStatus.SCHEDULED, ContestStatus.ACTIVE]),
-        Contest.start_time < proposed_end_time,
-        Contest.end_time > proposed_start_time,
-        or_(
-            Contest.user1_id == current_user.id,
-            Contest.user2_id == current_user.id,
-            Contest.user1_id == challenged_user.id,
-            Contest.user2_id == challenged_user.id
-        )
-    ).first()
+    # Check for overlapping contests (one indexed lookup over both users' bookings)
+    conflicts = find_conflicts([current_user.id, challenged_user.id], [(proposed_start_time, proposed_end_time)], db)
     
-    if overlapping_contest:
-        # Get user handles for the overlapping contest
-        overlapping_user1 = db.query(User).filter(User.id == overlapping_contest.user1_id).first()
-        overlapping_user2 = db.query(User).filter(User.id == overlapping_contest.user2_id).first()
+    if conflicts:
+        conflict = conflicts[0]
+        overlapping_contest = conflict.contest
+        overlapping_user1 = overlapping_contest.user1
+        overlapping_user2 = overlapping_contest.user2
         
         # Determine which user has the conflict
-        conflicting_user = None
-        if overlapping_contest.user1_id == current_user.id or overlapping_contest.user2_id == current_user.id:
-            conflicting_user = current_user.handle
-        elif overlapping_contest.user1_id == challenged_user.id or overlapping_contest.user2_id == challenged_user.id:
-            conflicting_user = challenged_user.handle
+        conflicting_user = current_user.handle if conflict.user_id == current_user.id else challenged_user.handle
         
         # Format the error message
         contest_info = f"{overlapping_user1.handle if overlapping_user1 else 'User1'} vs {overlapping_user2.handle if overlapping_user2 else 'User2'}"
@@ -95,7 +83,18 @@ async def create_challenge(
         
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"{conflicting_user if conflicting_user else 'One of the users'} already has a contest scheduled/active during this time ({contest_info}, {time_info}). Please choose a different time."
+            detail=f"{conflicting_user} already has a contest scheduled/active during this time ({contest_info}, {time_info}). Please choose a different time."
+        )
+    
+    # Tournament rounds are only booked once generated; their schedules hold the seats until then
+    reservations = find_round_reservations([current_user.id, challenged_user.id], proposed_start_time, proposed_end_time, db)
+    
+    if reservations:
+        user_id, round_schedule = reservations[0]
+        reserved_user = current_user.handle if user_id == current_user.id else challenged_user.handle
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{reserved_user} has tournament round {round_schedule.round_number} scheduled during this time (starting {round_schedule.start_time.strftime('%Y-%m-%d %H:%M')}). Please choose a different time."
         )
     
     # Create challenge
@@ -110,9 +109,25 @@ async def create_challenge(
     db.commit()
     db.refresh(new_challenge)
     
+    notification_hub.notify([challenged_user.id], "challenge_received", {
+        "challenge_id": new_challenge.id,
+        "challenger_handle": current_user.handle,
+        "difficulty": new_challenge.difficulty,
+        "suggested_start_time": new_challenge.suggested_start_time,
+        "pending_count": count_pending_challenges(challenged_user.id, db)
+    })
+    
     return new_challenge
 
 
+def count_pending_challenges(user_id, db: Session) -> int:
+    """Pending challenges received by a user"""
+    return db.query(Challenge).filter(
+        Challenge.challenged_id == user_id,
+        Challenge.status == ChallengeStatus.PENDING
+    ).count()
+
+
 @router.get("/", response_model=List[ChallengeResponse])
 async def list_challenges(
     current_user: User = Depends(get_confirmed_user),
@@ -133,12 +148,7 @@ async def get_pending_challenges_count(
     db: Session = Depends(get_db)
 ):
     """Get count of pending challenges received by the current user"""
-    count = db.query(Challenge).filter(
-        Challenge.challenged_id == current_user.id,
-        Challenge.status == ChallengeStatus.PENDING
-    ).count()
-    
-    return {"count": count}
+    return {"count": count_pending_challenges(current_user.id, db)}
 
 
 @router.post("/{challenge_id}/accept", response_model=ChallengeResponse)
@@ -172,7 +182,16 @@ async def accept_challenge(
     
     # Create contest (will be handled by contest creation endpoint)
     from . import contests as contests_module
-    await contests_module.create_contest_from_challenge(challenge, db)
+    contest = await contests_module.create_contest_from_challenge(challenge, db)
+    
+    notification_hub.notify([challenge.challenger_id], "challenge_accepted", {
+        "challenge_id": challenge.id,
+        "contest_id": contest.id,
+        "opponent_handle": current_user.handle
+    })
+    notification_hub.notify([current_user.id], "pending_challenges", {
+        "count": count_pending_challenges(current_user.id, db)
+    })
     
     return challenge
 
@@ -206,4 +225,8 @@ async def reject_challenge(
     db.commit()
     db.refresh(challenge)
     
+    notification_hub.notify([current_user.id], "pending_challenges", {
+        "count": count_pending_challenges(current_user.id, db)
+    })
+    
     return challenge
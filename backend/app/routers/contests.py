@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload, aliased
+from typing import List, Optional
 from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+import base64
 from ..database import get_db
 from ..models import (
     User, Challenge, Contest, ContestProblem, ContestScore, RatingHistory,
     ChallengeStatus, ContestStatus
 )
-from ..schemas import ContestResponse, ContestProblemResponse, ContestScoreResponse, PublicContestResponse
+from ..schemas import (
+    ContestResponse, ContestPageResponse, ContestProblemResponse, ContestScoreResponse, PublicContestResponse
+)
 from ..dependencies import get_confirmed_user
+from ..busy_intervals import add_busy_intervals, find_conflicts, find_round_reservations
+from ..contest_events import contest_events, contest_event_stream
+from ..feed_cache import feed_cache
 from ..problem_selector import get_unsolved_problems
-from sqlalchemy import or_, func, desc
+from sqlalchemy import or_, and_, func, desc
+from sqlalchemy.exc import IntegrityError
 
 router = APIRouter(prefix="/api/contests", tags=["contests"])
 
@@ -19,165 +28,111 @@ router = APIRouter(prefix="/api/contests", tags=["contests"])
 public_router = APIRouter(prefix="/api/contests/public", tags=["contests-public"])
 
 
+TOP_CONTEST_SORTS = ("rating_change", "points", "competitiveness")
+
+
+def public_feed_query(db: Session):
+    """
+    Completed contests joined with both players' handles, final scores and
+    rating changes, so a whole public feed is read in one round trip.
+    """
+    user1 = aliased(User)
+    user2 = aliased(User)
+    score1 = aliased(ContestScore)
+    score2 = aliased(ContestScore)
+    history1 = aliased(RatingHistory)
+    history2 = aliased(RatingHistory)
+    
+    points1 = func.coalesce(score1.total_points, 0)
+    points2 = func.coalesce(score2.total_points, 0)
+    change1 = func.coalesce(history1.rating_change, 0)
+    change2 = func.coalesce(history2.rating_change, 0)
+    
+    query = db.query(
+        Contest.id, Contest.difficulty, Contest.start_time, Contest.end_time, Contest.status,
+        user1.handle.label("user1_handle"), user2.handle.label("user2_handle"),
+        points1.label("user1_points"), points2.label("user2_points"),
+        history1.rating_change.label("user1_rating_change"),
+        history2.rating_change.label("user2_rating_change")
+    ).outerjoin(
+        user1, user1.id == Contest.user1_id
+    ).outerjoin(
+        user2, user2.id == Contest.user2_id
+    ).outerjoin(
+        score1, (score1.contest_id == Contest.id) & (score1.user_id == Contest.user1_id)
+    ).outerjoin(
+        score2, (score2.contest_id == Contest.id) & (score2.user_id == Contest.user2_id)
+    ).outerjoin(
+        history1, (history1.contest_id == Contest.id) & (history1.user_id == Contest.user1_id)
+    ).outerjoin(
+        history2, (history2.contest_id == Contest.id) & (history2.user_id == Contest.user2_id)
+    ).filter(
+        Contest.status == ContestStatus.COMPLETED
+    )
+    
+    sort_keys = {
+        "rating_change": desc(func.abs(change1) + func.abs(change2)),
+        "points": desc(points1 + points2),
+        "competitiveness": func.abs(points1 - points2),
+    }
+    return query, sort_keys
+
+
+def build_public_contest_response(row) -> PublicContestResponse:
+    """Build a PublicContestResponse from a public_feed_query row"""
+    return PublicContestResponse(
+        id=row.id,
+        user1_handle=row.user1_handle or "Unknown",
+        user2_handle=row.user2_handle or "Unknown",
+        difficulty=row.difficulty,
+        start_time=row.start_time,
+        end_time=row.end_time,
+        status=row.status.value,
+        user1_points=row.user1_points,
+        user2_points=row.user2_points,
+        user1_rating_change=row.user1_rating_change,
+        user2_rating_change=row.user2_rating_change
+    )
+
+
 @public_router.get("/latest", response_model=List[PublicContestResponse])
 async def get_latest_contests(
+    request: Request,
     limit: int = Query(10, ge=1, le=50, description="Number of contests to return"),
     db: Session = Depends(get_db)
 ):
-    """Get latest completed contests (public endpoint)"""
-    contests = db.query(Contest).filter(
-        Contest.status == ContestStatus.COMPLETED
-    ).order_by(Contest.end_time.desc()).limit(limit).all()
-    
-    result = []
-    for contest in contests:
-        user1 = db.query(User).filter(User.id == contest.user1_id).first()
-        user2 = db.query(User).filter(User.id == contest.user2_id).first()
-        
-        # Get final scores
-        score1 = db.query(ContestScore).filter(
-            ContestScore.contest_id == contest.id,
-            ContestScore.user_id == contest.user1_id
-        ).first()
-        score2 = db.query(ContestScore).filter(
-            ContestScore.contest_id == contest.id,
-            ContestScore.user_id == contest.user2_id
-        ).first()
-        
-        # Get rating changes
-        history1 = db.query(RatingHistory).filter(
-            RatingHistory.contest_id == contest.id,
-            RatingHistory.user_id == contest.user1_id
-        ).first()
-        history2 = db.query(RatingHistory).filter(
-            RatingHistory.contest_id == contest.id,
-            RatingHistory.user_id == contest.user2_id
-        ).first()
-        
-        result.append(PublicContestResponse(
-            id=contest.id,
-            user1_handle=user1.handle if user1 else "Unknown",
-            user2_handle=user2.handle if user2 else "Unknown",
-            difficulty=contest.difficulty,
-            start_time=contest.start_time,
-            end_time=contest.end_time,
-            status=contest.status.value,
-            user1_points=score1.total_points if score1 else 0,
-            user2_points=score2.total_points if score2 else 0,
-            user1_rating_change=history1.rating_change if history1 else None,
-            user2_rating_change=history2.rating_change if history2 else None
-        ))
+    """Get latest completed contests (public endpoint, served from the feed cache)"""
+    def build():
+        query, _ = public_feed_query(db)
+        rows = query.order_by(Contest.end_time.desc(), Contest.id.desc()).limit(limit).all()
+        return [build_public_contest_response(row) for row in rows]
     
-    return result
+    return feed_cache.respond(request, f"contests:latest:{limit}", build)
 
 
 @public_router.get("/top", response_model=List[PublicContestResponse])
 async def get_top_contests(
+    request: Request,
     limit: int = Query(10, ge=1, le=50, description="Number of contests to return"),
     sort_by: str = Query("rating_change", description="Sort by: rating_change, points, competitiveness"),
+    days: int = Query(30, ge=1, le=365, description="Only consider contests that ended in the last N days"),
     db: Session = Depends(get_db)
 ):
-    """Get top contests by various criteria (public endpoint)"""
-    contests_query = db.query(Contest).filter(
-        Contest.status == ContestStatus.COMPLETED
-    )
+    """Get top contests by various criteria (public endpoint, served from the feed cache)"""
+    if sort_by not in TOP_CONTEST_SORTS:
+        sort_by = "competitiveness"
     
-    if sort_by == "rating_change":
-        # Sort by highest combined absolute rating change
-        contests = contests_query.order_by(Contest.end_time.desc()).limit(limit * 2).all()
-        # Calculate rating change for each and sort
-        contest_data = []
-        for contest in contests:
-            history1 = db.query(RatingHistory).filter(
-                RatingHistory.contest_id == contest.id,
-                RatingHistory.user_id == contest.user1_id
-            ).first()
-            history2 = db.query(RatingHistory).filter(
-                RatingHistory.contest_id == contest.id,
-                RatingHistory.user_id == contest.user2_id
-            ).first()
-            
-            total_change = abs(history1.rating_change if history1 else 0) + abs(history2.rating_change if history2 else 0)
-            contest_data.append((total_change, contest))
-        
-        contest_data.sort(key=lambda x: x[0], reverse=True)
-        contests = [c[1] for c in contest_data[:limit]]
-    elif sort_by == "points":
-        # Sort by highest total points scored
-        contests = contests_query.order_by(Contest.end_time.desc()).limit(limit * 2).all()
-        contest_data = []
-        for contest in contests:
-            score1 = db.query(ContestScore).filter(
-                ContestScore.contest_id == contest.id,
-                ContestScore.user_id == contest.user1_id
-            ).first()
-            score2 = db.query(ContestScore).filter(
-                ContestScore.contest_id == contest.id,
-                ContestScore.user_id == contest.user2_id
-            ).first()
-            
-            total_points = (score1.total_points if score1 else 0) + (score2.total_points if score2 else 0)
-            contest_data.append((total_points, contest))
-        
-        contest_data.sort(key=lambda x: x[0], reverse=True)
-        contests = [c[1] for c in contest_data[:limit]]
-    else:  # competitiveness (closest scores)
-        contests = contests_query.order_by(Contest.end_time.desc()).limit(limit * 2).all()
-        contest_data = []
-        for contest in contests:
-            score1 = db.query(ContestScore).filter(
-                ContestScore.contest_id == contest.id,
-                ContestScore.user_id == contest.user1_id
-            ).first()
-            score2 = db.query(ContestScore).filter(
-                ContestScore.contest_id == contest.id,
-                ContestScore.user_id == contest.user2_id
-            ).first()
-            
-            point_diff = abs((score1.total_points if score1 else 0) - (score2.total_points if score2 else 0))
-            contest_data.append((point_diff, contest))
-        
-        contest_data.sort(key=lambda x: x[0])  # Sort by smallest difference
-        contests = [c[1] for c in contest_data[:limit]]
+    def build():
+        query, sort_keys = public_feed_query(db)
+        since = datetime.utcnow() - timedelta(days=days)
+        rows = query.filter(
+            Contest.end_time >= since
+        ).order_by(
+            sort_keys[sort_by], Contest.end_time.desc(), Contest.id.desc()
+        ).limit(limit).all()
+        return [build_public_contest_response(row) for row in rows]
     
-    result = []
-    for contest in contests:
-        user1 = db.query(User).filter(User.id == contest.user1_id).first()
-        user2 = db.query(User).filter(User.id == contest.user2_id).first()
-        
-        score1 = db.query(ContestScore).filter(
-            ContestScore.contest_id == contest.id,
-            ContestScore.user_id == contest.user1_id
-        ).first()
-        score2 = db.query(ContestScore).filter(
-            ContestScore.contest_id == contest.id,
-            ContestScore.user_id == contest.user2_id
-        ).first()
-        
-        history1 = db.query(RatingHistory).filter(
-            RatingHistory.contest_id == contest.id,
-            RatingHistory.user_id == contest.user1_id
-        ).first()
-        history2 = db.query(RatingHistory).filter(
-            RatingHistory.contest_id == contest.id,
-            RatingHistory.user_id == contest.user2_id
-        ).first()
-        
-        result.append(PublicContestResponse(
-            id=contest.id,
-            user1_handle=user1.handle if user1 else "Unknown",
-            user2_handle=user2.handle if user2 else "Unknown",
-            difficulty=contest.difficulty,
-            start_time=contest.start_time,
-            end_time=contest.end_time,
-            status=contest.status.value,
-            user1_points=score1.total_points if score1 else 0,
-            user2_points=score2.total_points if score2 else 0,
-            user1_rating_change=history1.rating_change if history1 else None,
-            user2_rating_change=history2.rating_change if history2 else None
-        ))
-    
-    return result
+    return feed_cache.respond(request, f"contests:top:{sort_by}:{days}:{limit}", build)
 
 
 async def create_contest_from_challenge(challenge: Challenge, db: Session):
@@ -191,30 +146,28 @@ async def create_contest_from_challenge(challenge: Challenge, db: Session):
     start_time = challenge.suggested_start_time
     end_time = start_time + timedelta(hours=2)  # Default 2 hours duration
     
-    # Check for overlapping contests for both users
-    # A contest overlaps if: start_time < other_end_time AND end_time > other_start_time
-    overlapping = db.query(Contest).filter(
-        Contest.status.in_([ContestStatus.SCHEDULED, ContestStatus.ACTIVE]),
-        Contest.start_time < end_time,
-        Contest.end_time > start_time,
-        or_(
-            Contest.user1_id == challenge.challenger_id,
-            Contest.user2_id == challenge.challenger_id,
-            Contest.user1_id == challenge.challenged_id,
-            Contest.user2_id == challenge.challenged_id
+    conflicts = find_conflicts([challenge.challenger_id, challenge.challenged_id], [(start_time, end_time)], db)
+    if conflicts:
+        overlapping = conflicts[0].contest
+        user1 = overlapping.user1
+        user2 = overlapping.user2
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"One of the users already has a contest scheduled/active during this time ({user1.handle if user1 else 'User1'} vs {user2.handle if user2 else 'User2'}, {overlapping.start_time} - {overlapping.end_time})"
         )
-    ).first()
     
-    if overlapping:
-        user1 = db.query(User).filter(User.id == overlapping.user1_id).first()
-        user2 = db.query(User).filter(User.id == overlapping.user2_id).first()
+    reservations = find_round_reservations([challenge.challenger_id, challenge.challenged_id], start_time, end_time, db)
+    if reservations:
+        round_schedule = reservations[0][1]
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"One of the users already has a contest scheduled/active during this time ({user1.handle if user1 else 'User1'} vs {user2.handle if user2 else 'User2'}, {overlapping.start_time} - {overlapping.end_time})"
+            detail=f"One of the users has tournament round {round_schedule.round_number} scheduled during this time (starting {round_schedule.start_time})"
         )
     
-    # Create contest
+    # Create contest, initial scores (problems will be selected later by
+    # scheduled task) and the users' bookings in one transaction
     contest = Contest(
+        id=uuid4(),
         challenge_id=challenge.id,
         user1_id=challenge.challenger_id,
         user2_id=challenge.challenged_id,
@@ -224,20 +177,70 @@ async def create_contest_from_challenge(challenge: Challenge, db: Session):
         status=ContestStatus.SCHEDULED
     )
     db.add(contest)
-    db.commit()
+    db.add(ContestScore(contest_id=contest.id, user_id=challenge.challenger_id, total_points=0))
+    db.add(ContestScore(contest_id=contest.id, user_id=challenge.challenged_id, total_points=0))
+    # The bookings are a Core INSERT referencing contests.id; write the contest row first
+    db.flush()
+    
+    try:
+        add_busy_intervals([contest], db)
+        db.commit()
+    except IntegrityError:
+        # A concurrent request booked one of the users in the meantime
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="One of the users already has a contest scheduled/active during this time"
+        )
     db.refresh(contest)
     
-    # Create initial scores (problems will be selected later by scheduled task)
-    user1 = db.query(User).filter(User.id == challenge.challenger_id).first()
-    user2 = db.query(User).filter(User.id == challenge.challenged_id).first()
+    return contest
+
+
+def contest_details_query(db: Session):
+    """Contest query that eager-loads everything needed for ContestResponse"""
+    return db.query(Contest).options(
+        joinedload(Contest.user1),
+        joinedload(Contest.user2),
+        selectinload(Contest.problems),
+        selectinload(Contest.scores).joinedload(ContestScore.user)
+    )
+
+
+def build_contest_response(contest: Contest, now: datetime = None, include_problems: bool = True) -> ContestResponse:
+    """Build a ContestResponse from a contest loaded with contest_details_query"""
+    if now is None:
+        now = datetime.utcnow()
     
-    score1 = ContestScore(contest_id=contest.id, user_id=user1.id, total_points=0)
-    score2 = ContestScore(contest_id=contest.id, user_id=user2.id, total_points=0)
-    db.add(score1)
-    db.add(score2)
-    db.commit()
+    # Get problems (only reveal if contest has started)
+    problems_data = []
+    if include_problems and (
+        contest.status in [ContestStatus.ACTIVE, ContestStatus.COMPLETED] or now >= contest.start_time
+    ):
+        problems_data = [ContestProblemResponse.model_validate(p) for p in contest.problems]
     
-    return contest
+    # Get scores (kept up to date incrementally by the submission checker)
+    scores_data = [
+        ContestScoreResponse(
+            user_id=score.user_id,
+            user_handle=score.user.handle if score.user else "Unknown",
+            total_points=score.total_points
+        ) for score in contest.scores
+    ]
+    
+    return ContestResponse(
+        id=contest.id,
+        user1_id=contest.user1_id,
+        user2_id=contest.user2_id,
+        user1_handle=contest.user1.handle,
+        user2_handle=contest.user2.handle,
+        difficulty=contest.difficulty,
+        start_time=contest.start_time,
+        end_time=contest.end_time,
+        status=contest.status.value,
+        problems=problems_data,
+        scores=scores_data
+    )
 
 
 @router.get("/upcoming", response_model=List[ContestResponse])
@@ -248,128 +251,92 @@ async def get_upcoming_contests(
 ):
     """Get upcoming scheduled contests for the current user"""
     now = datetime.utcnow()
-    contests = db.query(Contest).filter(
+    contests = contest_details_query(db).filter(
         (Contest.user1_id == current_user.id) |
         (Contest.user2_id == current_user.id),
         Contest.status.in_([ContestStatus.SCHEDULED, ContestStatus.ACTIVE]),
         Contest.start_time >= now
     ).order_by(Contest.start_time.asc()).limit(limit).all()
     
-    result = []
-    for contest in contests:
-        user1 = db.query(User).filter(User.id == contest.user1_id).first()
-        user2 = db.query(User).filter(User.id == contest.user2_id).first()
-        
-        # Get problems (only reveal if contest has started)
-        problems_data = []
-        if contest.status == ContestStatus.ACTIVE or datetime.utcnow() >= contest.start_time:
-            problems = db.query(ContestProblem).filter(
-                ContestProblem.contest_id == contest.id
-            ).all()
-            problems_data = [ContestProblemResponse.model_validate(p) for p in problems]
-        
-        # Get scores
-        scores = db.query(ContestScore).filter(
-            ContestScore.contest_id == contest.id
-        ).all()
-        scores_data = []
-        for score in scores:
-            user = db.query(User).filter(User.id == score.user_id).first()
-            scores_data.append(ContestScoreResponse(
-                user_id=score.user_id,
-                user_handle=user.handle,
-                total_points=score.total_points
-            ))
-        
-        result.append(ContestResponse(
-            id=contest.id,
-            user1_id=contest.user1_id,
-            user2_id=contest.user2_id,
-            user1_handle=user1.handle,
-            user2_handle=user2.handle,
-            difficulty=contest.difficulty,
-            start_time=contest.start_time,
-            end_time=contest.end_time,
-            status=contest.status.value,
-            problems=problems_data,
-            scores=scores_data
-        ))
-    
-    return result
+    return [build_contest_response(contest, now) for contest in contests]
+
+
+def encode_contest_cursor(contest: Contest) -> str:
+    """Encode the (created_at, id) keyset position of a contest as an opaque cursor"""
+    raw = f"{contest.created_at.isoformat()}|{contest.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_contest_cursor(cursor: str):
+    """Decode a cursor produced by encode_contest_cursor into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, contest_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(contest_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 
-@router.get("/", response_model=List[ContestResponse])
+@router.get("/", response_model=ContestPageResponse)
 async def list_contests(
+    limit: int = Query(20, ge=1, le=100, description="Number of contests to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    contest_status: Optional[List[str]] = Query(None, alias="status", description="Filter by status (repeatable)"),
+    include_problems: bool = Query(False, description="Include contest problems in each item"),
     current_user: User = Depends(get_confirmed_user),
     db: Session = Depends(get_db)
 ):
-    """Get all contests for the current user"""
-    contests = db.query(Contest).filter(
+    """Get the current user's contests, newest first, one page at a time"""
+    if include_problems:
+        query = contest_details_query(db)
+    else:
+        # Summary projection: skip loading problems entirely
+        query = db.query(Contest).options(
+            joinedload(Contest.user1),
+            joinedload(Contest.user2),
+            selectinload(Contest.scores).joinedload(ContestScore.user)
+        )
+    
+    query = query.filter(
         (Contest.user1_id == current_user.id) |
         (Contest.user2_id == current_user.id)
-    ).order_by(Contest.created_at.desc()).all()
+    )
     
-    result = []
-    for contest in contests:
-        user1 = db.query(User).filter(User.id == contest.user1_id).first()
-        user2 = db.query(User).filter(User.id == contest.user2_id).first()
-        
-        # Get problems (only reveal if contest has started)
-        problems_data = []
-        if contest.status in [ContestStatus.ACTIVE, ContestStatus.COMPLETED] or datetime.utcnow() >= contest.start_time:
-            problems = db.query(ContestProblem).filter(
-                ContestProblem.contest_id == contest.id
-            ).all()
-            problems_data = [ContestProblemResponse.model_validate(p) for p in problems]
-        
-        # Get scores - recalculate from solved problems to ensure accuracy
-        solved_problems = db.query(ContestProblem).filter(
-            ContestProblem.contest_id == contest.id,
-            ContestProblem.solved_by.isnot(None)
-        ).all()
-        
-        # Calculate scores from solved problems
-        user_scores = {}
-        for problem in solved_problems:
-            user_id = problem.solved_by
-            if user_id not in user_scores:
-                user_scores[user_id] = 0
-            user_scores[user_id] += problem.points
-        
-        # Get scores from database and update if needed
-        scores = db.query(ContestScore).filter(
-            ContestScore.contest_id == contest.id
-        ).all()
-        scores_data = []
-        for score in scores:
-            user = db.query(User).filter(User.id == score.user_id).first()
-            # Use calculated score if available, otherwise use stored score
-            calculated_points = user_scores.get(score.user_id, 0)
-            # Update stored score if different
-            if score.total_points != calculated_points:
-                score.total_points = calculated_points
-                db.commit()
-            scores_data.append(ContestScoreResponse(
-                user_id=score.user_id,
-                user_handle=user.handle,
-                total_points=calculated_points
-            ))
-        
-        result.append(ContestResponse(
-            id=contest.id,
-            user1_id=contest.user1_id,
-            user2_id=contest.user2_id,
-            user1_handle=user1.handle,
-            user2_handle=user2.handle,
-            difficulty=contest.difficulty,
-            start_time=contest.start_time,
-            end_time=contest.end_time,
-            status=contest.status.value,
-            problems=problems_data,
-            scores=scores_data
+    if contest_status:
+        try:
+            statuses = [ContestStatus(s) for s in contest_status]
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Status must be one of: {', '.join(s.value for s in ContestStatus)}"
+            )
+        query = query.filter(Contest.status.in_(statuses))
+    
+    if cursor:
+        cursor_created_at, cursor_id = decode_contest_cursor(cursor)
+        query = query.filter(or_(
+            Contest.created_at < cursor_created_at,
+            and_(Contest.created_at == cursor_created_at, Contest.id < cursor_id)
         ))
     
-    return result
+    # Fetch one extra row to know whether there is a next page
+    contests = query.order_by(Contest.created_at.desc(), Contest.id.desc()).limit(limit + 1).all()
+    has_more = len(contests) > limit
+    contests = contests[:limit]
+    
+    now = datetime.utcnow()
+    items = []
+    for contest in contests:
+        response = build_contest_response(contest, now, include_problems=include_problems)
+        items.append(response)
+    
+    return ContestPageResponse(
+        items=items,
+        next_cursor=encode_contest_cursor(contests[-1]) if has_more else None
+    )
 
 
 @router.get("/{contest_id}", response_model=ContestResponse)
@@ -378,7 +345,7 @@ async def get_contest(
     current_user: User = Depends(get_confirmed_user),
     db: Session = Depends(get_db)
 ):
-    contest = db.query(Contest).filter(Contest.id == contest_id).first()
+    contest = contest_details_query(db).filter(Contest.id == contest_id).first()
     if not contest:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -391,63 +358,7 @@ async def get_contest(
             detail="You are not a participant in this contest"
         )
     
-    user1 = db.query(User).filter(User.id == contest.user1_id).first()
-    user2 = db.query(User).filter(User.id == contest.user2_id).first()
-    
-    # Get problems (only reveal if contest has started)
-    problems_data = []
-    if contest.status in [ContestStatus.ACTIVE, ContestStatus.COMPLETED] or datetime.utcnow() >= contest.start_time:
-        problems = db.query(ContestProblem).filter(
-            ContestProblem.contest_id == contest.id
-        ).all()
-        problems_data = [ContestProblemResponse.model_validate(p) for p in problems]
-    
-    # Get scores - recalculate from solved problems to ensure accuracy
-    solved_problems = db.query(ContestProblem).filter(
-        ContestProblem.contest_id == contest.id,
-        ContestProblem.solved_by.isnot(None)
-    ).all()
-    
-    # Calculate scores from solved problems
-    user_scores = {}
-    for problem in solved_problems:
-        user_id = problem.solved_by
-        if user_id not in user_scores:
-            user_scores[user_id] = 0
-        user_scores[user_id] += problem.points
-    
-    # Get scores from database and update if needed
-    scores = db.query(ContestScore).filter(
-        ContestScore.contest_id == contest.id
-    ).all()
-    scores_data = []
-    for score in scores:
-        user = db.query(User).filter(User.id == score.user_id).first()
-        # Use calculated score if available, otherwise use stored score
-        calculated_points = user_scores.get(score.user_id, 0)
-        # Update stored score if different
-        if score.total_points != calculated_points:
-            score.total_points = calculated_points
-            db.commit()
-        scores_data.append(ContestScoreResponse(
-            user_id=score.user_id,
-            user_handle=user.handle,
-            total_points=calculated_points
-        ))
-    
-    return ContestResponse(
-        id=contest.id,
-        user1_id=contest.user1_id,
-        user2_id=contest.user2_id,
-        user1_handle=user1.handle,
-        user2_handle=user2.handle,
-        difficulty=contest.difficulty,
-        start_time=contest.start_time,
-        end_time=contest.end_time,
-        status=contest.status.value,
-        problems=problems_data,
-        scores=scores_data
-    )
+    return build_contest_response(contest)
 
 
 @router.get("/{contest_id}/problems", response_model=List[ContestProblemResponse])
@@ -481,3 +392,55 @@ async def get_contest_problems(
     ).all()
     
     return [ContestProblemResponse.model_validate(p) for p in problems]
+
+
+@router.get("/{contest_id}/events")
+async def stream_contest_events(
+    contest_id: str,
+    request: Request,
+    current_user: User = Depends(get_confirmed_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Live contest state as Server-Sent Events: a "snapshot" (ContestResponse),
+    then "solve", "scores", "problems" and "status" events as the submission
+    checker and scheduler publish them. Replaces polling GET /{contest_id}.
+    """
+    participants = db.query(Contest.id, Contest.user1_id, Contest.user2_id).filter(Contest.id == contest_id).first()
+    if not participants:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contest not found"
+        )
+    
+    if current_user.id not in (participants.user1_id, participants.user2_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a participant in this contest"
+        )
+    
+    # Subscribe before loading the snapshot: anything published while it loads
+    # is queued and replayed after it (events carry absolute state, so one the
+    # snapshot already reflects is harmless)
+    contest_id = participants.id
+    queue = contest_events.subscribe(contest_id)
+    try:
+        contest = contest_details_query(db).filter(Contest.id == contest_id).one()
+        snapshot = build_contest_response(contest)
+        # Problems selected before the start stay server-side until the stream reaches the start time
+        hidden_problems = None
+        if not snapshot.problems and contest.problems:
+            hidden_problems = [ContestProblemResponse.model_validate(p) for p in contest.problems]
+        
+        # get_db is only torn down once the response ends; end the read transaction
+        # now so an open stream doesn't hold a pooled connection
+        db.rollback()
+    except Exception:
+        contest_events.unsubscribe(contest_id, queue)
+        raise
+    
+    return StreamingResponse(
+        contest_event_stream(request, contest_id, snapshot, hidden_problems, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
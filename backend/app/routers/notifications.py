@@ -0,0 +1,62 @@
+import asyncio
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..dependencies import user_from_token
+from ..notifications import notification_hub
+
+router = APIRouter(prefix="/api/notifications", tags=["notifications"])
+
+AUTH_TIMEOUT_SECONDS = 10
+
+
+@router.websocket("/ws")
+async def notifications_socket(
+    websocket: WebSocket,
+    db: Session = Depends(get_db)
+):
+    """
+    Per-user notification stream (see app/notifications.py for the events).
+
+    Browsers cannot set the Authorization header on a WebSocket, so the client
+    authenticates with {"token": "<access token>"} as its first message and is
+    answered with a "ready" event. Unconfirmed users may connect; they wait
+    for the "confirmed" event.
+    """
+    await websocket.accept()
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), timeout=AUTH_TIMEOUT_SECONDS)
+        user = user_from_token(message.get("token") if isinstance(message, dict) else None, db)
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, ValueError):
+        user = None
+    
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+    
+    user_id, is_confirmed = user.id, user.is_confirmed
+    # End the read transaction so an open socket doesn't hold a pooled connection
+    db.rollback()
+    
+    queue = notification_hub.connections.subscribe(user_id)
+    
+    async def forward():
+        while True:
+            event, data = await queue.get()
+            await websocket.send_json({"event": event, "data": data})
+    
+    sender = None
+    try:
+        await websocket.send_json({"event": "ready", "data": {"user_id": str(user_id), "is_confirmed": is_confirmed}})
+        sender = asyncio.create_task(forward())
+        # Clients send nothing else; this returns when they disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if sender is not None:
+            sender.cancel()
+        notification_hub.connections.unsubscribe(user_id, queue)
@@ -0,0 +1,175 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.exc import IntegrityError
+from typing import List
+from datetime import datetime, timezone
+from ..database import get_db
+from ..models import User, Room, RoomParticipant, ContestStatus
+from ..schemas import RoomCreate, RoomResponse, RoomParticipantResponse, RoomProblemResponse
+from ..dependencies import get_confirmed_user
+from ..rooms import MAX_PARTICIPANTS, ROOM_DURATION
+
+router = APIRouter(prefix="/api/rooms", tags=["rooms"])
+
+
+def room_details_query(db: Session):
+    """Room query that eager-loads everything needed for RoomResponse"""
+    return db.query(Room).options(
+        joinedload(Room.creator),
+        selectinload(Room.participants).joinedload(RoomParticipant.user),
+        selectinload(Room.problems)
+    )
+
+
+def build_room_response(room: Room, now: datetime = None) -> RoomResponse:
+    """Build a RoomResponse (participants ranked by points) from a room loaded with room_details_query"""
+    if now is None:
+        now = datetime.utcnow()
+    
+    standings = sorted(room.participants, key=lambda p: (-p.total_points, p.joined_at or now))
+    participants = [
+        RoomParticipantResponse(
+            rank=rank,
+            user_id=participant.user_id,
+            user_handle=participant.user.handle if participant.user else "Unknown",
+            total_points=participant.total_points
+        ) for rank, participant in enumerate(standings, start=1)
+    ]
+    
+    # Only reveal problems once the room has started
+    problems = []
+    if room.status in [ContestStatus.ACTIVE, ContestStatus.COMPLETED] or now >= room.start_time:
+        problems = [
+            RoomProblemResponse.model_validate(problem)
+            for problem in sorted(room.problems, key=lambda p: p.problem_index)
+        ]
+    
+    return RoomResponse(
+        id=room.id,
+        creator_id=room.creator_id,
+        creator_handle=room.creator.handle,
+        difficulty=room.difficulty,
+        start_time=room.start_time,
+        end_time=room.end_time,
+        status=room.status.value,
+        participants=participants,
+        problems=problems
+    )
+
+
+def load_room(room_id: str, db: Session) -> Room:
+    room = room_details_query(db).filter(Room.id == room_id).first()
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
+        )
+    return room
+
+
+@router.post("/", response_model=RoomResponse)
+async def create_room(
+    room_data: RoomCreate,
+    current_user: User = Depends(get_confirmed_user),
+    db: Session = Depends(get_db)
+):
+    """Create a room contest; the creator is its first participant"""
+    if room_data.difficulty not in [1, 2, 3, 4]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Difficulty must be between 1 and 4"
+        )
+    
+    start_time = room_data.start_time
+    if start_time.tzinfo is not None:
+        start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+    if start_time <= datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start time must be in the future"
+        )
+    
+    room = Room(
+        creator_id=current_user.id,
+        difficulty=room_data.difficulty,
+        start_time=start_time,
+        end_time=start_time + ROOM_DURATION,
+        status=ContestStatus.SCHEDULED
+    )
+    room.participants.append(RoomParticipant(user_id=current_user.id))
+    db.add(room)
+    db.commit()
+    
+    return build_room_response(load_room(room.id, db))
+
+
+@router.get("/", response_model=List[RoomResponse])
+async def list_rooms(
+    current_user: User = Depends(get_confirmed_user),
+    db: Session = Depends(get_db)
+):
+    """Rooms the current user participates in, latest start first"""
+    joined = db.query(RoomParticipant.room_id).filter(RoomParticipant.user_id == current_user.id)
+    rooms = room_details_query(db).filter(Room.id.in_(joined)).order_by(Room.start_time.desc(), Room.id).all()
+    now = datetime.utcnow()
+    return [build_room_response(room, now) for room in rooms]
+
+
+@router.get("/{room_id}", response_model=RoomResponse)
+async def get_room(
+    room_id: str,
+    current_user: User = Depends(get_confirmed_user),
+    db: Session = Depends(get_db)
+):
+    """Get a room with its standings and (once started) problems; participants only"""
+    room = load_room(room_id, db)
+    
+    if not any(p.user_id == current_user.id for p in room.participants):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a participant in this room"
+        )
+    
+    return build_room_response(room)
+
+
+@router.post("/{room_id}/join", response_model=RoomResponse)
+async def join_room(
+    room_id: str,
+    current_user: User = Depends(get_confirmed_user),
+    db: Session = Depends(get_db)
+):
+    """Join a room before it starts"""
+    room = load_room(room_id, db)
+    
+    if room.status != ContestStatus.SCHEDULED or datetime.utcnow() >= room.start_time:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Room has already started"
+        )
+    
+    if any(p.user_id == current_user.id for p in room.participants):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already joined this room"
+        )
+    
+    if len(room.participants) >= MAX_PARTICIPANTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Room is full ({MAX_PARTICIPANTS} participants)"
+        )
+    
+    try:
+        db.add(RoomParticipant(room_id=room.id, user_id=current_user.id))
+        db.commit()
+    except IntegrityError:
+        # Concurrent join by the same user
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already joined this room"
+        )
+    
+    db.expire_all()
+    return build_room_response(load_room(room_id, db))
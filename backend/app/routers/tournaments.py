@@ -1,14 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import insert, or_
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-import math
+import uuid
 from ..database import get_db
 from ..models import (
     User, Tournament, TournamentSlot, TournamentInvite, TournamentMatch,
     TournamentRoundSchedule, Contest, ContestStatus, TournamentStatus,
-    TournamentInviteStatus, TournamentMatchStatus
+    TournamentInviteStatus, TournamentMatchStatus, TournamentFormat
 )
 from ..schemas import (
     TournamentCreate, TournamentResponse, TournamentSlotResponse,
@@ -17,13 +17,35 @@ from ..schemas import (
     TournamentBracketResponse
 )
 from ..dependencies import get_confirmed_user
+from ..bracket import SUPPORTED_SIZES, create_round, round_one_pairings, total_rounds
+from ..bracket_cache import bracket_cache
+from ..busy_intervals import find_conflicts, intervals_overlap
+from ..notifications import notification_hub
+from .. import swiss
 
 router = APIRouter(prefix="/api/tournaments", tags=["tournaments"])
 
 
-def calculate_num_rounds(num_participants: int) -> int:
-    """Calculate number of rounds needed for tournament"""
-    return int(math.log2(num_participants))
+def find_round_conflicts(user_ids, rounds, db: Session) -> List[tuple]:
+    """
+    Every (participant x round window) overlap, found with one query.
+    
+    rounds are (round_number, start_time) pairs; each round is 2 hours. Only
+    non-tournament contests count, and touching endpoints count as an overlap.
+    Returns (user_id, round_number, round_start, round_end, busy interval)
+    tuples ordered by round, then by the conflicting booking's start.
+    """
+    windows = [(round_number, start, start + timedelta(hours=2)) for round_number, start in rounds]
+    conflicts = find_conflicts(
+        user_ids, [(start, end) for _, start, end in windows], db, include_tournament=False, inclusive=True
+    )
+    
+    return [
+        (conflict.user_id, round_number, round_start, round_end, conflict)
+        for round_number, round_start, round_end in sorted(windows)
+        for conflict in conflicts
+        if intervals_overlap(conflict, round_start, round_end, inclusive=True)
+    ]
 
 
 def check_overlapping_contests(user_id, round_schedules: List[TournamentRoundSchedule], db: Session) -> Optional[str]:
@@ -36,30 +58,175 @@ def check_overlapping_contests(user_id, round_schedules: List[TournamentRoundSch
         except ValueError:
             pass  # Keep as string if conversion fails
     
-    for schedule in round_schedules:
-        round_start = schedule.start_time
-        round_end = round_start + timedelta(hours=2)
-        
-        # Check for overlapping contests (exclude tournament matches)
-        # Overlap condition: (contest_start < round_end) AND (contest_end > round_start)
-        # This catches overlaps including exact time matches
-        overlapping = db.query(Contest).filter(
-            Contest.tournament_match_id.is_(None),  # Only non-tournament contests
-            Contest.status.in_([ContestStatus.SCHEDULED, ContestStatus.ACTIVE]),
-            or_(
-                Contest.user1_id == user_id,
-                Contest.user2_id == user_id
-            ),
-            Contest.start_time <= round_end,  # <= to include exact matches
-            Contest.end_time >= round_start   # >= to include exact matches
-        ).first()
-        
-        if overlapping:
-            return f"User has a conflicting contest scheduled for round {schedule.round_number} ({round_start} - {round_end})"
+    rounds = [(schedule.round_number, schedule.start_time) for schedule in round_schedules]
+    for _, round_number, round_start, round_end, _ in find_round_conflicts([user_id], rounds, db):
+        return f"User has a conflicting contest scheduled for round {round_number} ({round_start} - {round_end})"
     
     return None
 
 
+def tournament_graph_query(db: Session):
+    """Tournament query that eager-loads slots, invites, matches and round schedules"""
+    return db.query(Tournament).options(
+        selectinload(Tournament.slots),
+        selectinload(Tournament.invites),
+        selectinload(Tournament.matches),
+        selectinload(Tournament.round_schedules)
+    )
+
+
+def load_tournament(tournament_id, db: Session) -> Tournament:
+    """Load a tournament graph with tournament_graph_query, or raise 404"""
+    tournament = tournament_graph_query(db).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tournament not found"
+        )
+    return tournament
+
+
+def load_tournament_handles(tournaments: List[Tournament], db: Session) -> Dict:
+    """Map user id -> handle for everyone referenced by the given tournament graphs, in one query"""
+    user_ids = set()
+    for tournament in tournaments:
+        user_ids.add(tournament.creator_id)
+        user_ids.update(slot.user_id for slot in tournament.slots)
+        user_ids.update(invite.invited_user_id for invite in tournament.invites)
+        for match in tournament.matches:
+            user_ids.update((match.user1_id, match.user2_id, match.winner_id))
+    user_ids.discard(None)
+    if not user_ids:
+        return {}
+    return dict(db.query(User.id, User.handle).filter(User.id.in_(list(user_ids))).all())
+
+
+def ensure_can_view_tournament(tournament: Tournament, user: User) -> None:
+    """Raise 403 unless the user created the tournament or holds one of its slots"""
+    is_creator = tournament.creator_id == user.id
+    is_participant = any(slot.user_id == user.id for slot in tournament.slots)
+    if not (is_creator or is_participant):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to view this tournament"
+        )
+
+
+def build_match_response(match: TournamentMatch, handles: Dict) -> TournamentMatchResponse:
+    return TournamentMatchResponse(
+        id=match.id,
+        round_number=match.round_number,
+        bracket_position=match.bracket_position,
+        slot1_id=match.slot1_id,
+        slot2_id=match.slot2_id,
+        user1_id=match.user1_id,
+        user2_id=match.user2_id,
+        user1_handle=handles.get(match.user1_id, "Unknown"),
+        user2_handle=handles.get(match.user2_id, "Unknown"),
+        contest_id=match.contest_id,
+        winner_id=match.winner_id,
+        winner_handle=handles.get(match.winner_id) if match.winner_id else None,
+        status=match.status.value,
+        start_time=match.start_time,
+        end_time=match.end_time
+    )
+
+
+def build_tournament_response(tournament: Tournament, handles: Dict) -> TournamentResponse:
+    """Build a TournamentResponse from a graph loaded with tournament_graph_query"""
+    slots = sorted(tournament.slots, key=lambda slot: slot.slot_number)
+    slot_numbers = {slot.id: slot.slot_number for slot in slots}
+    
+    slot_responses = [
+        TournamentSlotResponse(
+            id=slot.id,
+            slot_number=slot.slot_number,
+            user_id=slot.user_id,
+            user_handle=handles.get(slot.user_id) if slot.user_id else None,
+            status=slot.status
+        ) for slot in slots
+    ]
+    
+    invite_responses = [
+        TournamentInviteResponse(
+            id=invite.id,
+            tournament_id=invite.tournament_id,
+            slot_id=invite.slot_id,
+            slot_number=slot_numbers.get(invite.slot_id, 0),
+            invited_user_id=invite.invited_user_id,
+            invited_user_handle=handles.get(invite.invited_user_id, "Unknown"),
+            status=invite.status.value,
+            created_at=invite.created_at,
+            responded_at=invite.responded_at
+        ) for invite in tournament.invites
+    ]
+    
+    round_schedule_responses = [
+        TournamentRoundScheduleResponse(
+            id=rs.id,
+            round_number=rs.round_number,
+            start_time=rs.start_time
+        ) for rs in sorted(tournament.round_schedules, key=lambda rs: rs.round_number)
+    ]
+    
+    return TournamentResponse(
+        id=tournament.id,
+        creator_id=tournament.creator_id,
+        creator_handle=handles.get(tournament.creator_id, "Unknown"),
+        num_participants=tournament.num_participants,
+        difficulty=tournament.difficulty,
+        format=tournament.format.value,
+        num_rounds=total_rounds(tournament),
+        shared_problems=tournament.shared_problems,
+        status=tournament.status.value,
+        created_at=tournament.created_at,
+        start_time=tournament.start_time,
+        slots=slot_responses,
+        invites=invite_responses,
+        matches=[build_match_response(match, handles) for match in tournament.matches],
+        round_schedules=round_schedule_responses
+    )
+
+
+def build_bracket_response(tournament: Tournament, handles: Dict) -> TournamentBracketResponse:
+    """Build the bracket (matches grouped by round) from a graph loaded with tournament_graph_query"""
+    num_rounds = total_rounds(tournament)
+    matches_by_round = {round_num: [] for round_num in range(1, num_rounds + 1)}
+    positioned = sorted(tournament.matches, key=lambda match: (match.bracket_position is None, match.bracket_position or 0, match.id))
+    for match in positioned:
+        if match.round_number in matches_by_round:
+            matches_by_round[match.round_number].append({
+                "id": str(match.id),
+                "bracket_position": match.bracket_position,
+                "slot1_id": str(match.slot1_id),
+                "slot2_id": str(match.slot2_id),
+                "user1_id": str(match.user1_id),
+                "user2_id": str(match.user2_id),
+                "user1_handle": handles.get(match.user1_id, "Unknown"),
+                "user2_handle": handles.get(match.user2_id, "Unknown"),
+                "winner_id": str(match.winner_id) if match.winner_id else None,
+                "winner_handle": handles.get(match.winner_id) if match.winner_id else None,
+                "status": match.status.value,
+                "contest_id": str(match.contest_id) if match.contest_id else None
+            })
+    
+    standings = []
+    if tournament.format == TournamentFormat.SWISS:
+        standings = [
+            {**row, "user_id": str(row["user_id"]), "user_handle": handles.get(row["user_id"], "Unknown")}
+            for row in swiss.standings(tournament.slots, tournament.matches)
+        ]
+    
+    return TournamentBracketResponse(
+        rounds=[
+            {"round_number": round_num, "matches": round_matches}
+            for round_num, round_matches in matches_by_round.items()
+        ],
+        format=tournament.format.value,
+        standings=standings
+    )
+
+
 @router.post("/", response_model=TournamentResponse)
 async def create_tournament(
     tournament_data: TournamentCreate,
@@ -67,13 +234,41 @@ async def create_tournament(
     db: Session = Depends(get_db)
 ):
     """Create a new tournament"""
-    # Validate num_participants
-    if tournament_data.num_participants not in [4, 8, 16, 32, 64]:
+    try:
+        tournament_format = TournamentFormat(tournament_data.format)
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Number of participants must be 4, 8, 16, 32, or 64"
+            detail="Format must be 'single_elimination' or 'swiss'"
         )
     
+    # Validate num_participants and rounds
+    num_participants = tournament_data.num_participants
+    num_rounds = None
+    if tournament_format == TournamentFormat.SWISS:
+        if num_participants % 2 or not swiss.MIN_PARTICIPANTS <= num_participants <= swiss.MAX_PARTICIPANTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Swiss tournaments need an even number of participants from {swiss.MIN_PARTICIPANTS} to {swiss.MAX_PARTICIPANTS}"
+            )
+        num_rounds = tournament_data.num_rounds or swiss.default_rounds(num_participants)
+        if not 1 <= num_rounds <= swiss.max_rounds(num_participants):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Number of rounds must be between 1 and {swiss.max_rounds(num_participants)}"
+            )
+    else:
+        if num_participants not in SUPPORTED_SIZES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Number of participants must be a power of two from 4 to 1024"
+            )
+        if tournament_data.num_rounds is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Number of rounds can only be chosen for Swiss tournaments"
+            )
+    
     # Validate difficulty
     if tournament_data.difficulty not in [1, 2, 3, 4]:
         raise HTTPException(
@@ -81,31 +276,27 @@ async def create_tournament(
             detail="Difficulty must be between 1 and 4"
         )
     
-    # Create tournament
+    # Create the tournament and all of its empty slots in one transaction; ids
+    # are generated here so the slots can be bulk-inserted without a flush
     tournament = Tournament(
+        id=uuid.uuid4(),
         creator_id=current_user.id,
-        num_participants=tournament_data.num_participants,
+        num_participants=num_participants,
         difficulty=tournament_data.difficulty,
-        status=TournamentStatus.PENDING
+        format=tournament_format,
+        num_rounds=num_rounds,
+        shared_problems=tournament_data.shared_problems,
+        status=TournamentStatus.PENDING,
+        created_at=datetime.utcnow()
     )
     db.add(tournament)
-    db.commit()
-    db.refresh(tournament)
-    
-    # Create empty slots
-    for i in range(1, tournament_data.num_participants + 1):
-        slot = TournamentSlot(
-            tournament_id=tournament.id,
-            slot_number=i,
-            status="PENDING"
-        )
-        db.add(slot)
     
+    slot_rows = [
+        {"id": uuid.uuid4(), "tournament_id": tournament.id, "slot_number": i, "status": "PENDING"}
+        for i in range(1, num_participants + 1)
+    ]
+    db.execute(insert(TournamentSlot), slot_rows)
     db.commit()
-    db.refresh(tournament)
-    
-    # Load relationships
-    slots = db.query(TournamentSlot).filter(TournamentSlot.tournament_id == tournament.id).all()
     
     return TournamentResponse(
         id=tournament.id,
@@ -113,16 +304,19 @@ async def create_tournament(
         creator_handle=current_user.handle,
         num_participants=tournament.num_participants,
         difficulty=tournament.difficulty,
+        format=tournament.format.value,
+        num_rounds=total_rounds(tournament),
+        shared_problems=tournament.shared_problems,
         status=tournament.status.value,
         created_at=tournament.created_at,
         start_time=tournament.start_time,
         slots=[TournamentSlotResponse(
-            id=slot.id,
-            slot_number=slot.slot_number,
-            user_id=slot.user_id,
+            id=row["id"],
+            slot_number=row["slot_number"],
+            user_id=None,
             user_handle=None,
-            status=slot.status
-        ) for slot in slots],
+            status=row["status"]
+        ) for row in slot_rows],
         invites=[],
         matches=[],
         round_schedules=[]
@@ -135,115 +329,18 @@ async def list_tournaments(
     db: Session = Depends(get_db)
 ):
     """List tournaments where user is creator or participant"""
-    # Get tournaments where user is creator
-    created_tournaments = db.query(Tournament).filter(
-        Tournament.creator_id == current_user.id
-    ).all()
-    
-    # Get tournaments where user is a participant
-    participant_slots = db.query(TournamentSlot).filter(
+    participant_tournament_ids = db.query(TournamentSlot.tournament_id).filter(
         TournamentSlot.user_id == current_user.id
-    ).all()
-    participant_tournament_ids = [slot.tournament_id for slot in participant_slots]
-    participant_tournaments = db.query(Tournament).filter(
-        Tournament.id.in_(participant_tournament_ids)
-    ).all()
+    )
     
-    # Combine and deduplicate, excluding cancelled tournaments
-    all_tournaments = {t.id: t for t in created_tournaments + participant_tournaments}.values()
-    # Filter out cancelled tournaments
-    all_tournaments = [t for t in all_tournaments if t.status != TournamentStatus.CANCELLED]
-    
-    result = []
-    for tournament in all_tournaments:
-        creator = db.query(User).filter(User.id == tournament.creator_id).first()
-        slots = db.query(TournamentSlot).filter(TournamentSlot.tournament_id == tournament.id).all()
-        invites = db.query(TournamentInvite).filter(TournamentInvite.tournament_id == tournament.id).all()
-        matches = db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament.id).all()
-        round_schedules = db.query(TournamentRoundSchedule).filter(
-            TournamentRoundSchedule.tournament_id == tournament.id
-        ).order_by(TournamentRoundSchedule.round_number).all()
-        
-        # Build slot responses
-        slot_responses = []
-        for slot in slots:
-            user_handle = None
-            if slot.user_id:
-                user = db.query(User).filter(User.id == slot.user_id).first()
-                user_handle = user.handle if user else None
-            slot_responses.append(TournamentSlotResponse(
-                id=slot.id,
-                slot_number=slot.slot_number,
-                user_id=slot.user_id,
-                user_handle=user_handle,
-                status=slot.status
-            ))
-        
-        # Build invite responses
-        invite_responses = []
-        for invite in invites:
-            invited_user = db.query(User).filter(User.id == invite.invited_user_id).first()
-            slot = db.query(TournamentSlot).filter(TournamentSlot.id == invite.slot_id).first()
-            invite_responses.append(TournamentInviteResponse(
-                id=invite.id,
-                tournament_id=invite.tournament_id,
-                slot_id=invite.slot_id,
-                slot_number=slot.slot_number if slot else 0,
-                invited_user_id=invite.invited_user_id,
-                invited_user_handle=invited_user.handle if invited_user else "Unknown",
-                status=invite.status.value,
-                created_at=invite.created_at,
-                responded_at=invite.responded_at
-            ))
-        
-        # Build match responses
-        match_responses = []
-        for match in matches:
-            user1 = db.query(User).filter(User.id == match.user1_id).first()
-            user2 = db.query(User).filter(User.id == match.user2_id).first()
-            winner = db.query(User).filter(User.id == match.winner_id).first() if match.winner_id else None
-            match_responses.append(TournamentMatchResponse(
-                id=match.id,
-                round_number=match.round_number,
-                slot1_id=match.slot1_id,
-                slot2_id=match.slot2_id,
-                user1_id=match.user1_id,
-                user2_id=match.user2_id,
-                user1_handle=user1.handle if user1 else "Unknown",
-                user2_handle=user2.handle if user2 else "Unknown",
-                contest_id=match.contest_id,
-                winner_id=match.winner_id,
-                winner_handle=winner.handle if winner else None,
-                status=match.status.value,
-                start_time=match.start_time,
-                end_time=match.end_time
-            ))
-        
-        # Build round schedule responses
-        round_schedule_responses = [
-            TournamentRoundScheduleResponse(
-                id=rs.id,
-                round_number=rs.round_number,
-                start_time=rs.start_time
-            ) for rs in round_schedules
-        ]
-        
-        result.append(TournamentResponse(
-            id=tournament.id,
-            creator_id=tournament.creator_id,
-            creator_handle=creator.handle if creator else "Unknown",
-            num_participants=tournament.num_participants,
-            difficulty=tournament.difficulty,
-            status=tournament.status.value,
-            created_at=tournament.created_at,
-            start_time=tournament.start_time,
-            slots=slot_responses,
-            invites=invite_responses,
-            matches=match_responses,
-            round_schedules=round_schedule_responses
-        ))
-    
-    return result
+    # Excluding cancelled tournaments
+    tournaments = tournament_graph_query(db).filter(
+        or_(Tournament.creator_id == current_user.id, Tournament.id.in_(participant_tournament_ids)),
+        Tournament.status != TournamentStatus.CANCELLED
+    ).order_by(Tournament.created_at, Tournament.id).all()
+    
+    handles = load_tournament_handles(tournaments, db)
+    return [build_tournament_response(tournament, handles) for tournament in tournaments]
 
 
 @router.get("/{tournament_id}", response_model=TournamentResponse)
@@ -253,109 +350,10 @@ async def get_tournament(
     db: Session = Depends(get_db)
 ):
     """Get tournament details"""
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
-    if not tournament:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tournament not found"
-        )
-    
-    # Check if user is creator or participant
-    is_creator = tournament.creator_id == current_user.id
-    is_participant = db.query(TournamentSlot).filter(
-        TournamentSlot.tournament_id == tournament.id,
-        TournamentSlot.user_id == current_user.id
-    ).first() is not None
+    tournament = load_tournament(tournament_id, db)
+    ensure_can_view_tournament(tournament, current_user)
     
-    if not (is_creator or is_participant):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to view this tournament"
-        )
-    
-    creator = db.query(User).filter(User.id == tournament.creator_id).first()
-    slots = db.query(TournamentSlot).filter(TournamentSlot.tournament_id == tournament.id).all()
-    invites = db.query(TournamentInvite).filter(TournamentInvite.tournament_id == tournament.id).all()
-    matches = db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament.id).all()
-    round_schedules = db.query(TournamentRoundSchedule).filter(
-        TournamentRoundSchedule.tournament_id == tournament.id
-    ).order_by(TournamentRoundSchedule.round_number).all()
-    
-    # Build responses (same as list_tournaments)
-    slot_responses = []
-    for slot in slots:
-        user_handle = None
-        if slot.user_id:
-            user = db.query(User).filter(User.id == slot.user_id).first()
-            user_handle = user.handle if user else None
-        slot_responses.append(TournamentSlotResponse(
-            id=slot.id,
-            slot_number=slot.slot_number,
-            user_id=slot.user_id,
-            user_handle=user_handle,
-            status=slot.status
-        ))
-    
-    invite_responses = []
-    for invite in invites:
-        invited_user = db.query(User).filter(User.id == invite.invited_user_id).first()
-        slot = db.query(TournamentSlot).filter(TournamentSlot.id == invite.slot_id).first()
-        invite_responses.append(TournamentInviteResponse(
-            id=invite.id,
-            tournament_id=invite.tournament_id,
-            slot_id=invite.slot_id,
-            slot_number=slot.slot_number if slot else 0,
-            invited_user_id=invite.invited_user_id,
-            invited_user_handle=invited_user.handle if invited_user else "Unknown",
-            status=invite.status.value,
-            created_at=invite.created_at,
-            responded_at=invite.responded_at
-        ))
-    
-    match_responses = []
-    for match in matches:
-        user1 = db.query(User).filter(User.id == match.user1_id).first()
-        user2 = db.query(User).filter(User.id == match.user2_id).first()
-        winner = db.query(User).filter(User.id == match.winner_id).first() if match.winner_id else None
-        match_responses.append(TournamentMatchResponse(
-            id=match.id,
-            round_number=match.round_number,
-            slot1_id=match.slot1_id,
-            slot2_id=match.slot2_id,
-            user1_id=match.user1_id,
-            user2_id=match.user2_id,
-            user1_handle=user1.handle if user1 else "Unknown",
-            user2_handle=user2.handle if user2 else "Unknown",
-            contest_id=match.contest_id,
-            winner_id=match.winner_id,
-            winner_handle=winner.handle if winner else None,
-            status=match.status.value,
-            start_time=match.start_time,
-            end_time=match.end_time
-        ))
-    
-    round_schedule_responses = [
-        TournamentRoundScheduleResponse(
-            id=rs.id,
-            round_number=rs.round_number,
-            start_time=rs.start_time
-        ) for rs in round_schedules
-    ]
-    
-    return TournamentResponse(
-        id=tournament.id,
-        creator_id=tournament.creator_id,
-        creator_handle=creator.handle if creator else "Unknown",
-        num_participants=tournament.num_participants,
-        difficulty=tournament.difficulty,
-        status=tournament.status.value,
-        created_at=tournament.created_at,
-        start_time=tournament.start_time,
-        slots=slot_responses,
-        invites=invite_responses,
-        matches=match_responses,
-        round_schedules=round_schedule_responses
-    )
+    return build_tournament_response(tournament, load_tournament_handles([tournament], db))
 
 
 @router.put("/{tournament_id}/round-schedules", response_model=List[TournamentRoundScheduleResponse])
@@ -385,7 +383,7 @@ async def set_round_schedules(
             detail="Cannot modify round schedules after tournament has started"
         )
     
-    num_rounds = calculate_num_rounds(tournament.num_participants)
+    num_rounds = total_rounds(tournament)
     
     # Validate all rounds are provided
     if len(schedules_data.round_schedules) != num_rounds:
@@ -422,6 +420,23 @@ async def set_round_schedules(
                 detail=f"Round {sorted_schedules[i].round_number} overlaps with round {sorted_schedules[i + 1].round_number}"
             )
     
+    # Validate seated participants are free for every round (all pairs in one query)
+    participant_ids = [row[0] for row in db.query(TournamentSlot.user_id).filter(
+        TournamentSlot.tournament_id == tournament.id,
+        TournamentSlot.user_id.isnot(None)
+    ).all()]
+    conflicts = find_round_conflicts(
+        participant_ids, [(s.round_number, s.start_time) for s in schedules_data.round_schedules], db
+    )
+    if conflicts:
+        details = []
+        for _, round_number, _, _, interval in conflicts:
+            details.append(f"{interval.user.handle} (round {round_number}, {interval.start_time} - {interval.end_time})")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Participants have conflicting contests: " + ", ".join(details)
+        )
+    
     # Delete existing schedules
     db.query(TournamentRoundSchedule).filter(
         TournamentRoundSchedule.tournament_id == tournament.id
@@ -437,6 +452,7 @@ async def set_round_schedules(
         db.add(schedule)
     
     db.commit()
+    bracket_cache.bump(tournament.id)
     
     # Return updated schedules
     round_schedules = db.query(TournamentRoundSchedule).filter(
@@ -545,6 +561,15 @@ async def send_invite(
     db.commit()
     db.refresh(invite)
     
+    notification_hub.notify([invite.invited_user_id], "tournament_invite", {
+        "invite_id": invite.id,
+        "tournament_id": tournament.id,
+        "slot_number": slot.slot_number,
+        "creator_handle": current_user.handle,
+        "num_participants": tournament.num_participants,
+        "difficulty": tournament.difficulty
+    })
+    
     return TournamentInviteResponse(
         id=invite.id,
         tournament_id=invite.tournament_id,
@@ -605,6 +630,7 @@ async def accept_invite(
     
     db.commit()
     db.refresh(invite)
+    bracket_cache.bump(invite.tournament_id)
     
     invited_user = db.query(User).filter(User.id == invite.invited_user_id).first()
     
@@ -657,6 +683,7 @@ async def reject_invite(
     
     db.commit()
     db.refresh(invite)
+    bracket_cache.bump(invite.tournament_id)
     
     invited_user = db.query(User).filter(User.id == invite.invited_user_id).first()
     
@@ -714,6 +741,7 @@ async def creator_join_slot(
     slot.status = "ACCEPTED"
     db.commit()
     db.refresh(slot)
+    bracket_cache.bump(slot.tournament_id)
     
     return TournamentSlotResponse(
         id=slot.id,
@@ -724,69 +752,6 @@ async def creator_join_slot(
     )
 
 
-def generate_bracket_matches(tournament: Tournament, round_number: int, db: Session) -> List[TournamentMatch]:
-    """Generate matches for a round"""
-    if round_number == 1:
-        # Round 1: Pair slots 1-2, 3-4, 5-6, etc.
-        slots = db.query(TournamentSlot).filter(
-            TournamentSlot.tournament_id == tournament.id
-        ).order_by(TournamentSlot.slot_number).all()
-        
-        matches = []
-        for i in range(0, len(slots), 2):
-            if i + 1 < len(slots):
-                slot1 = slots[i]
-                slot2 = slots[i + 1]
-                if slot1.user_id and slot2.user_id:
-                    match = TournamentMatch(
-                        tournament_id=tournament.id,
-                        round_number=round_number,
-                        slot1_id=slot1.id,
-                        slot2_id=slot2.id,
-                        user1_id=slot1.user_id,
-                        user2_id=slot2.user_id,
-                        status=TournamentMatchStatus.SCHEDULED
-                    )
-                    matches.append(match)
-        return matches
-    else:
-        # Subsequent rounds: Pair winners from previous round
-        previous_matches = db.query(TournamentMatch).filter(
-            TournamentMatch.tournament_id == tournament.id,
-            TournamentMatch.round_number == round_number - 1,
-            TournamentMatch.winner_id.isnot(None)
-        ).order_by(TournamentMatch.id).all()
-        
-        matches = []
-        for i in range(0, len(previous_matches), 2):
-            if i + 1 < len(previous_matches):
-                match1 = previous_matches[i]
-                match2 = previous_matches[i + 1]
-                
-                # Get slots for winners
-                winner1_slot = db.query(TournamentSlot).filter(
-                    TournamentSlot.tournament_id == tournament.id,
-                    TournamentSlot.user_id == match1.winner_id
-                ).first()
-                winner2_slot = db.query(TournamentSlot).filter(
-                    TournamentSlot.tournament_id == tournament.id,
-                    TournamentSlot.user_id == match2.winner_id
-                ).first()
-                
-                if winner1_slot and winner2_slot:
-                    match = TournamentMatch(
-                        tournament_id=tournament.id,
-                        round_number=round_number,
-                        slot1_id=winner1_slot.id,
-                        slot2_id=winner2_slot.id,
-                        user1_id=match1.winner_id,
-                        user2_id=match2.winner_id,
-                        status=TournamentMatchStatus.SCHEDULED
-                    )
-                    matches.append(match)
-        return matches
-
-
 @router.post("/{tournament_id}/start", response_model=TournamentResponse)
 async def start_tournament(
     tournament_id: str,
@@ -823,7 +788,7 @@ async def start_tournament(
         )
     
     # Validate round schedules are set
-    num_rounds = calculate_num_rounds(tournament.num_participants)
+    num_rounds = total_rounds(tournament)
     round_schedules = db.query(TournamentRoundSchedule).filter(
         TournamentRoundSchedule.tournament_id == tournament.id
     ).all()
@@ -833,60 +798,41 @@ async def start_tournament(
             detail=f"Round schedules must be set for all {num_rounds} rounds before starting"
         )
     
-    # Get round 1 schedule
-    round1_schedule = db.query(TournamentRoundSchedule).filter(
-        TournamentRoundSchedule.tournament_id == tournament.id,
-        TournamentRoundSchedule.round_number == 1
-    ).first()
-    
+    round1_schedule = next((rs for rs in round_schedules if rs.round_number == 1), None)
     if not round1_schedule:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Round 1 schedule not found"
         )
     
-    # Generate bracket matches for round 1
-    round1_matches = generate_bracket_matches(tournament, 1, db)
-    
-    if len(round1_matches) != tournament.num_participants // 2:
+    # Pair round 1 by slot position (Swiss: seeds 1-2, 3-4, ... on boards in seed order)
+    if tournament.format == TournamentFormat.SWISS:
+        pairings = swiss.swiss_pairings(slots, [])
+    else:
+        pairings = round_one_pairings(slots)
+    if len(pairings) != tournament.num_participants // 2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to generate matches for round 1"
         )
     
-    # Create Contests for each match
-    from ..models import ContestScore
-    
-    for match in round1_matches:
-        contest = Contest(
-            tournament_match_id=match.id,
-            user1_id=match.user1_id,
-            user2_id=match.user2_id,
-            difficulty=tournament.difficulty,
-            start_time=round1_schedule.start_time,
-            end_time=round1_schedule.start_time + timedelta(hours=2),
-            status=ContestStatus.SCHEDULED
+    # Tournament bookings are exempt from the exclusion constraint, so check round 1 here
+    participant_ids = [s.user_id for s in slots]
+    if find_round_conflicts(participant_ids, [(1, round1_schedule.start_time)], db):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A participant already has a contest scheduled/active during round 1"
         )
-        db.add(contest)
-        db.flush()  # Get contest.id
-        
-        match.contest_id = contest.id
-        match.start_time = round1_schedule.start_time
-        match.end_time = round1_schedule.start_time + timedelta(hours=2)
-        db.add(match)
-        
-        # Create initial scores
-        score1 = ContestScore(contest_id=contest.id, user_id=match.user1_id, total_points=0)
-        score2 = ContestScore(contest_id=contest.id, user_id=match.user2_id, total_points=0)
-        db.add(score1)
-        db.add(score2)
-    
-    # Update tournament status
+    
+    # Create every round 1 match, contest and score in bulk, and start the tournament
     tournament.status = TournamentStatus.ACTIVE
     tournament.start_time = datetime.utcnow()
     
+    create_round(tournament, 1, pairings, round1_schedule.start_time, db)
     db.commit()
     
+    bracket_cache.bump(tournament_id)
+    
     # Return updated tournament
     return await get_tournament(tournament_id, current_user, db)
 
@@ -898,12 +844,7 @@ async def cancel_tournament(
     db: Session = Depends(get_db)
 ):
     """Cancel tournament (creator only, only if not started)"""
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
-    if not tournament:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tournament not found"
-        )
+    tournament = load_tournament(tournament_id, db)
     
     if tournament.creator_id != current_user.id:
         raise HTTPException(
@@ -932,153 +873,23 @@ async def cancel_tournament(
     # Cancel the tournament
     tournament.status = TournamentStatus.CANCELLED
     db.commit()
-    db.refresh(tournament)
     
-    # Load relationships for response
-    creator = db.query(User).filter(User.id == tournament.creator_id).first()
-    slots = db.query(TournamentSlot).filter(TournamentSlot.tournament_id == tournament.id).all()
-    invites = db.query(TournamentInvite).filter(TournamentInvite.tournament_id == tournament.id).all()
-    matches = db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament.id).all()
-    round_schedules = db.query(TournamentRoundSchedule).filter(
-        TournamentRoundSchedule.tournament_id == tournament.id
-    ).order_by(TournamentRoundSchedule.round_number).all()
-    
-    # Build responses (same as get_tournament)
-    slot_responses = []
-    for slot in slots:
-        user_handle = None
-        if slot.user_id:
-            user = db.query(User).filter(User.id == slot.user_id).first()
-            user_handle = user.handle if user else None
-        slot_responses.append(TournamentSlotResponse(
-            id=slot.id,
-            slot_number=slot.slot_number,
-            user_id=slot.user_id,
-            user_handle=user_handle,
-            status=slot.status
-        ))
-    
-    invite_responses = []
-    for invite in invites:
-        invited_user = db.query(User).filter(User.id == invite.invited_user_id).first()
-        slot = db.query(TournamentSlot).filter(TournamentSlot.id == invite.slot_id).first()
-        invite_responses.append(TournamentInviteResponse(
-            id=invite.id,
-            tournament_id=invite.tournament_id,
-            slot_id=invite.slot_id,
-            slot_number=slot.slot_number if slot else 0,
-            invited_user_id=invite.invited_user_id,
-            invited_user_handle=invited_user.handle if invited_user else "Unknown",
-            status=invite.status.value,
-            created_at=invite.created_at,
-            responded_at=invite.responded_at
-        ))
-    
-    match_responses = []
-    for match in matches:
-        user1 = db.query(User).filter(User.id == match.user1_id).first()
-        user2 = db.query(User).filter(User.id == match.user2_id).first()
-        winner = db.query(User).filter(User.id == match.winner_id).first() if match.winner_id else None
-        match_responses.append(TournamentMatchResponse(
-            id=match.id,
-            round_number=match.round_number,
-            slot1_id=match.slot1_id,
-            slot2_id=match.slot2_id,
-            user1_id=match.user1_id,
-            user2_id=match.user2_id,
-            user1_handle=user1.handle if user1 else "Unknown",
-            user2_handle=user2.handle if user2 else "Unknown",
-            contest_id=match.contest_id,
-            winner_id=match.winner_id,
-            winner_handle=winner.handle if winner else None,
-            status=match.status.value,
-            start_time=match.start_time,
-            end_time=match.end_time
-        ))
-    
-    round_schedule_responses = [
-        TournamentRoundScheduleResponse(
-            id=rs.id,
-            round_number=rs.round_number,
-            start_time=rs.start_time
-        ) for rs in round_schedules
-    ]
-    
-    return TournamentResponse(
-        id=tournament.id,
-        creator_id=tournament.creator_id,
-        creator_handle=creator.handle if creator else "Unknown",
-        num_participants=tournament.num_participants,
-        difficulty=tournament.difficulty,
-        status=tournament.status.value,
-        created_at=tournament.created_at,
-        start_time=tournament.start_time,
-        slots=slot_responses,
-        invites=invite_responses,
-        matches=match_responses,
-        round_schedules=round_schedule_responses
-    )
+    tournament = load_tournament(tournament_id, db)
+    return build_tournament_response(tournament, load_tournament_handles([tournament], db))
 
 
 @router.get("/{tournament_id}/bracket", response_model=TournamentBracketResponse)
 async def get_bracket(
     tournament_id: str,
+    request: Request,
     current_user: User = Depends(get_confirmed_user),
     db: Session = Depends(get_db)
 ):
-    """Get bracket structure for visualization"""
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
-    if not tournament:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tournament not found"
-        )
-    
-    # Check authorization
-    is_creator = tournament.creator_id == current_user.id
-    is_participant = db.query(TournamentSlot).filter(
-        TournamentSlot.tournament_id == tournament.id,
-        TournamentSlot.user_id == current_user.id
-    ).first() is not None
-    
-    if not (is_creator or is_participant):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to view this tournament"
-        )
-    
-    num_rounds = calculate_num_rounds(tournament.num_participants)
-    rounds_data = []
-    
-    for round_num in range(1, num_rounds + 1):
-        matches = db.query(TournamentMatch).filter(
-            TournamentMatch.tournament_id == tournament.id,
-            TournamentMatch.round_number == round_num
-        ).order_by(TournamentMatch.id).all()
-        
-        round_matches = []
-        for match in matches:
-            user1 = db.query(User).filter(User.id == match.user1_id).first()
-            user2 = db.query(User).filter(User.id == match.user2_id).first()
-            winner = db.query(User).filter(User.id == match.winner_id).first() if match.winner_id else None
-            
-            round_matches.append({
-                "id": str(match.id),
-                "slot1_id": str(match.slot1_id),
-                "slot2_id": str(match.slot2_id),
-                "user1_id": str(match.user1_id),
-                "user2_id": str(match.user2_id),
-                "user1_handle": user1.handle if user1 else "Unknown",
-                "user2_handle": user2.handle if user2 else "Unknown",
-                "winner_id": str(match.winner_id) if match.winner_id else None,
-                "winner_handle": winner.handle if winner else None,
-                "status": match.status.value,
-                "contest_id": str(match.contest_id) if match.contest_id else None
-            })
-        
-        rounds_data.append({
-            "round_number": round_num,
-            "matches": round_matches
-        })
-    
-    return TournamentBracketResponse(rounds=rounds_data)
+    """Get bracket structure for visualization (served from bracket_cache with ETag revalidation)"""
+    def build():
+        tournament = load_tournament(tournament_id, db)
+        ensure_can_view_tournament(tournament, current_user)
+        viewer_ids = {tournament.creator_id, *(slot.user_id for slot in tournament.slots if slot.user_id)}
+        return build_bracket_response(tournament, load_tournament_handles([tournament], db)), viewer_ids
+    
+    return bracket_cache.respond(request, tournament_id, current_user.id, build)
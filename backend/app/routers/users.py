@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from typing import List
-from sqlalchemy import or_, func
+from uuid import UUID
 from ..database import get_db
-from ..models import User, Contest, ContestScore, ContestStatus, RatingHistory
-from ..schemas import UserResponse, UserSearchResponse, LeaderboardEntryResponse, UserProfileResponse
+from ..models import User, UserStats
+from ..schemas import (
+    UserResponse, UserSearchResponse, LeaderboardEntryResponse, LeaderboardRankResponse,
+    UserProfileResponse, HeadToHeadResponse
+)
 from ..dependencies import get_confirmed_user
+from ..feed_cache import feed_cache
+from ..leaderboard import rank_index
+from ..handle_search import search_handles
+from ..rating import INITIAL_RATING
+from ..user_stats import get_head_to_head
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -15,6 +23,21 @@ async def get_current_user_profile(current_user: User = Depends(get_confirmed_us
     return current_user
 
 
+@router.get("/me/head-to-head", response_model=List[HeadToHeadResponse])
+async def get_my_head_to_head(
+    opponent_ids: List[UUID] = Query(..., description="Opponent user ids (repeatable)"),
+    current_user: User = Depends(get_confirmed_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's record against each opponent (batch, one query)"""
+    if len(opponent_ids) > 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At most 50 opponents per request"
+        )
+    return get_head_to_head(current_user.id, opponent_ids, db)
+
+
 @router.get("/search", response_model=List[UserSearchResponse])
 async def search_users(
     q: str = Query(..., min_length=1, description="Search query"),
@@ -22,102 +45,87 @@ async def search_users(
     current_user: User = Depends(get_confirmed_user),
     db: Session = Depends(get_db)
 ):
-    """Search users by handle (for challenge creation)"""
-    users = db.query(User).filter(
-        User.handle.ilike(f"%{q}%"),
-        User.id != current_user.id  # Exclude current user
-    ).limit(limit).all()
-    
-    return users
+    """Search users by handle (for challenge creation); prefix matches come first"""
+    query = q.strip()
+    if not query:
+        # An empty prefix would match every handle
+        return []
+    return search_handles(query, limit, db, exclude_id=current_user.id)
 
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntryResponse])
 async def get_leaderboard(
+    request: Request,
     limit: int = Query(10, ge=1, le=100, description="Number of users to return"),
     offset: int = Query(0, ge=0, description="Number of users to skip"),
     db: Session = Depends(get_db)
 ):
-    """Get leaderboard of users ordered by rating (public endpoint)"""
-    users = db.query(User).order_by(User.rating.desc()).offset(offset).limit(limit).all()
-    
-    # Calculate rank (1-indexed)
-    rank = offset + 1
-    result = []
-    for user in users:
-        result.append(LeaderboardEntryResponse(
-            rank=rank,
-            handle=user.handle,
-            rating=user.rating,
-            id=user.id
-        ))
-        rank += 1
+    """Get leaderboard of users ordered by rating (public endpoint, served from the feed cache)"""
+    def build():
+        rank_index.ensure_loaded(db)
+        return [
+            LeaderboardEntryResponse(rank=rank, handle=handle, rating=rating, id=user_id)
+            for rank, user_id, handle, rating in rank_index.page(offset, limit)
+        ]
     
-    return result
+    return feed_cache.respond(request, f"leaderboard:{offset}:{limit}", build)
+
+
+@router.get("/leaderboard/around-me", response_model=List[LeaderboardEntryResponse])
+async def get_leaderboard_around_me(
+    radius: int = Query(5, ge=0, le=50, description="Number of users to show above and below"),
+    current_user: User = Depends(get_confirmed_user),
+    db: Session = Depends(get_db)
+):
+    """Get the leaderboard entries surrounding the current user"""
+    rank_index.ensure_loaded(db)
+    return [
+        LeaderboardEntryResponse(rank=rank, handle=handle, rating=rating, id=user_id)
+        for rank, user_id, handle, rating in rank_index.around(current_user.id, radius)
+    ]
 
 
 @router.get("/{handle}/profile", response_model=UserProfileResponse)
 async def get_user_profile(handle: str, db: Session = Depends(get_db)):
     """Get detailed user profile (public endpoint)"""
     try:
-        user = db.query(User).filter(User.handle == handle).first()
-        if not user:
+        row = db.query(User, UserStats).outerjoin(
+            UserStats, UserStats.user_id == User.id
+        ).filter(User.handle == handle).first()
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        user, stats = row
         
-        # Ensure user has rating (default to 1000 if missing due to migration)
+        # Ensure user has rating (default to INITIAL_RATING if missing due to migration)
         if not hasattr(user, 'rating') or user.rating is None:
-            user.rating = 1000
+            user.rating = INITIAL_RATING
             db.commit()
         
-        # Get contest statistics
-        user_contests = db.query(Contest).filter(
-            or_(
-                Contest.user1_id == user.id,
-                Contest.user2_id == user.id
-            ),
-            Contest.status == ContestStatus.COMPLETED
-        ).all()
-        
-        total_contests = len(user_contests)
-        wins = 0
-        losses = 0
-        draws = 0
-        
-        for contest in user_contests:
-            score1 = db.query(ContestScore).filter(
-                ContestScore.contest_id == contest.id,
-                ContestScore.user_id == contest.user1_id
-            ).first()
-            score2 = db.query(ContestScore).filter(
-                ContestScore.contest_id == contest.id,
-                ContestScore.user_id == contest.user2_id
-            ).first()
-            
-            if score1 and score2:
-                user_points = score1.total_points if contest.user1_id == user.id else score2.total_points
-                opponent_points = score2.total_points if contest.user1_id == user.id else score1.total_points
-                
-                if user_points > opponent_points:
-                    wins += 1
-                elif opponent_points > user_points:
-                    losses += 1
-                else:
-                    draws += 1
+        # Contest statistics are maintained in user_stats when contests are rated
+        total_contests = stats.total_contests if stats else 0
+        wins = stats.wins if stats else 0
+        losses = stats.losses if stats else 0
+        draws = stats.draws if stats else 0
+        best_rating = max(user.rating, stats.best_rating or 0) if stats else user.rating
         
         win_rate = (wins / total_contests * 100) if total_contests > 0 else 0.0
         
         return UserProfileResponse(
             id=user.id,
             handle=user.handle,
-            rating=getattr(user, 'rating', 1000),  # Fallback to 1000 if rating missing
+            rating=getattr(user, 'rating', INITIAL_RATING),  # Fallback to INITIAL_RATING if rating missing
             created_at=user.created_at,
             total_contests=total_contests,
             wins=wins,
             losses=losses,
             draws=draws,
-            win_rate=round(win_rate, 2)
+            win_rate=round(win_rate, 2),
+            best_rating=best_rating,
+            current_win_streak=stats.current_win_streak if stats else 0,
+            longest_win_streak=stats.longest_win_streak if stats else 0
         )
     except HTTPException:
         raise
@@ -131,6 +139,32 @@ async def get_user_profile(handle: str, db: Session = Depends(get_db)):
         )
 
 
+@router.get("/{handle}/rank", response_model=LeaderboardRankResponse)
+async def get_user_rank(handle: str, db: Session = Depends(get_db)):
+    """Get a user's leaderboard position (public endpoint)"""
+    user = db.query(User.id, User.handle, User.rating).filter(User.handle == handle).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    rank_index.ensure_loaded(db)
+    rank = rank_index.rank_of(user.id)
+    if rank is None:
+        # Registered after the index was loaded by another process
+        rank_index.upsert(user.id, user.handle, user.rating)
+        rank = rank_index.rank_of(user.id)
+    
+    return LeaderboardRankResponse(
+        id=user.id,
+        handle=user.handle,
+        rating=user.rating,
+        rank=rank,
+        total_users=rank_index.total
+    )
+
+
 @router.get("/{handle}", response_model=UserResponse)
 async def get_user_by_handle(handle: str, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.handle == handle).first()
@@ -187,6 +187,12 @@ class ContestResponse(BaseModel):
         from_attributes = True
 
 
+class ContestPageResponse(BaseModel):
+    """One page of a user's contest history (keyset pagination)"""
+    items: List[ContestResponse] = []
+    next_cursor: Optional[str] = None  # Pass back as `cursor` to get the next page
+
+
 # User search schema
 class UserSearchResponse(BaseModel):
     id: UUID
@@ -208,6 +214,14 @@ class LeaderboardEntryResponse(BaseModel):
         from_attributes = True
 
 
+class LeaderboardRankResponse(BaseModel):
+    id: UUID
+    handle: str
+    rating: int
+    rank: int
+    total_users: int
+
+
 # User profile schema
 class UserProfileResponse(BaseModel):
     id: UUID
@@ -219,6 +233,9 @@ class UserProfileResponse(BaseModel):
     losses: int
     draws: int
     win_rate: float
+    best_rating: int
+    current_win_streak: int = 0
+    longest_win_streak: int = 0
 
     @field_serializer('created_at')
     def serialize_datetime(self, dt: datetime, _info):
@@ -232,6 +249,24 @@ class UserProfileResponse(BaseModel):
         from_attributes = True
 
 
+# Head-to-head schema (from the requesting user's point of view)
+class HeadToHeadResponse(BaseModel):
+    opponent_id: UUID
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    total_contests: int = 0
+    last_played_at: Optional[datetime] = None
+
+    @field_serializer('last_played_at')
+    def serialize_datetime(self, dt: Optional[datetime], _info):
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.isoformat()
+
+
 # Public contest schema (without sensitive data)
 class PublicContestResponse(BaseModel):
     id: UUID
@@ -262,12 +297,16 @@ class PublicContestResponse(BaseModel):
 class TournamentCreate(BaseModel):
     num_participants: int
     difficulty: int
+    format: str = "single_elimination"  # single_elimination or swiss
+    num_rounds: Optional[int] = None  # Swiss only; defaults to ceil(log2(num_participants))
+    shared_problems: bool = False  # One problem set per round, unsolved by every player of the round
     
     class Config:
         json_schema_extra = {
             "example": {
                 "num_participants": 8,
-                "difficulty": 2
+                "difficulty": 2,
+                "format": "single_elimination"
             }
         }
 
@@ -348,6 +387,7 @@ class TournamentInviteResponse(BaseModel):
 class TournamentMatchResponse(BaseModel):
     id: UUID
     round_number: int
+    bracket_position: Optional[int] = None
     slot1_id: UUID
     slot2_id: UUID
     user1_id: UUID
@@ -375,6 +415,8 @@ class TournamentMatchResponse(BaseModel):
 
 class TournamentBracketResponse(BaseModel):
     rounds: List[dict]  # List of rounds, each containing matches
+    format: str = "single_elimination"
+    standings: List[dict] = []  # Swiss only, best first
 
 
 class TournamentResponse(BaseModel):
@@ -383,6 +425,9 @@ class TournamentResponse(BaseModel):
     creator_handle: str
     num_participants: int
     difficulty: int
+    format: str = "single_elimination"
+    num_rounds: int
+    shared_problems: bool = False
     status: str
     created_at: datetime
     start_time: Optional[datetime] = None
@@ -401,3 +446,65 @@ class TournamentResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+# Room (free-for-all contest) schemas
+class RoomCreate(BaseModel):
+    difficulty: int
+    start_time: datetime
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "difficulty": 2,
+                "start_time": "2024-01-01T12:00:00Z"
+            }
+        }
+
+
+class RoomParticipantResponse(BaseModel):
+    rank: int
+    user_id: UUID
+    user_handle: str
+    total_points: int
+
+
+class RoomProblemResponse(BaseModel):
+    id: UUID
+    problem_index: str
+    problem_code: str
+    problem_url: Optional[str] = None
+    points: int
+    solved_by: Optional[UUID] = None
+    solved_at: Optional[datetime] = None
+    
+    @field_serializer('solved_at')
+    def serialize_datetime(self, dt: Optional[datetime], _info):
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.isoformat()
+    
+    class Config:
+        from_attributes = True
+
+
+class RoomResponse(BaseModel):
+    id: UUID
+    creator_id: UUID
+    creator_handle: str
+    difficulty: int
+    start_time: datetime
+    end_time: datetime
+    status: str
+    participants: List[RoomParticipantResponse] = []  # Standings, best first
+    problems: List[RoomProblemResponse] = []
+    
+    @field_serializer('start_time', 'end_time')
+    def serialize_datetime(self, dt: datetime, _info):
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.isoformat()
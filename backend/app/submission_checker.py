@@ -1,25 +1,73 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.orm import Session
+from sqlalchemy import update, insert, func, exists, or_, and_
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from typing import List
 import asyncio
-from uuid import UUID
+from uuid import UUID, uuid4
 from .database import SessionLocal
 from .models import (
     Contest, ContestProblem, ContestScore, ContestStatus, User, RatingHistory,
-    Tournament, TournamentMatch, TournamentRoundSchedule, TournamentStatus, TournamentMatchStatus
+    Tournament, TournamentFormat, TournamentMatch, TournamentRoundProblem, TournamentRoundSchedule, TournamentSlot,
+    TournamentStatus, TournamentMatchStatus
 )
 from .codeforces_api import cf_api
 from .rating import calculate_elo_rating, determine_contest_scores
-from .problem_selector import get_unsolved_problems
-import math
+from .problem_selector import get_problems_unsolved_by, get_unsolved_problems
+from .bracket import MATCH_DURATION, create_round, next_round_pairings, total_rounds
+from .swiss import swiss_pairings
+from .bracket_cache import bracket_cache
+from .contest_events import publish_problems, publish_solve, publish_status
+from .notifications import notification_hub
+from .busy_intervals import find_conflicts, release_busy_intervals
+from .feed_cache import feed_cache
+from .leaderboard import rank_index
+from .handle_search import handle_index
+from .user_stats import (
+    empty_stats, add_contest_result, load_user_stats, save_user_stats,
+    ordered_pair, empty_head_to_head, add_head_to_head_result, load_head_to_head, save_head_to_head
+)
 
 
 scheduler = AsyncIOScheduler()
 
 
+def record_problem_solve(problem: ContestProblem, user_id, solved_at: datetime, db: Session) -> bool:
+    """
+    Mark a problem as solved and add its points to the solver's score.
+
+    The problem is claimed with a conditional UPDATE (only while solved_by is
+    still NULL), so it can be awarded at most once, and the score is bumped in
+    place with total_points = total_points + points instead of being recomputed.
+    Returns True if this call awarded the problem.
+    """
+    claimed = db.execute(
+        update(ContestProblem)
+        .where(ContestProblem.id == problem.id, ContestProblem.solved_by.is_(None))
+        .values(solved_by=user_id, solved_at=solved_at)
+    ).rowcount
+    
+    if claimed:
+        db.execute(
+            update(ContestScore)
+            .where(ContestScore.contest_id == problem.contest_id, ContestScore.user_id == user_id)
+            .values(total_points=ContestScore.total_points + problem.points)
+        )
+    
+    db.commit()
+    if claimed:
+        publish_solve(problem, user_id, solved_at, db)
+    return bool(claimed)
+
+
 def recalculate_contest_scores(contest_id, db: Session):
-    """Recalculate contest scores from solved problems to ensure accuracy"""
+    """
+    Rebuild contest scores from solved problems.
+    
+    Scores are maintained incrementally by record_problem_solve; this is the
+    offline reconciliation path (see reconcile_scores.py) for repairing drift.
+    """
     from uuid import UUID
     # Convert contest_id to UUID if it's a string
     if isinstance(contest_id, str):
@@ -28,121 +76,191 @@ def recalculate_contest_scores(contest_id, db: Session):
         except ValueError:
             pass
     
-    # Get all solved problems for this contest
-    solved_problems = db.query(ContestProblem).filter(
-        ContestProblem.contest_id == contest_id,
-        ContestProblem.solved_by.isnot(None)
-    ).all()
-    
-    # Calculate scores for each user
-    user_scores = {}
-    for problem in solved_problems:
-        user_id = problem.solved_by
-        if user_id not in user_scores:
-            user_scores[user_id] = 0
-        user_scores[user_id] += problem.points
+    # Sum points per solver in a single query
+    user_scores = dict(
+        db.query(ContestProblem.solved_by, func.sum(ContestProblem.points)).filter(
+            ContestProblem.contest_id == contest_id,
+            ContestProblem.solved_by.isnot(None)
+        ).group_by(ContestProblem.solved_by).all()
+    )
     
-    # Update contest scores
-    for user_id, total_points in user_scores.items():
-        score = db.query(ContestScore).filter(
-            ContestScore.contest_id == contest_id,
-            ContestScore.user_id == user_id
-        ).first()
-        if score:
+    # Update contest scores (users with no solved problems get 0)
+    changed = 0
+    scores = db.query(ContestScore).filter(ContestScore.contest_id == contest_id).all()
+    for score in scores:
+        total_points = int(user_scores.get(score.user_id) or 0)
+        if score.total_points != total_points:
             score.total_points = total_points
-    
-    # Set scores to 0 for users with no solved problems
-    contest = db.query(Contest).filter(Contest.id == contest_id).first()
-    if contest:
-        for user_id in [contest.user1_id, contest.user2_id]:
-            if user_id not in user_scores:
-                score = db.query(ContestScore).filter(
-                    ContestScore.contest_id == contest_id,
-                    ContestScore.user_id == user_id
-                ).first()
-                if score:
-                    score.total_points = 0
+            changed += 1
     
     db.commit()
+    return changed
 
 
-def update_ratings_after_contest(contest_id, db: Session):
-    """Update user ratings after a contest is completed"""
-    # Convert contest_id to UUID if it's a string
-    if isinstance(contest_id, str):
-        try:
-            contest_id = UUID(contest_id)
-        except ValueError:
-            pass
-    
-    contest = db.query(Contest).filter(Contest.id == contest_id).first()
-    if not contest or contest.status != ContestStatus.COMPLETED:
-        return
+def apply_ratings_batch(contest_ids, db: Session) -> int:
+    """
+    Apply Elo rating updates for many completed contests at once.
     
-    # Get final scores for both users
-    score1 = db.query(ContestScore).filter(
-        ContestScore.contest_id == contest.id,
-        ContestScore.user_id == contest.user1_id
-    ).first()
-    score2 = db.query(ContestScore).filter(
-        ContestScore.contest_id == contest.id,
-        ContestScore.user_id == contest.user2_id
-    ).first()
+    Loads scores (joined with their contests), users (locked FOR UPDATE),
+    existing rating history, user_stats and head_to_head in five queries,
+    applies calculate_elo_rating in chronological order (end_time, then id) so
+    a player in several contests gets sequential updates, and writes user
+    ratings, rating history rows, user stats and head-to-head records in bulk.
+    Contests that are not completed, lack scores or were already rated are skipped.
+    Returns the number of contests rated.
+    """
+    ids = []
+    for contest_id in contest_ids:
+        # Convert contest_id to UUID if it's a string
+        if isinstance(contest_id, str):
+            try:
+                contest_id = UUID(contest_id)
+            except ValueError:
+                pass
+        ids.append(contest_id)
     
-    if not score1 or not score2:
-        return
+    if not ids:
+        return 0
     
-    # Get users
-    user1 = db.query(User).filter(User.id == contest.user1_id).first()
-    user2 = db.query(User).filter(User.id == contest.user2_id).first()
+    # Final scores for every completed contest in the batch
+    score_rows = db.query(
+        Contest.id, Contest.end_time, Contest.user1_id, Contest.user2_id,
+        ContestScore.user_id, ContestScore.total_points
+    ).join(
+        ContestScore, ContestScore.contest_id == Contest.id
+    ).filter(
+        Contest.id.in_(ids),
+        Contest.status == ContestStatus.COMPLETED
+    ).all()
     
-    if not user1 or not user2:
-        return
+    contests = {}
+    for contest_id, end_time, user1_id, user2_id, user_id, total_points in score_rows:
+        contest = contests.setdefault(contest_id, {
+            "end_time": end_time,
+            "user1_id": user1_id,
+            "user2_id": user2_id,
+            "points": {}
+        })
+        contest["points"][user_id] = total_points or 0
     
-    # Check if ratings have already been updated for this contest
-    existing_history = db.query(RatingHistory).filter(
-        RatingHistory.contest_id == contest.id
-    ).first()
+    if not contests:
+        return 0
     
-    if existing_history:
-        # Ratings already updated for this contest
-        return
+    # Lock the players' rows (in id order to avoid deadlocks) so concurrent
+    # workers apply rating updates one after another
+    user_ids = set()
+    for contest in contests.values():
+        user_ids.update([contest["user1_id"], contest["user2_id"]])
+    ratings = dict(
+        db.query(User.id, User.rating).filter(
+            User.id.in_(list(user_ids))
+        ).order_by(User.id).with_for_update().all()
+    )
     
-    # Get current ratings
-    rating1_before = user1.rating
-    rating2_before = user2.rating
+    # Contests whose ratings have already been applied
+    already_rated = {
+        row[0] for row in db.query(RatingHistory.contest_id).filter(
+            RatingHistory.contest_id.in_(list(contests.keys()))
+        ).distinct().all()
+    }
     
-    # Determine Elo scores based on points
-    elo_score1, elo_score2 = determine_contest_scores(score1.total_points, score2.total_points)
+    existing_stats = load_user_stats(user_ids, db)
+    stats_by_user = {}
+    pairs = {ordered_pair(c["user1_id"], c["user2_id"]) for c in contests.values()}
+    existing_head_to_head = load_head_to_head(pairs, db)
+    head_to_head = {}
     
-    # Calculate new ratings
-    new_rating1, new_rating2, rating_change1, rating_change2 = calculate_elo_rating(
-        rating1_before, rating2_before, elo_score1, elo_score2
-    )
+    history_rows = []
+    rated_users = set()
+    rated_contests = 0
+    for contest_id in sorted(contests, key=lambda cid: (contests[cid]["end_time"], str(cid))):
+        contest = contests[contest_id]
+        user1_id = contest["user1_id"]
+        user2_id = contest["user2_id"]
+        
+        if contest_id in already_rated:
+            continue
+        if user1_id not in contest["points"] or user2_id not in contest["points"]:
+            continue
+        if user1_id not in ratings or user2_id not in ratings:
+            continue
+        
+        rating1_before = ratings[user1_id]
+        rating2_before = ratings[user2_id]
+        
+        # Determine Elo scores based on points
+        elo_score1, elo_score2 = determine_contest_scores(
+            contest["points"][user1_id], contest["points"][user2_id]
+        )
+        
+        # Calculate new ratings
+        new_rating1, new_rating2, rating_change1, rating_change2 = calculate_elo_rating(
+            rating1_before, rating2_before, elo_score1, elo_score2
+        )
+        
+        ratings[user1_id] = new_rating1
+        ratings[user2_id] = new_rating2
+        rated_users.update([user1_id, user2_id])
+        rated_contests += 1
+        
+        points1 = contest["points"][user1_id]
+        points2 = contest["points"][user2_id]
+        for user_id, points, opponent_points, before, after in (
+            (user1_id, points1, points2, rating1_before, new_rating1),
+            (user2_id, points2, points1, rating2_before, new_rating2),
+        ):
+            if user_id not in stats_by_user:
+                stats_by_user[user_id] = existing_stats.get(user_id) or empty_stats()
+            add_contest_result(stats_by_user[user_id], points, opponent_points, before, after)
+        
+        pair = ordered_pair(user1_id, user2_id)
+        if pair not in head_to_head:
+            head_to_head[pair] = existing_head_to_head.get(pair) or empty_head_to_head()
+        add_head_to_head_result(head_to_head[pair], user1_id, user2_id, points1, points2, contest["end_time"])
+        
+        history_rows.append({
+            "user_id": user1_id,
+            "contest_id": contest_id,
+            "rating_before": rating1_before,
+            "rating_after": new_rating1,
+            "rating_change": rating_change1
+        })
+        history_rows.append({
+            "user_id": user2_id,
+            "contest_id": contest_id,
+            "rating_before": rating2_before,
+            "rating_after": new_rating2,
+            "rating_change": rating_change2
+        })
     
-    # Update user ratings
-    user1.rating = new_rating1
-    user2.rating = new_rating2
+    if not history_rows:
+        return 0
     
-    # Create rating history entries
-    history1 = RatingHistory(
-        user_id=user1.id,
-        contest_id=contest.id,
-        rating_before=rating1_before,
-        rating_after=new_rating1,
-        rating_change=rating_change1
-    )
-    history2 = RatingHistory(
-        user_id=user2.id,
-        contest_id=contest.id,
-        rating_before=rating2_before,
-        rating_after=new_rating2,
-        rating_change=rating_change2
-    )
+    # Bulk write final ratings and history entries
+    try:
+        db.execute(update(User), [{"id": user_id, "rating": ratings[user_id]} for user_id in rated_users])
+        db.execute(insert(RatingHistory), history_rows)
+        save_user_stats(stats_by_user, existing_stats.keys(), db)
+        save_head_to_head(head_to_head, existing_head_to_head.keys(), db)
+        db.commit()
+        new_ratings = {user_id: ratings[user_id] for user_id in rated_users}
+        rank_index.update_ratings(new_ratings)
+        handle_index.update_ratings(new_ratings)
+    except IntegrityError:
+        # Another worker rated one of these contests first (unique contest_id/user_id);
+        # nothing from this batch was written, so retry contest by contest
+        db.rollback()
+        if len(contests) == 1:
+            print(f"Error applying ratings: contest {next(iter(contests))} already has rating history, skipped")
+            return 0
+        return sum(apply_ratings_batch([contest_id], db) for contest_id in contests)
     
-    db.add(history1)
-    db.add(history2)
-    db.commit()
+    return rated_contests
+
+
+def update_ratings_after_contest(contest_id, db: Session):
+    """Update user ratings after a contest is completed"""
+    apply_ratings_batch([contest_id], db)
 
 
 async def check_contest_submissions(contest_id):
@@ -199,23 +317,18 @@ async def check_contest_submissions(contest_id):
             # Check start time for submissions
             start_timestamp = int(contest.start_time.timestamp())
             
+            # One submissions fetch per user (both simultaneously), indexed by
+            # problem code and shared by every problem of the contest
+            accepted1, accepted2 = await asyncio.gather(
+                cf_api.get_accepted_since(user1.handle, start_timestamp),
+                cf_api.get_accepted_since(user2.handle, start_timestamp)
+            )
+            
             # Check submissions for each problem
             for problem in problems:
                 if not problem.solved_by:
-                    # Check both users simultaneously
-                    submission1_task = cf_api.check_submission(
-                        user1.handle,
-                        problem.problem_code,
-                        start_timestamp
-                    )
-                    submission2_task = cf_api.check_submission(
-                        user2.handle,
-                        problem.problem_code,
-                        start_timestamp
-                    )
-                    
-                    # Wait for both checks to complete
-                    submission1, submission2 = await asyncio.gather(submission1_task, submission2_task)
+                    submission1 = accepted1.get(problem.problem_code)
+                    submission2 = accepted2.get(problem.problem_code)
                     
                     # Determine who solved first based on timestamps
                     if submission1 and submission2:
@@ -224,26 +337,18 @@ async def check_contest_submissions(contest_id):
                         time2 = submission2.get("creationTimeSeconds", 0)
                         if time1 <= time2:
                             # User1 solved first (or at same time, tie goes to user1)
-                            problem.solved_by = user1.id
-                            problem.solved_at = datetime.fromtimestamp(time1)
+                            record_problem_solve(problem, user1.id, datetime.fromtimestamp(time1), db)
                         else:
                             # User2 solved first
-                            problem.solved_by = user2.id
-                            problem.solved_at = datetime.fromtimestamp(time2)
-                        db.commit()
-                        recalculate_contest_scores(contest.id, db)
+                            record_problem_solve(problem, user2.id, datetime.fromtimestamp(time2), db)
                     elif submission1:
                         # Only user1 solved
-                        problem.solved_by = user1.id
-                        problem.solved_at = datetime.fromtimestamp(submission1.get("creationTimeSeconds", datetime.utcnow().timestamp()))
-                        db.commit()
-                        recalculate_contest_scores(contest.id, db)
+                        solved_at = datetime.fromtimestamp(submission1.get("creationTimeSeconds", datetime.utcnow().timestamp()))
+                        record_problem_solve(problem, user1.id, solved_at, db)
                     elif submission2:
                         # Only user2 solved
-                        problem.solved_by = user2.id
-                        problem.solved_at = datetime.fromtimestamp(submission2.get("creationTimeSeconds", datetime.utcnow().timestamp()))
-                        db.commit()
-                        recalculate_contest_scores(contest.id, db)
+                        solved_at = datetime.fromtimestamp(submission2.get("creationTimeSeconds", datetime.utcnow().timestamp()))
+                        record_problem_solve(problem, user2.id, solved_at, db)
             
             # Re-check if all problems are solved after checking submissions
             remaining_problems = db.query(ContestProblem).filter(
@@ -257,21 +362,10 @@ async def check_contest_submissions(contest_id):
         
         # Check if contest should be completed (all problems solved OR time ended)
         if all_problems_solved or time_ended:
-            # Refresh contest to get latest status
-            db.refresh(contest)
-            if contest.status == ContestStatus.ACTIVE:
-                contest.status = ContestStatus.COMPLETED
-                db.commit()
-                # Update ratings after contest completion
-                update_ratings_after_contest(contest.id, db)
-                # Handle tournament match completion if this is a tournament match
-                if contest.tournament_match_id:
-                    await handle_tournament_match_completion(contest.tournament_match_id, db)
-                # Remove from scheduler
-                try:
-                    scheduler.remove_job(f"check_contest_{contest.id}")
-                except Exception:
-                    pass  # Job might not exist, ignore error
+            completed = [(contest.id, contest.tournament_match_id)]
+            # Only the worker that performs the ACTIVE -> COMPLETED transition runs the completion stage
+            if complete_contest(contest.id, db):
+                await process_completed_contests(completed, db)
     
     except Exception as e:
         print(f"Error checking submissions for contest {contest_id}: {e}")
@@ -279,75 +373,13 @@ async def check_contest_submissions(contest_id):
         db.close()
 
 
-def generate_bracket_matches_for_round(tournament: Tournament, round_number: int, db: Session) -> List[TournamentMatch]:
-    """Generate matches for a round (helper function)"""
-    if round_number == 1:
-        # Round 1: Pair slots 1-2, 3-4, 5-6, etc.
-        from .models import TournamentSlot
-        slots = db.query(TournamentSlot).filter(
-            TournamentSlot.tournament_id == tournament.id
-        ).order_by(TournamentSlot.slot_number).all()
-        
-        matches = []
-        for i in range(0, len(slots), 2):
-            if i + 1 < len(slots):
-                slot1 = slots[i]
-                slot2 = slots[i + 1]
-                if slot1.user_id and slot2.user_id:
-                    match = TournamentMatch(
-                        tournament_id=tournament.id,
-                        round_number=round_number,
-                        slot1_id=slot1.id,
-                        slot2_id=slot2.id,
-                        user1_id=slot1.user_id,
-                        user2_id=slot2.user_id,
-                        status=TournamentMatchStatus.SCHEDULED
-                    )
-                    matches.append(match)
-        return matches
-    else:
-        # Subsequent rounds: Pair winners from previous round
-        previous_matches = db.query(TournamentMatch).filter(
-            TournamentMatch.tournament_id == tournament.id,
-            TournamentMatch.round_number == round_number - 1,
-            TournamentMatch.winner_id.isnot(None)
-        ).order_by(TournamentMatch.id).all()
-        
-        matches = []
-        for i in range(0, len(previous_matches), 2):
-            if i + 1 < len(previous_matches):
-                match1 = previous_matches[i]
-                match2 = previous_matches[i + 1]
-                
-                # Get slots for winners
-                from .models import TournamentSlot
-                winner1_slot = db.query(TournamentSlot).filter(
-                    TournamentSlot.tournament_id == tournament.id,
-                    TournamentSlot.user_id == match1.winner_id
-                ).first()
-                winner2_slot = db.query(TournamentSlot).filter(
-                    TournamentSlot.tournament_id == tournament.id,
-                    TournamentSlot.user_id == match2.winner_id
-                ).first()
-                
-                if winner1_slot and winner2_slot:
-                    match = TournamentMatch(
-                        tournament_id=tournament.id,
-                        round_number=round_number,
-                        slot1_id=winner1_slot.id,
-                        slot2_id=winner2_slot.id,
-                        user1_id=match1.winner_id,
-                        user2_id=match2.winner_id,
-                        status=TournamentMatchStatus.SCHEDULED
-                    )
-                    matches.append(match)
-        return matches
-
-
 async def handle_tournament_match_completion(tournament_match_id, db: Session):
     """Handle tournament match completion: determine winner and advance to next round"""
     try:
-        match = db.query(TournamentMatch).filter(TournamentMatch.id == tournament_match_id).first()
+        # Lock the match so concurrent workers cannot both decide its winner
+        match = db.query(TournamentMatch).filter(
+            TournamentMatch.id == tournament_match_id
+        ).with_for_update().first()
         if not match or match.status == TournamentMatchStatus.COMPLETED:
             return
         
@@ -368,17 +400,23 @@ async def handle_tournament_match_completion(tournament_match_id, db: Session):
         if not score1 or not score2:
             return
         
-        # Determine winner (higher points wins, tie goes to user1)
-        if score1.total_points >= score2.total_points:
+        # Determine winner (higher points wins; a tie goes to user1, or is a draw in Swiss)
+        if score1.total_points == score2.total_points and match.tournament.format == TournamentFormat.SWISS:
+            match.winner_id = None
+        elif score1.total_points >= score2.total_points:
             match.winner_id = match.user1_id
         else:
             match.winner_id = match.user2_id
         
         match.status = TournamentMatchStatus.COMPLETED
         db.commit()
+        bracket_cache.bump(match.tournament_id)
         
         # Check if all matches in this round are complete
-        tournament = db.query(Tournament).filter(Tournament.id == match.tournament_id).first()
+        # (tournament row is locked so only one worker advances the round)
+        tournament = db.query(Tournament).filter(
+            Tournament.id == match.tournament_id
+        ).with_for_update().first()
         if not tournament:
             return
         
@@ -391,14 +429,20 @@ async def handle_tournament_match_completion(tournament_match_id, db: Session):
         
         if all_complete:
             # Check if this is the final round
-            num_rounds = int(math.log2(tournament.num_participants))
-            if match.round_number == num_rounds:
+            if match.round_number == total_rounds(tournament):
                 # Tournament is complete
                 tournament.status = TournamentStatus.COMPLETED
                 db.commit()
             else:
-                # Generate next round matches
+                # Generate next round matches (unless another worker already did)
                 next_round = match.round_number + 1
+                next_round_exists = db.query(TournamentMatch.id).filter(
+                    TournamentMatch.tournament_id == tournament.id,
+                    TournamentMatch.round_number == next_round
+                ).first() is not None
+                if next_round_exists:
+                    return
+                
                 round_schedule = db.query(TournamentRoundSchedule).filter(
                     TournamentRoundSchedule.tournament_id == tournament.id,
                     TournamentRoundSchedule.round_number == next_round
@@ -408,34 +452,29 @@ async def handle_tournament_match_completion(tournament_match_id, db: Session):
                     print(f"Warning: Round schedule not found for round {next_round}")
                     return
                 
-                next_round_matches = generate_bracket_matches_for_round(tournament, next_round, db)
+                # Elimination: winners advance to their parent positions. Swiss:
+                # everyone is re-paired by score from the whole match history.
+                # Either way the whole round is created in bulk
+                if tournament.format == TournamentFormat.SWISS:
+                    slots = db.query(TournamentSlot).filter(TournamentSlot.tournament_id == tournament.id).all()
+                    all_matches = db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament.id).all()
+                    pairings = swiss_pairings(slots, all_matches)
+                else:
+                    pairings = next_round_pairings(round_matches)
                 
-                # Create Contests for next round matches
-                for next_match in next_round_matches:
-                    next_contest = Contest(
-                        tournament_match_id=next_match.id,
-                        user1_id=next_match.user1_id,
-                        user2_id=next_match.user2_id,
-                        difficulty=tournament.difficulty,
-                        start_time=round_schedule.start_time,
-                        end_time=round_schedule.start_time + timedelta(hours=2),
-                        status=ContestStatus.SCHEDULED
-                    )
-                    db.add(next_contest)
-                    db.flush()
-                    
-                    next_match.contest_id = next_contest.id
-                    next_match.start_time = round_schedule.start_time
-                    next_match.end_time = round_schedule.start_time + timedelta(hours=2)
-                    db.add(next_match)
-                    
-                    # Create initial scores
-                    score1 = ContestScore(contest_id=next_contest.id, user_id=next_match.user1_id, total_points=0)
-                    score2 = ContestScore(contest_id=next_contest.id, user_id=next_match.user2_id, total_points=0)
-                    db.add(score1)
-                    db.add(score2)
+                # Tournament bookings are exempt from the exclusion constraint, so the
+                # round goes ahead even if a player was booked elsewhere in the meantime
+                window = (round_schedule.start_time, round_schedule.start_time + MATCH_DURATION)
+                players = [user_id for pairing in pairings for user_id in (pairing[2], pairing[4])]
+                for conflict in find_conflicts(players, [window], db, include_tournament=False):
+                    print(f"[WARNING] Round {next_round} of tournament {tournament.id} overlaps contest "
+                          f"{conflict.contest_id} of user {conflict.user_id}")
                 
+                next_round_matches = create_round(
+                    tournament, next_round, pairings, round_schedule.start_time, db
+                )
                 db.commit()
+                bracket_cache.bump(tournament.id)
                 print(f"Generated {len(next_round_matches)} matches for round {next_round}")
     
     except Exception as e:
@@ -443,52 +482,167 @@ async def handle_tournament_match_completion(tournament_match_id, db: Session):
         db.rollback()
 
 
+def complete_contest(contest_id, db: Session) -> bool:
+    """
+    Atomically move a single contest from ACTIVE to COMPLETED.
+    
+    Uses a conditional UPDATE ... WHERE status = ACTIVE, so when several workers
+    race to complete the same contest exactly one of them gets True and runs
+    the completion stage.
+    """
+    completed = db.execute(
+        update(Contest)
+        .where(Contest.id == contest_id, Contest.status == ContestStatus.ACTIVE)
+        .values(status=ContestStatus.COMPLETED)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if completed:
+        release_busy_intervals([contest_id], db)
+    db.commit()
+    if completed:
+        publish_status([contest_id], ContestStatus.COMPLETED)
+    return bool(completed)
+
+
+def complete_finished_contests(db: Session, now: datetime = None) -> List[tuple]:
+    """
+    Complete every finished contest in a single statement.
+    
+    A contest is finished when it is ACTIVE and either its end time has passed
+    or it has problems and none of them is still unsolved. All such contests are
+    flipped to COMPLETED with one UPDATE ... RETURNING; the returned
+    (contest_id, tournament_match_id) rows are handed to process_completed_contests.
+    """
+    if now is None:
+        now = datetime.utcnow()
+    
+    has_problems = exists().where(ContestProblem.contest_id == Contest.id)
+    has_unsolved = exists().where(
+        ContestProblem.contest_id == Contest.id,
+        ContestProblem.solved_by.is_(None)
+    )
+    
+    completed = db.execute(
+        update(Contest)
+        .where(
+            Contest.status == ContestStatus.ACTIVE,
+            or_(Contest.end_time <= now, and_(has_problems, ~has_unsolved))
+        )
+        .values(status=ContestStatus.COMPLETED)
+        .returning(Contest.id, Contest.tournament_match_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    release_busy_intervals([row[0] for row in completed], db)
+    db.commit()
+    publish_status([row[0] for row in completed], ContestStatus.COMPLETED)
+    
+    return [(row[0], row[1]) for row in completed]
+
+
+async def process_completed_contests(completed: List[tuple], db: Session):
+    """Run the post-completion stage (ratings, tournament advancement) for completed contests"""
+    apply_ratings_batch([contest_id for contest_id, _ in completed], db)
+    
+    # Public feeds (latest/top contests, leaderboard) changed; rebuild on next request
+    feed_cache.invalidate()
+    
+    for contest_id, tournament_match_id in completed:
+        if tournament_match_id:
+            await handle_tournament_match_completion(tournament_match_id, db)
+    
+    # Remove per-contest jobs from scheduler
+    for contest_id, _ in completed:
+        try:
+            scheduler.remove_job(f"check_contest_{contest_id}")
+        except Exception:
+            pass  # Job might not exist, ignore error
+
+
 async def check_all_active_contests():
     """Check all active contests"""
     db = SessionLocal()
     try:
-        active_contests = db.query(Contest).filter(
-            Contest.status == ContestStatus.ACTIVE
-        ).all()
+        # Complete contests whose time ended or whose problems are all solved
+        completed = complete_finished_contests(db)
+        if completed:
+            await process_completed_contests(completed, db)
         
-        for contest in active_contests:
-            # Check if contest should be completed due to time or all problems solved
-            now = datetime.utcnow()
-            time_ended = now >= contest.end_time
-            
-            # Check if all problems are solved
-            all_problems = db.query(ContestProblem).filter(
-                ContestProblem.contest_id == contest.id
-            ).count()
-            solved_problems = db.query(ContestProblem).filter(
-                ContestProblem.contest_id == contest.id,
-                ContestProblem.solved_by.isnot(None)
-            ).count()
-            all_problems_solved = all_problems > 0 and solved_problems == all_problems
-            
-            # If time ended or all problems solved, complete the contest immediately
-            if time_ended or all_problems_solved:
-                if contest.status == ContestStatus.ACTIVE:
-                    contest.status = ContestStatus.COMPLETED
-                    db.commit()
-                    # Update ratings after contest completion
-                    update_ratings_after_contest(contest.id, db)
-                    # Handle tournament match completion if this is a tournament match
-                    if contest.tournament_match_id:
-                        await handle_tournament_match_completion(contest.tournament_match_id, db)
-                    # Remove from scheduler
-                    try:
-                        scheduler.remove_job(f"check_contest_{contest.id}")
-                    except Exception:
-                        pass  # Job might not exist, ignore error
-                    continue  # Skip submission checking for completed contest
-            
-            # Otherwise, check submissions normally
-            await check_contest_submissions(str(contest.id))
+        # Check submissions for contests that are still running
+        active_contest_ids = [
+            row[0] for row in db.query(Contest.id).filter(
+                Contest.status == ContestStatus.ACTIVE
+            ).all()
+        ]
+        for contest_id in active_contest_ids:
+            await check_contest_submissions(str(contest_id))
     finally:
         db.close()
 
 
+async def select_round_problems(tournament_id, round_number: int, db: Session) -> List:
+    """
+    Give every contest of a shared-problem tournament round the round's set:
+    six problems none of the round's players has solved, selected once and
+    stored in tournament_round_problems. Contests that already have problems
+    are left alone. Returns the ids of the contests served (no commit).
+    """
+    round_problems = db.query(TournamentRoundProblem).filter(
+        TournamentRoundProblem.tournament_id == tournament_id,
+        TournamentRoundProblem.round_number == round_number
+    ).order_by(TournamentRoundProblem.problem_index).all()
+    
+    if not round_problems:
+        tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+        pairs = db.query(TournamentMatch.user1_id, TournamentMatch.user2_id).filter(
+            TournamentMatch.tournament_id == tournament_id,
+            TournamentMatch.round_number == round_number
+        ).all()
+        user_ids = {user_id for pair in pairs for user_id in pair}
+        handles = [row[0] for row in db.query(User.handle).filter(User.id.in_(user_ids)).all()]
+        
+        problems = await get_problems_unsolved_by(handles, tournament.difficulty)
+        round_problems = [
+            TournamentRoundProblem(
+                id=uuid4(),
+                tournament_id=tournament_id,
+                round_number=round_number,
+                problem_index=prob_data["problem_index"],
+                problem_code=prob_data["problem_code"],
+                problem_url=prob_data["problem_url"],
+                points=prob_data["points"],
+                division=prob_data["division"]
+            ) for prob_data in problems
+        ]
+        db.add_all(round_problems)
+        db.flush()
+    
+    contest_ids = [
+        row[0] for row in db.query(Contest.id).join(
+            TournamentMatch, Contest.tournament_match_id == TournamentMatch.id
+        ).filter(
+            TournamentMatch.tournament_id == tournament_id,
+            TournamentMatch.round_number == round_number,
+            ~exists().where(ContestProblem.contest_id == Contest.id)
+        ).all()
+    ]
+    rows = [
+        {
+            "contest_id": contest_id,
+            "round_problem_id": problem.id,
+            "problem_index": problem.problem_index,
+            "problem_code": problem.problem_code,
+            "problem_url": problem.problem_url,
+            "points": problem.points,
+            "division": problem.division,
+        }
+        for contest_id in contest_ids
+        for problem in round_problems
+    ]
+    if rows:
+        db.execute(insert(ContestProblem), rows)
+    return contest_ids
+
+
 async def select_contest_problems():
     """Select problems for contests that are less than 1 minute away from start time"""
     db = SessionLocal()
@@ -501,7 +655,11 @@ async def select_contest_problems():
             Contest.start_time > now  # Still haven't started
         ).all()
         
+        served = set()
         for contest in contests_needing_problems:
+            if contest.id in served:
+                continue
+            
             # Check if problems already exist
             existing_problems = db.query(ContestProblem).filter(
                 ContestProblem.contest_id == contest.id
@@ -511,6 +669,27 @@ async def select_contest_problems():
                 # Problems already selected, skip
                 continue
             
+            # Rounds of shared-problem tournaments get one set for all of their contests
+            shared_round = None
+            if contest.tournament_match_id is not None:
+                shared_round = db.query(TournamentMatch.tournament_id, TournamentMatch.round_number).join(
+                    Tournament, Tournament.id == TournamentMatch.tournament_id
+                ).filter(
+                    TournamentMatch.id == contest.tournament_match_id,
+                    Tournament.shared_problems.is_(True)
+                ).first()
+            if shared_round:
+                try:
+                    contest_ids = await select_round_problems(shared_round.tournament_id, shared_round.round_number, db)
+                    db.commit()
+                    served.update(contest_ids)
+                    publish_problems(contest_ids, db)
+                    print(f"Successfully selected round {shared_round.round_number} problems for {len(contest_ids)} contests")
+                except Exception as e:
+                    db.rollback()
+                    print(f"Error selecting round problems for contest {contest.id}: {e}")
+                continue
+            
             # Get user handles for problem selection
             user1 = db.query(User).filter(User.id == contest.user1_id).first()
             user2 = db.query(User).filter(User.id == contest.user2_id).first()
@@ -558,6 +737,7 @@ async def select_contest_problems():
                     db.add(score2)
                 
                 db.commit()
+                publish_problems([contest.id], db)
                 print(f"Successfully selected {len(problems)} problems for contest {contest.id}")
             except Exception as e:
                 db.rollback()
@@ -611,6 +791,26 @@ def start_scheduler():
         except Exception as e:
             print(f"Warning: Failed to add select_contest_problems job: {e}")
         
+        # Poll room contests (one fetch per participant per tick) and select their problems
+        try:
+            from .rooms import check_active_rooms, select_upcoming_room_problems
+            scheduler.add_job(
+                check_active_rooms,
+                'interval',
+                seconds=10,
+                id='check_active_rooms',
+                replace_existing=True
+            )
+            scheduler.add_job(
+                select_upcoming_room_problems,
+                'interval',
+                seconds=10,
+                id='select_room_problems',
+                replace_existing=True
+            )
+        except Exception as e:
+            print(f"Warning: Failed to add room jobs: {e}")
+        
         # Check pending user confirmations every 30 seconds
         try:
             from .confirmation_checker import check_pending_confirmations
@@ -644,6 +844,12 @@ async def activate_scheduled_contests():
         for contest in scheduled_contests:
             contest.status = ContestStatus.ACTIVE
             db.commit()
+            publish_status([contest.id], ContestStatus.ACTIVE)
+            notification_hub.notify([contest.user1_id, contest.user2_id], "contest_starting", {
+                "contest_id": contest.id,
+                "start_time": contest.start_time,
+                "end_time": contest.end_time
+            })
             
             # Schedule individual check for this contest
             scheduler.add_job(
@@ -0,0 +1,163 @@
+"""
+Swiss-system pairing engine.
+
+Every player plays every round. A win is worth one point and a draw (equal
+contest scores) half a point; scores are kept in half-points internally so
+they stay integers. Before each round players are ranked by score, then by
+seed (slot number), and paired top-down: each player meets the highest-ranked
+player below them they have not played yet, so opponents come from the same
+score group wherever possible and from the neighbouring group only when the
+group has no legal pairing left.
+
+When a player is left without a legal opponent the most recent pair is
+undone and its lower player replaced by the next candidate (depth-first
+backtracking). The greedy pass almost never backtracks, so a 1024-player
+round pairs in a few milliseconds; a step budget bounds pathological cases,
+after which rematches are allowed rather than failing the round.
+
+Rounds are written with bracket.create_round, using the board number as the
+bracket position.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .bracket import Pairing
+from .models import TournamentMatch, TournamentMatchStatus, TournamentSlot
+
+MIN_PARTICIPANTS = 4
+MAX_PARTICIPANTS = 1024
+MAX_BACKTRACK_STEPS = 100000
+
+# Half-points
+WIN_POINTS = 2
+DRAW_POINTS = 1
+
+
+def default_rounds(num_participants: int) -> int:
+    """Rounds needed to leave a single player with a perfect score"""
+    return math.ceil(math.log2(num_participants))
+
+
+def max_rounds(num_participants: int) -> int:
+    """A rematch-free schedule cannot have more rounds than a round robin"""
+    return num_participants - 1
+
+
+def tally(matches: Sequence[TournamentMatch]) -> Tuple[Dict, Dict[object, Set]]:
+    """Half-point scores of completed matches and everyone's past opponents, by user id"""
+    scores: Dict = {}
+    opponents: Dict[object, Set] = {}
+    for match in matches:
+        opponents.setdefault(match.user1_id, set()).add(match.user2_id)
+        opponents.setdefault(match.user2_id, set()).add(match.user1_id)
+        if match.status != TournamentMatchStatus.COMPLETED:
+            continue
+        if match.winner_id is None:
+            scores[match.user1_id] = scores.get(match.user1_id, 0) + DRAW_POINTS
+            scores[match.user2_id] = scores.get(match.user2_id, 0) + DRAW_POINTS
+        else:
+            scores[match.winner_id] = scores.get(match.winner_id, 0) + WIN_POINTS
+    return scores, opponents
+
+
+def pair_players(
+    ranked: Sequence,
+    opponents: Dict[object, Set],
+    max_steps: int = MAX_BACKTRACK_STEPS
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Pair an even number of ranked players (best first) without rematches.
+
+    Returns (higher, lower) index pairs into ranked in board order, or None
+    if no rematch-free pairing was found within max_steps backtracks.
+    """
+    n = len(ranked)
+    paired = [False] * n
+    pairs: List[Tuple[int, int]] = []
+    steps = 0
+    i, candidate = 0, 1
+    while i < n:
+        if paired[i]:
+            i += 1
+            candidate = i + 1
+            continue
+
+        played = opponents.get(ranked[i], ())
+        j = candidate
+        while j < n and (paired[j] or ranked[j] in played):
+            j += 1
+        if j < n:
+            paired[i] = paired[j] = True
+            pairs.append((i, j))
+            i += 1
+            candidate = i + 1
+            continue
+
+        # No legal opponent left for ranked[i]: retry the last pair with its next candidate
+        if not pairs or steps >= max_steps:
+            return None
+        steps += 1
+        i, last = pairs.pop()
+        paired[i] = paired[last] = False
+        candidate = last + 1
+    return pairs
+
+
+def swiss_pairings(slots: Sequence[TournamentSlot], matches: Sequence[TournamentMatch]) -> List[Pairing]:
+    """Pairings for the next round given every match played so far (none for round 1)"""
+    scores, opponents = tally(matches)
+    seated = sorted(
+        (slot for slot in slots if slot.user_id is not None),
+        key=lambda slot: (-scores.get(slot.user_id, 0), slot.slot_number)
+    )
+    ranked = [slot.user_id for slot in seated]
+
+    pairs = pair_players(ranked, opponents)
+    if pairs is None:
+        print(f"[WARNING] No rematch-free Swiss pairing for {len(ranked)} players; allowing rematches")
+        pairs = pair_players(ranked, {})
+
+    return [
+        (board, seated[i].id, seated[i].user_id, seated[j].id, seated[j].user_id)
+        for board, (i, j) in enumerate(pairs)
+    ]
+
+
+def standings(slots: Sequence[TournamentSlot], matches: Sequence[TournamentMatch]) -> List[Dict]:
+    """
+    Players ranked by points, then Buchholz (sum of opponents' points), then
+    seed. Points are returned as floats (1 per win, 0.5 per draw).
+    """
+    scores, opponents = tally(matches)
+    records: Dict = {}
+    for match in matches:
+        if match.status != TournamentMatchStatus.COMPLETED:
+            continue
+        for user_id in (match.user1_id, match.user2_id):
+            record = records.setdefault(user_id, [0, 0, 0])
+            if match.winner_id is None:
+                record[1] += 1
+            elif match.winner_id == user_id:
+                record[0] += 1
+            else:
+                record[2] += 1
+
+    rows = []
+    for slot in slots:
+        if slot.user_id is None:
+            continue
+        buchholz = sum(scores.get(opponent, 0) for opponent in opponents.get(slot.user_id, ()))
+        wins, draws, losses = records.get(slot.user_id, (0, 0, 0))
+        rows.append({
+            "slot_number": slot.slot_number,
+            "user_id": slot.user_id,
+            "points": scores.get(slot.user_id, 0) / 2,
+            "buchholz": buchholz / 2,
+            "wins": wins,
+            "draws": draws,
+            "losses": losses,
+        })
+    rows.sort(key=lambda row: (-row["points"], -row["buchholz"], row["slot_number"]))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
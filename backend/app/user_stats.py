@@ -0,0 +1,258 @@
+"""
+Materialized per-user contest statistics (user_stats) and head-to-head
+records between pairs of users (head_to_head).
+
+Rows are updated incrementally by apply_ratings_batch as contests are rated;
+backfill_user_stats and backfill_head_to_head rebuild the tables from
+completed contest history.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import and_, delete, func, insert, or_, update
+from sqlalchemy.orm import Session, aliased
+
+from .models import Contest, ContestScore, ContestStatus, HeadToHead, RatingHistory, User, UserStats
+
+STAT_FIELDS = (
+    "total_contests", "wins", "losses", "draws",
+    "best_rating", "current_win_streak", "longest_win_streak"
+)
+HEAD_TO_HEAD_FIELDS = ("user_a_wins", "user_b_wins", "draws", "last_played_at")
+
+
+def empty_stats() -> Dict:
+    return {
+        "total_contests": 0,
+        "wins": 0,
+        "losses": 0,
+        "draws": 0,
+        "best_rating": None,
+        "current_win_streak": 0,
+        "longest_win_streak": 0,
+    }
+
+
+def add_contest_result(stats: Dict, points: int, opponent_points: int, rating_before=None, rating_after=None) -> None:
+    """Fold one contest result (and optionally its rating change) into a stats dict"""
+    stats["total_contests"] += 1
+    if points > opponent_points:
+        stats["wins"] += 1
+        stats["current_win_streak"] += 1
+        stats["longest_win_streak"] = max(stats["longest_win_streak"], stats["current_win_streak"])
+    elif opponent_points > points:
+        stats["losses"] += 1
+        stats["current_win_streak"] = 0
+    else:
+        stats["draws"] += 1
+        stats["current_win_streak"] = 0
+
+    for rating in (rating_before, rating_after):
+        if rating is not None and (stats["best_rating"] is None or rating > stats["best_rating"]):
+            stats["best_rating"] = rating
+
+
+def load_user_stats(user_ids, db: Session) -> Dict:
+    """Load stats dicts for the given users; users without a row are missing from the result"""
+    if not user_ids:
+        return {}
+    rows = db.query(UserStats).filter(UserStats.user_id.in_(list(user_ids))).all()
+    return {
+        row.user_id: {field: getattr(row, field) for field in STAT_FIELDS}
+        for row in rows
+    }
+
+
+def save_user_stats(stats_by_user: Dict, existing_ids, db: Session) -> None:
+    """Bulk write stats dicts: UPDATE rows in existing_ids, INSERT the rest (no commit)"""
+    now = datetime.utcnow()
+    updates = []
+    inserts = []
+    for user_id, stats in stats_by_user.items():
+        row = {"user_id": user_id, "updated_at": now, **stats}
+        if user_id in existing_ids:
+            updates.append(row)
+        else:
+            inserts.append(row)
+
+    if updates:
+        db.execute(update(UserStats), updates)
+    if inserts:
+        db.execute(insert(UserStats), inserts)
+
+
+def _completed_results(db: Session, batch_size: int):
+    """Stream (user1_id, user2_id, points1, points2, end_time) for completed contests, oldest first"""
+    score1 = aliased(ContestScore)
+    score2 = aliased(ContestScore)
+    rows = db.query(
+        Contest.user1_id, Contest.user2_id, score1.total_points, score2.total_points, Contest.end_time
+    ).join(
+        score1, (score1.contest_id == Contest.id) & (score1.user_id == Contest.user1_id)
+    ).join(
+        score2, (score2.contest_id == Contest.id) & (score2.user_id == Contest.user2_id)
+    ).filter(
+        Contest.status == ContestStatus.COMPLETED
+    ).order_by(Contest.end_time, Contest.id).yield_per(batch_size)
+
+    for user1_id, user2_id, points1, points2, end_time in rows:
+        yield user1_id, user2_id, points1 or 0, points2 or 0, end_time
+
+
+def _replace_table(model, rows, db: Session, batch_size: int) -> None:
+    """Delete every row of model and insert rows in batches, in one transaction"""
+    try:
+        db.execute(delete(model).execution_options(synchronize_session=False))
+        for start in range(0, len(rows), batch_size):
+            db.execute(insert(model), rows[start:start + batch_size])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def backfill_user_stats(db: Session, batch_size: int = 10000) -> int:
+    """
+    Rebuild user_stats from all completed contests (oldest first) and
+    rating_history. Replaces the table contents in one transaction and returns
+    the number of users written.
+    """
+    stats_by_user = {}
+    for user1_id, user2_id, points1, points2, _ in _completed_results(db, batch_size):
+        add_contest_result(stats_by_user.setdefault(user1_id, empty_stats()), points1, points2)
+        add_contest_result(stats_by_user.setdefault(user2_id, empty_stats()), points2, points1)
+
+    best_ratings = db.query(
+        RatingHistory.user_id,
+        func.max(RatingHistory.rating_before),
+        func.max(RatingHistory.rating_after)
+    ).group_by(RatingHistory.user_id).all()
+    for user_id, best_before, best_after in best_ratings:
+        if user_id in stats_by_user:
+            stats_by_user[user_id]["best_rating"] = max(best_before, best_after)
+
+    # Skip rows for users that no longer exist
+    existing_users = {row[0] for row in db.query(User.id).all()}
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "updated_at": now, **stats}
+        for user_id, stats in stats_by_user.items()
+        if user_id in existing_users
+    ]
+    _replace_table(UserStats, rows, db, batch_size)
+    return len(rows)
+
+
+def ordered_pair(user1_id, user2_id):
+    """The head_to_head key for two users: ids ordered by their string form"""
+    if str(user1_id) < str(user2_id):
+        return user1_id, user2_id
+    return user2_id, user1_id
+
+
+def empty_head_to_head() -> Dict:
+    return {"user_a_wins": 0, "user_b_wins": 0, "draws": 0, "last_played_at": None}
+
+
+def add_head_to_head_result(record: Dict, user1_id, user2_id, points1: int, points2: int, played_at=None) -> None:
+    """Fold one contest between user1 and user2 into their head_to_head record"""
+    if points1 == points2:
+        record["draws"] += 1
+    else:
+        winner_id = user1_id if points1 > points2 else user2_id
+        if winner_id == ordered_pair(user1_id, user2_id)[0]:
+            record["user_a_wins"] += 1
+        else:
+            record["user_b_wins"] += 1
+
+    if played_at is not None and (record["last_played_at"] is None or played_at > record["last_played_at"]):
+        record["last_played_at"] = played_at
+
+
+def load_head_to_head(pairs, db: Session) -> Dict:
+    """Load head_to_head records keyed by ordered pair; pairs without a row are missing"""
+    if not pairs:
+        return {}
+    user_ids = {user_id for pair in pairs for user_id in pair}
+    rows = db.query(HeadToHead).filter(
+        HeadToHead.user_a_id.in_(list(user_ids)),
+        HeadToHead.user_b_id.in_(list(user_ids))
+    ).all()
+    return {
+        (row.user_a_id, row.user_b_id): {field: getattr(row, field) for field in HEAD_TO_HEAD_FIELDS}
+        for row in rows
+        if (row.user_a_id, row.user_b_id) in pairs
+    }
+
+
+def save_head_to_head(records: Dict, existing_pairs, db: Session) -> None:
+    """Bulk write head_to_head records: UPDATE pairs in existing_pairs, INSERT the rest (no commit)"""
+    updates = []
+    inserts = []
+    for (user_a_id, user_b_id), record in records.items():
+        row = {"user_a_id": user_a_id, "user_b_id": user_b_id, **record}
+        if (user_a_id, user_b_id) in existing_pairs:
+            updates.append(row)
+        else:
+            inserts.append(row)
+
+    if updates:
+        db.execute(update(HeadToHead), updates)
+    if inserts:
+        db.execute(insert(HeadToHead), inserts)
+
+
+def get_head_to_head(user_id, opponent_ids, db: Session) -> List[Dict]:
+    """
+    Records of user_id against each opponent (in the given order), seen from
+    user_id's side, read with one query. Opponents never played get zeros.
+    """
+    opponent_ids = list(opponent_ids)
+    if not opponent_ids:
+        return []
+    rows = db.query(HeadToHead).filter(or_(
+        and_(HeadToHead.user_a_id == user_id, HeadToHead.user_b_id.in_(opponent_ids)),
+        and_(HeadToHead.user_b_id == user_id, HeadToHead.user_a_id.in_(opponent_ids))
+    )).all()
+
+    by_opponent = {}
+    for row in rows:
+        if row.user_a_id == user_id:
+            by_opponent[row.user_b_id] = (row.user_a_wins, row.user_b_wins, row)
+        else:
+            by_opponent[row.user_a_id] = (row.user_b_wins, row.user_a_wins, row)
+
+    result = []
+    for opponent_id in opponent_ids:
+        wins, losses, row = by_opponent.get(opponent_id, (0, 0, None))
+        draws = row.draws if row else 0
+        result.append({
+            "opponent_id": opponent_id,
+            "wins": wins,
+            "losses": losses,
+            "draws": draws,
+            "total_contests": wins + losses + draws,
+            "last_played_at": row.last_played_at if row else None,
+        })
+    return result
+
+
+def backfill_head_to_head(db: Session, batch_size: int = 10000) -> int:
+    """
+    Rebuild head_to_head from all completed contests. Replaces the table
+    contents in one transaction and returns the number of pairs written.
+    """
+    records = {}
+    for user1_id, user2_id, points1, points2, end_time in _completed_results(db, batch_size):
+        pair = ordered_pair(user1_id, user2_id)
+        record = records.setdefault(pair, empty_head_to_head())
+        add_head_to_head_result(record, user1_id, user2_id, points1, points2, end_time)
+
+    existing_users = {row[0] for row in db.query(User.id).all()}
+    rows = [
+        {"user_a_id": user_a_id, "user_b_id": user_b_id, **record}
+        for (user_a_id, user_b_id), record in records.items()
+        if user_a_id in existing_users and user_b_id in existing_users
+    ]
+    _replace_table(HeadToHead, rows, db, batch_size)
+    return len(rows)
@@ -0,0 +1,36 @@
+"""
+Rebuild the user_stats and head_to_head tables from completed contest history.
+
+Both are maintained incrementally when contests are rated; run this once
+after deploying the tables, or to repair them if they ever drift.
+
+Usage:
+    python backfill_user_stats.py
+"""
+import sys
+import os
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.database import SessionLocal
+from app.user_stats import backfill_user_stats, backfill_head_to_head
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Backfilling User Stats")
+    print("=" * 60)
+    db = SessionLocal()
+    try:
+        written = backfill_user_stats(db)
+        print(f"[OK] Wrote stats for {written} user(s)")
+        pairs = backfill_head_to_head(db)
+        print(f"[OK] Wrote head-to-head records for {pairs} pair(s)")
+    except Exception as e:
+        print(f"\n[ERROR] Backfill failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
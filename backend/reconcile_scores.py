@@ -0,0 +1,51 @@
+"""
+Offline reconciliation of contest scores.
+
+Scores are updated incrementally as problems are solved; run this to rebuild
+them from solved problems if they ever drift.
+
+Usage:
+    python reconcile_scores.py              # all contests
+    python reconcile_scores.py <contest_id> # a single contest
+"""
+import sys
+import os
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.database import SessionLocal
+from app.models import Contest
+from app.submission_checker import recalculate_contest_scores
+
+
+def reconcile_scores(contest_ids=None):
+    """Recalculate scores for the given contests (or all contests)"""
+    db = SessionLocal()
+    try:
+        if not contest_ids:
+            contest_ids = [row[0] for row in db.query(Contest.id).all()]
+
+        total_changed = 0
+        for contest_id in contest_ids:
+            changed = recalculate_contest_scores(contest_id, db)
+            if changed:
+                print(f"  [FIXED] {changed} score(s) in contest {contest_id}")
+            total_changed += changed
+
+        print(f"[OK] Checked {len(contest_ids)} contest(s), fixed {total_changed} score(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Reconciling Contest Scores")
+    print("=" * 60)
+    try:
+        reconcile_scores(sys.argv[1:])
+    except Exception as e:
+        print(f"\n[ERROR] Reconciliation failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,59 @@
+"""
+Replay all ratings from completed contest history.
+
+Use this after changing the K-factor or scoring in app/rating.py, or to repair
+rating drift. Every user restarts at the initial rating and completed contests
+are replayed in end_time order; users.rating and rating_history are rewritten.
+
+Usage:
+    python replay_ratings.py --dry-run   # report differences only
+    python replay_ratings.py             # rewrite ratings and history
+    python replay_ratings.py --k-factor 24
+"""
+import argparse
+import sys
+import os
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.database import SessionLocal
+from app.rating import K_FACTOR
+from app.rating_replay import replay_ratings
+
+
+def print_report(report):
+    """Print a replay diff report"""
+    print(f"Replayed {report['contests']} contest(s) for {report['users']} user(s) "
+          f"in {report['replay_seconds']}s")
+    print(f"Users whose rating changes: {report['users_changed']} "
+          f"(largest difference {report['max_abs_change']})")
+    if report["largest_changes"]:
+        print(f"\n{'handle':<24}{'current':>10}{'replayed':>10}{'change':>10}")
+        for row in report["largest_changes"]:
+            print(f"{row['handle']:<24}{row['current']:>10}{row['replayed']:>10}{row['change']:>+10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay all ratings from contest history")
+    parser.add_argument("--dry-run", action="store_true", help="Only report differences, do not write")
+    parser.add_argument("--k-factor", type=int, default=K_FACTOR, help=f"Elo K-factor (default {K_FACTOR})")
+    parser.add_argument("--top", type=int, default=20, help="Number of largest differences to show")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Rating Replay" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+    db = SessionLocal()
+    try:
+        report = replay_ratings(db, dry_run=args.dry_run, k_factor=args.k_factor, top=args.top)
+        print_report(report)
+        if not args.dry_run:
+            print(f"\n[OK] Ratings and rating history rewritten in {report['total_seconds']}s")
+    except Exception as e:
+        print(f"\n[ERROR] Replay failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
@@ -3,7 +3,8 @@ Pytest configuration and fixtures for tournament tests
 """
 import pytest
 import os
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from datetime import datetime, timedelta
@@ -27,7 +28,7 @@ from app.auth import create_access_token, get_password_hash
 # Create test app without migrations and scheduler
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, users, challenges, contests, tournaments
+from app.routers import auth, users, challenges, contests, tournaments, rooms, notifications
 
 test_app = FastAPI(title="CP VS API Test", version="1.0.0")
 test_app.add_middleware(
@@ -43,6 +44,8 @@ test_app.include_router(challenges.router)
 test_app.include_router(contests.router)
 test_app.include_router(contests.public_router)
 test_app.include_router(tournaments.router)
+test_app.include_router(rooms.router)
+test_app.include_router(notifications.router)
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -53,6 +56,14 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test"""
+    from app.feed_cache import feed_cache
+    from app.leaderboard import rank_index
+    from app.handle_search import handle_index
+    from app.bracket_cache import bracket_cache
+    feed_cache.invalidate()
+    rank_index.invalidate()
+    handle_index.invalidate()
+    bracket_cache.invalidate()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -62,6 +73,33 @@ def db():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def captured_sql(db):
+    """
+    Context manager collecting the SQL sent to the test database, optionally
+    only statements starting with one of the given keywords:
+    
+        with captured_sql("SELECT") as selects:
+            client.get(url)
+    """
+    @contextmanager
+    def _captured_sql(*keywords):
+        statements = []
+        
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not keywords or statement.lstrip().split(None, 1)[0].upper() in keywords:
+                statements.append(statement)
+        
+        bind = db.get_bind()
+        event.listen(bind, "before_cursor_execute", capture)
+        try:
+            yield statements
+        finally:
+            event.remove(bind, "before_cursor_execute", capture)
+    
+    return _captured_sql
+
+
 @pytest.fixture(scope="function")
 def client(db):
     """Create a test client with database override"""
@@ -252,3 +290,76 @@ def tournament_8_participants(db, test_user):
     db.commit()
     
     return tournament
+
+
+@pytest.fixture
+def active_contest(db, test_user, test_user2):
+    """Create an active contest between test_user and test_user2 with problems A-F"""
+    from app.models import Contest, ContestProblem, ContestScore, ContestStatus
+    
+    now = datetime.utcnow()
+    contest = Contest(
+        id=uuid.uuid4(),
+        user1_id=test_user.id,
+        user2_id=test_user2.id,
+        difficulty=2,
+        start_time=now - timedelta(minutes=30),
+        end_time=now + timedelta(minutes=90),
+        status=ContestStatus.ACTIVE
+    )
+    db.add(contest)
+    db.flush()
+    
+    for i, index in enumerate(['A', 'B', 'C', 'D', 'E', 'F']):
+        db.add(ContestProblem(
+            contest_id=contest.id,
+            problem_index=index,
+            problem_code=f"1000{index}",
+            problem_url=f"https://codeforces.com/problemset/problem/1000/{index}",
+            points=(i + 1) * 100,
+            division=3
+        ))
+    db.add(ContestScore(contest_id=contest.id, user_id=test_user.id, total_points=0))
+    db.add(ContestScore(contest_id=contest.id, user_id=test_user2.id, total_points=0))
+    db.commit()
+    db.refresh(contest)
+    return contest
+
+
+@pytest.fixture
+def make_contest(db):
+    """Factory for two-player contests; `solved` lists the solver of each problem"""
+    from app.models import Contest, ContestProblem, ContestScore, ContestStatus
+    from app.busy_intervals import add_busy_intervals
+    
+    def _make_contest(user1, user2, start_time, end_time, status=ContestStatus.ACTIVE, solved=None, points=(0, 0)):
+        contest = Contest(
+            id=uuid.uuid4(),
+            user1_id=user1.id,
+            user2_id=user2.id,
+            difficulty=2,
+            start_time=start_time,
+            end_time=end_time,
+            status=status
+        )
+        db.add(contest)
+        db.flush()
+        if solved is not None:
+            for index, solver in zip(['A', 'B'], solved):
+                db.add(ContestProblem(
+                    contest_id=contest.id,
+                    problem_index=index,
+                    problem_code=f"2000{index}",
+                    problem_url=f"https://codeforces.com/problemset/problem/2000/{index}",
+                    points=100,
+                    division=3,
+                    solved_by=solver.id if solver else None
+                ))
+        db.add(ContestScore(contest_id=contest.id, user_id=user1.id, total_points=points[0]))
+        db.add(ContestScore(contest_id=contest.id, user_id=user2.id, total_points=points[1]))
+        if status in (ContestStatus.SCHEDULED, ContestStatus.ACTIVE):
+            add_busy_intervals([contest], db)
+        db.commit()
+        return contest
+    
+    return _make_contest
@@ -0,0 +1,534 @@
+"""
+Tests for contest scoring and contest endpoints
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from fastapi import status
+from starlette.requests import Request
+
+from app.busy_intervals import find_conflicts
+from app.contest_events import EventBus, contest_events, contest_event_stream
+from app.models import (
+    Challenge, ChallengeStatus, Contest, ContestProblem, ContestScore, ContestStatus, UserBusyInterval
+)
+from app.submission_checker import (
+    record_problem_solve, recalculate_contest_scores, complete_finished_contests, apply_ratings_batch,
+    process_completed_contests
+)
+from app.routers.contests import (
+    build_contest_response, contest_details_query, create_contest_from_challenge, stream_contest_events
+)
+
+
+def get_score(db, contest, user):
+    return db.query(ContestScore).filter(
+        ContestScore.contest_id == contest.id,
+        ContestScore.user_id == user.id
+    ).first().total_points
+
+
+def get_problem(db, contest, index):
+    return db.query(ContestProblem).filter(
+        ContestProblem.contest_id == contest.id,
+        ContestProblem.problem_index == index
+    ).first()
+
+
+class TestScoreMaintenance:
+    """Test incremental score updates and offline reconciliation"""
+    
+    def test_solve_adds_points(self, db, active_contest, test_user, test_user2):
+        """Test that solving a problem adds its points to the solver's score"""
+        assert record_problem_solve(get_problem(db, active_contest, 'A'), test_user.id, datetime.utcnow(), db)
+        assert record_problem_solve(get_problem(db, active_contest, 'C'), test_user.id, datetime.utcnow(), db)
+        assert record_problem_solve(get_problem(db, active_contest, 'B'), test_user2.id, datetime.utcnow(), db)
+        
+        assert get_score(db, active_contest, test_user) == 400
+        assert get_score(db, active_contest, test_user2) == 200
+    
+    def test_solve_is_awarded_once(self, db, active_contest, test_user, test_user2):
+        """Test that an already-solved problem is not awarded again"""
+        problem = get_problem(db, active_contest, 'D')
+        assert record_problem_solve(problem, test_user.id, datetime.utcnow(), db)
+        assert not record_problem_solve(problem, test_user2.id, datetime.utcnow(), db)
+        assert not record_problem_solve(problem, test_user.id, datetime.utcnow(), db)
+        
+        db.refresh(problem)
+        assert problem.solved_by == test_user.id
+        assert get_score(db, active_contest, test_user) == 400
+        assert get_score(db, active_contest, test_user2) == 0
+    
+    def test_reconcile_repairs_drift(self, db, active_contest, test_user, test_user2):
+        """Test that reconciliation rebuilds scores from solved problems"""
+        record_problem_solve(get_problem(db, active_contest, 'F'), test_user2.id, datetime.utcnow(), db)
+        
+        score = db.query(ContestScore).filter(
+            ContestScore.contest_id == active_contest.id,
+            ContestScore.user_id == test_user.id
+        ).first()
+        score.total_points = 999
+        db.commit()
+        
+        assert recalculate_contest_scores(active_contest.id, db) == 1
+        assert get_score(db, active_contest, test_user) == 0
+        assert get_score(db, active_contest, test_user2) == 600
+        assert recalculate_contest_scores(str(active_contest.id), db) == 0
+
+
+class TestBulkCompletion:
+    """Test set-based completion of finished contests"""
+    
+    def test_completes_expired_and_fully_solved(self, db, make_contest, test_user, test_user2):
+        """Test that expired and fully solved contests are completed in one pass"""
+        now = datetime.utcnow()
+        expired = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1))
+        all_solved = make_contest(test_user, test_user2, now - timedelta(minutes=10), now + timedelta(hours=1),
+                                  solved=[test_user, test_user2])
+        running = make_contest(test_user, test_user2, now - timedelta(minutes=10), now + timedelta(hours=1),
+                               solved=[test_user, None])
+        no_problems = make_contest(test_user, test_user2, now - timedelta(minutes=10), now + timedelta(hours=1))
+        scheduled = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1),
+                                 status=ContestStatus.SCHEDULED)
+        
+        completed = complete_finished_contests(db, now)
+        
+        assert {contest_id for contest_id, _ in completed} == {expired.id, all_solved.id}
+        statuses = dict(db.query(Contest.id, Contest.status).all())
+        assert statuses[expired.id] == ContestStatus.COMPLETED
+        assert statuses[all_solved.id] == ContestStatus.COMPLETED
+        assert statuses[running.id] == ContestStatus.ACTIVE
+        assert statuses[no_problems.id] == ContestStatus.ACTIVE
+        assert statuses[scheduled.id] == ContestStatus.SCHEDULED
+        
+        # A second pass finds nothing left to complete
+        assert complete_finished_contests(db, now) == []
+
+
+class TestContestReads:
+    """Test that contest GET endpoints are pure reads"""
+    
+    def test_get_contest_does_not_write(self, client, auth_headers, db, captured_sql, active_contest, test_user):
+        """Test that viewing a contest issues no INSERT/UPDATE/DELETE statements"""
+        record_problem_solve(get_problem(db, active_contest, 'A'), test_user.id, datetime.utcnow(), db)
+        
+        with captured_sql("INSERT", "UPDATE", "DELETE") as writes:
+            detail = client.get(f"/api/contests/{active_contest.id}", headers=auth_headers)
+            listing = client.get("/api/contests/", headers=auth_headers)
+        
+        assert detail.status_code == status.HTTP_200_OK
+        assert listing.status_code == status.HTTP_200_OK
+        assert writes == []
+        scores = {s["user_id"]: s["total_points"] for s in detail.json()["scores"]}
+        assert scores[str(test_user.id)] == 100
+
+
+class TestContestQueryCount:
+    """Test that contest endpoints use a constant number of queries"""
+    
+    def count_selects(self, captured_sql, func):
+        with captured_sql("SELECT") as selects:
+            response = func()
+        assert response.status_code == status.HTTP_200_OK
+        return len(selects), response.json()
+    
+    def test_list_contests_constant_queries(self, client, auth_headers, db, captured_sql, make_contest, test_user, test_user2, test_user3):
+        """Test that listing contests does not issue queries per contest"""
+        now = datetime.utcnow()
+        for i in range(2):
+            make_contest(test_user, test_user2, now - timedelta(days=i + 1), now - timedelta(days=i + 1) + timedelta(hours=2),
+                         status=ContestStatus.COMPLETED, solved=[test_user, test_user2])
+        url = "/api/contests/?limit=50&include_problems=true"
+        small_count, small = self.count_selects(captured_sql, lambda: client.get(url, headers=auth_headers))
+        
+        for i in range(10):
+            opponent = test_user2 if i % 2 else test_user3
+            make_contest(test_user, opponent, now - timedelta(days=i + 10), now - timedelta(days=i + 10) + timedelta(hours=2),
+                         status=ContestStatus.COMPLETED, solved=[opponent, None])
+        large_count, large = self.count_selects(captured_sql, lambda: client.get(url, headers=auth_headers))
+        
+        small, large = small["items"], large["items"]
+        assert len(small) == 2
+        assert len(large) == 12
+        assert small_count == large_count
+        assert all(len(c["problems"]) == 2 and len(c["scores"]) == 2 for c in large)
+        assert {s["user_handle"] for c in large for s in c["scores"]} == {"testuser", "testuser2", "testuser3"}
+    
+    def test_upcoming_contests_constant_queries(self, client, auth_headers, db, captured_sql, make_contest, test_user, test_user2):
+        """Test that upcoming contests do not issue queries per contest"""
+        now = datetime.utcnow()
+        make_contest(test_user, test_user2, now + timedelta(days=1), now + timedelta(days=1, hours=2),
+                     status=ContestStatus.SCHEDULED)
+        small_count, _ = self.count_selects(captured_sql, lambda: client.get("/api/contests/upcoming", headers=auth_headers))
+        
+        for i in range(5):
+            make_contest(test_user, test_user2, now + timedelta(days=i + 2), now + timedelta(days=i + 2, hours=2),
+                         status=ContestStatus.SCHEDULED)
+        large_count, large = self.count_selects(captured_sql, lambda: client.get("/api/contests/upcoming", headers=auth_headers))
+        
+        assert len(large) == 6
+        assert all(c["problems"] == [] for c in large)
+        assert small_count == large_count
+
+
+class TestContestPagination:
+    """Test keyset pagination of the contest history"""
+    
+    def test_pages_cover_history_without_overlap(self, client, auth_headers, db, make_contest, test_user, test_user2):
+        """Test that following next_cursor walks the whole history newest first"""
+        now = datetime.utcnow()
+        created = []
+        for i in range(5):
+            contest = make_contest(test_user, test_user2, now - timedelta(days=i + 1), now - timedelta(days=i + 1) + timedelta(hours=2),
+                                   status=ContestStatus.COMPLETED, solved=[test_user, None])
+            created.append(str(contest.id))
+        
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/contests/", params=params, headers=auth_headers)
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            pages += 1
+            seen.extend(c["id"] for c in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert pages == 3
+        assert sorted(seen) == sorted(created)
+        assert len(seen) == len(set(seen))
+    
+    def test_status_filter(self, client, auth_headers, db, make_contest, test_user, test_user2):
+        """Test filtering the history by one or more statuses"""
+        now = datetime.utcnow()
+        make_contest(test_user, test_user2, now - timedelta(days=1), now - timedelta(hours=22), status=ContestStatus.COMPLETED)
+        make_contest(test_user, test_user2, now + timedelta(days=1), now + timedelta(days=1, hours=2), status=ContestStatus.SCHEDULED)
+        make_contest(test_user, test_user2, now - timedelta(minutes=5), now + timedelta(hours=2), status=ContestStatus.ACTIVE)
+        
+        response = client.get("/api/contests/?status=completed", headers=auth_headers)
+        assert [c["status"] for c in response.json()["items"]] == ["completed"]
+        
+        response = client.get("/api/contests/?status=scheduled&status=active", headers=auth_headers)
+        assert sorted(c["status"] for c in response.json()["items"]) == ["active", "scheduled"]
+    
+    def test_problems_omitted_by_default(self, client, auth_headers, db, make_contest, test_user, test_user2):
+        """Test that the summary projection leaves out problems unless requested"""
+        now = datetime.utcnow()
+        make_contest(test_user, test_user2, now - timedelta(days=1), now - timedelta(hours=22),
+                     status=ContestStatus.COMPLETED, solved=[test_user, None])
+        
+        summary = client.get("/api/contests/", headers=auth_headers).json()["items"][0]
+        full = client.get("/api/contests/?include_problems=true", headers=auth_headers).json()["items"][0]
+        
+        assert summary["problems"] == []
+        assert len(summary["scores"]) == 2
+        assert len(full["problems"]) == 2
+    
+    def test_invalid_cursor_and_status(self, client, auth_headers):
+        """Test that malformed cursors and unknown statuses are rejected"""
+        response = client.get("/api/contests/?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        response = client.get("/api/contests/?status=bogus", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestPublicFeeds:
+    """Test the public /latest and /top contest feeds"""
+    
+    @pytest.fixture
+    def finished(self, db, make_contest, test_user, test_user2, test_user3):
+        now = datetime.utcnow()
+        contests = {
+            "blowout": make_contest(test_user, test_user2, now - timedelta(days=3), now - timedelta(days=3) + timedelta(hours=2),
+                                    status=ContestStatus.COMPLETED, points=(2100, 0)),
+            "close": make_contest(test_user2, test_user3, now - timedelta(days=2), now - timedelta(days=2) + timedelta(hours=2),
+                                  status=ContestStatus.COMPLETED, points=(700, 600)),
+            "upset": make_contest(test_user3, test_user, now - timedelta(days=1), now - timedelta(days=1) + timedelta(hours=2),
+                                  status=ContestStatus.COMPLETED, points=(300, 100)),
+            "old": make_contest(test_user, test_user3, now - timedelta(days=90), now - timedelta(days=90) + timedelta(hours=2),
+                                status=ContestStatus.COMPLETED, points=(5000, 5000)),
+        }
+        apply_ratings_batch([c.id for c in contests.values()], db)
+        return {name: str(c.id) for name, c in contests.items()}
+    
+    def fetch(self, captured_sql, client, url):
+        with captured_sql("SELECT") as selects:
+            response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(selects) == 1
+        return response.json()
+    
+    def test_latest_single_query(self, client, captured_sql, finished):
+        """Test that /latest returns newest first with scores and rating changes"""
+        feed = self.fetch(captured_sql, client, "/api/contests/public/latest")
+        
+        assert [c["id"] for c in feed] == [finished["upset"], finished["close"], finished["blowout"], finished["old"]]
+        upset = feed[0]
+        assert (upset["user1_handle"], upset["user2_handle"]) == ("testuser3", "testuser")
+        assert (upset["user1_points"], upset["user2_points"]) == (300, 100)
+        assert upset["user1_rating_change"] > 0 > upset["user2_rating_change"]
+    
+    def test_top_sorted_in_database_within_window(self, client, captured_sql, finished):
+        """Test that /top ranks every contest in the window, not just the latest few"""
+        by_points = self.fetch(captured_sql, client, "/api/contests/public/top?sort_by=points")
+        assert [c["id"] for c in by_points] == [finished["blowout"], finished["close"], finished["upset"]]
+        
+        closest = self.fetch(captured_sql, client, "/api/contests/public/top?sort_by=competitiveness&limit=1")
+        assert [c["id"] for c in closest] == [finished["close"]]
+        
+        by_change = self.fetch(captured_sql, client, "/api/contests/public/top?sort_by=rating_change")
+        totals = [abs(c["user1_rating_change"]) + abs(c["user2_rating_change"]) for c in by_change]
+        assert totals == sorted(totals, reverse=True)
+        
+        all_time = self.fetch(captured_sql, client, "/api/contests/public/top?sort_by=points&days=365")
+        assert all_time[0]["id"] == finished["old"]
+
+
+class TestPublicFeedCache:
+    """Test snapshot caching of the public feeds"""
+    
+    def test_cached_until_contest_completes(self, client, db, captured_sql, make_contest, test_user, test_user2):
+        """Test that feeds are served without queries until completion invalidates them"""
+        now = datetime.utcnow()
+        make_contest(test_user, test_user2, now - timedelta(days=1), now - timedelta(hours=22),
+                     status=ContestStatus.COMPLETED, points=(100, 0))
+        make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1), points=(0, 300))
+        
+        first = client.get("/api/contests/public/latest")
+        assert len(first.json()) == 1
+        assert first.headers["cache-control"].startswith("public")
+        
+        with captured_sql() as statements:
+            second = client.get("/api/contests/public/latest")
+            leaderboard = client.get("/api/users/leaderboard")
+            cached_leaderboard = client.get("/api/users/leaderboard")
+        assert second.content == first.content
+        assert cached_leaderboard.content == leaderboard.content
+        assert len(statements) == 1  # only the first leaderboard build
+        
+        not_modified = client.get("/api/contests/public/latest", headers={"If-None-Match": first.headers["etag"]})
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        
+        completed = complete_finished_contests(db)
+        asyncio.run(process_completed_contests(completed, db))
+        
+        refreshed = client.get("/api/contests/public/latest")
+        assert len(refreshed.json()) == 2
+        assert refreshed.headers["etag"] != first.headers["etag"]
+
+
+class TestScheduleConflicts:
+    """Test booking of users in user_busy_intervals and conflict checks against it"""
+    
+    def test_accepted_challenge_books_both_users(self, client, auth_headers, auth_headers_user2, db, test_user, test_user2, test_user3):
+        """Test that an accepted challenge blocks overlapping challenges until the contest completes"""
+        start = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+        client.current_user_ref[0] = test_user
+        challenge = client.post(
+            "/api/challenges/",
+            json={"challenged_user_id": str(test_user2.id), "difficulty": 2, "suggested_start_time": start.isoformat()},
+            headers=auth_headers
+        ).json()
+        client.current_user_ref[0] = test_user2
+        accepted = client.post(f"/api/challenges/{challenge['id']}/accept", headers=auth_headers_user2)
+        assert accepted.status_code == status.HTTP_200_OK
+        
+        contest = db.query(Contest).filter(Contest.challenge_id == challenge["id"]).one()
+        booked = db.query(UserBusyInterval.user_id).filter(UserBusyInterval.contest_id == contest.id).all()
+        assert {row[0] for row in booked} == {test_user.id, test_user2.id}
+        
+        # test_user2 is busy for an hour-later start, but free right after the contest ends
+        overlapping = client.post(
+            "/api/challenges/",
+            json={"challenged_user_id": str(test_user3.id), "difficulty": 2,
+                  "suggested_start_time": (start + timedelta(hours=1)).isoformat()},
+            headers=auth_headers_user2
+        )
+        assert overlapping.status_code == status.HTTP_400_BAD_REQUEST
+        assert overlapping.json()["detail"].startswith(f"{test_user2.handle} already has a contest")
+        back_to_back = client.post(
+            "/api/challenges/",
+            json={"challenged_user_id": str(test_user3.id), "difficulty": 2,
+                  "suggested_start_time": (start + timedelta(hours=2)).isoformat()},
+            headers=auth_headers_user2
+        )
+        assert back_to_back.status_code == status.HTTP_200_OK
+        
+        # Completing the contest frees both users
+        db.query(Contest).filter(Contest.id == contest.id).update({"status": ContestStatus.ACTIVE})
+        db.commit()
+        assert complete_finished_contests(db, contest.end_time) == [(contest.id, None)]
+        assert db.query(UserBusyInterval).count() == 0
+    
+    def test_contest_row_precedes_bookings(self, db, test_user, test_user2):
+        """Test that accepting a challenge inserts the contest before its bookings (foreign keys enforced)"""
+        challenge = Challenge(challenger_id=test_user.id, challenged_id=test_user2.id, difficulty=2,
+                              suggested_start_time=datetime.utcnow() + timedelta(days=1),
+                              status=ChallengeStatus.ACCEPTED)
+        db.add(challenge)
+        db.commit()
+        
+        # SQLite only enforces foreign keys when enabled on the connection, outside a transaction
+        db.connection().exec_driver_sql("PRAGMA foreign_keys=ON")
+        try:
+            contest = asyncio.run(create_contest_from_challenge(challenge, db))
+        finally:
+            db.rollback()
+            db.connection().exec_driver_sql("PRAGMA foreign_keys=OFF")
+            db.commit()
+        
+        booked = db.query(UserBusyInterval.user_id).filter(UserBusyInterval.contest_id == contest.id).all()
+        assert {row[0] for row in booked} == {test_user.id, test_user2.id}
+    
+    def test_many_users_and_windows_in_one_query(self, db, captured_sql, make_contest, test_user, test_user2, test_user3):
+        """Test that conflicts for several users and windows come from a single SELECT"""
+        base = datetime.utcnow() + timedelta(days=2)
+        make_contest(test_user, test_user2, base, base + timedelta(hours=2), status=ContestStatus.SCHEDULED)
+        later = make_contest(test_user2, test_user3, base + timedelta(hours=6), base + timedelta(hours=8),
+                             status=ContestStatus.SCHEDULED)
+        make_contest(test_user, test_user3, base - timedelta(days=1), base - timedelta(hours=22),
+                     status=ContestStatus.COMPLETED)
+        user_ids = [test_user.id, test_user2.id, test_user3.id]
+        windows = [(base + timedelta(hours=7), base + timedelta(hours=9)), (base - timedelta(hours=2), base)]
+        
+        with captured_sql() as selects:
+            conflicts = find_conflicts([test_user3.id], windows, db)
+            touching = find_conflicts(user_ids, windows, db, inclusive=True)
+        
+        assert [(c.user_id, c.contest_id) for c in conflicts] == [(test_user3.id, later.id)]
+        assert len(touching) == 4  # both bookings of the first contest touch the second window
+        assert touching[-1].contest.user1.handle == test_user2.handle
+        assert len(selects) == 2
+
+
+class TestContestEvents:
+    """Test the live contest event stream"""
+    
+    def test_bus_drops_oldest_when_full(self):
+        """Test that a slow subscriber keeps the newest events and unsubscribing stops delivery"""
+        bus = EventBus(queue_size=2)
+        
+        async def run():
+            queue = bus.subscribe("c1")
+            for n in range(3):
+                bus.publish("c1", "tick", {"n": n})
+            received = [queue.get_nowait() for _ in range(queue.qsize())]
+            bus.unsubscribe("c1", queue)
+            return received, bus.publish("c1", "tick", {"n": 3})
+        
+        received, delivered = asyncio.run(run())
+        assert received == [("tick", {"n": 1}), ("tick", {"n": 2})]
+        assert delivered == 0
+        assert not bus.has_subscribers("c1")
+    
+    def test_solve_and_completion_are_published(self, db, active_contest, test_user):
+        """Test that the submission checker publishes solves, scores and completion"""
+        async def run():
+            queue = contest_events.subscribe(active_contest.id)
+            try:
+                record_problem_solve(get_problem(db, active_contest, 'B'), test_user.id, datetime.utcnow(), db)
+                complete_finished_contests(db, datetime.utcnow() + timedelta(hours=3))
+                return [queue.get_nowait() for _ in range(queue.qsize())]
+            finally:
+                contest_events.unsubscribe(active_contest.id, queue)
+        
+        events = asyncio.run(run())
+        assert [name for name, _ in events] == ["solve", "scores", "status"]
+        assert events[0][1]["solved_by"] == str(test_user.id)
+        scores = {s["user_id"]: s["total_points"] for s in events[1][1]["scores"]}
+        assert scores[str(test_user.id)] == 200
+        assert events[2][1] == {"status": "completed"}
+    
+    def test_stream_reveals_problems_at_start(self, db, make_contest, test_user, test_user2):
+        """Test that problems selected before the start are only sent once the contest starts"""
+        start = datetime.utcnow() + timedelta(seconds=0.3)
+        contest = make_contest(test_user, test_user2, start, start + timedelta(hours=2),
+                               status=ContestStatus.SCHEDULED, solved=[None, None])
+        contest = contest_details_query(db).filter(Contest.id == contest.id).first()
+        snapshot = build_contest_response(contest)
+        hidden = [{"problem_index": p.problem_index} for p in contest.problems]
+        
+        class Connected:
+            async def is_disconnected(self):
+                return False
+        
+        async def run():
+            queue = contest_events.subscribe(contest.id)
+            stream = contest_event_stream(Connected(), contest.id, snapshot, hidden, queue)
+            frames = [await stream.__anext__()]
+            frames.append(await stream.__anext__())
+            revealed_at = datetime.utcnow()
+            contest_events.publish(contest.id, "status", {"status": "completed"})
+            frames.extend([frame async for frame in stream])
+            return frames, revealed_at
+        
+        frames, revealed_at = asyncio.run(run())
+        assert frames[0].startswith("event: snapshot") and '"problems":[]' in frames[0]
+        assert frames[1].startswith("event: problems") and revealed_at >= start
+        assert frames[2] == 'event: status\ndata: {"status":"completed"}\n\n'
+        assert not contest_events.has_subscribers(contest.id)
+    
+    def test_completed_contest_stream(self, client, auth_headers, db, make_contest, test_user, test_user2, test_user3):
+        """Test that a finished contest streams its snapshot and closes, for participants only"""
+        now = datetime.utcnow()
+        contest = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1),
+                               status=ContestStatus.COMPLETED, solved=[test_user, None], points=(100, 0))
+        
+        response = client.get(f"/api/contests/{contest.id}/events", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith("event: snapshot\ndata: ")
+        assert '"status":"completed"' in response.text
+        assert not contest_events.has_subscribers(contest.id)
+        
+        client.current_user_ref[0] = test_user3
+        assert client.get(f"/api/contests/{contest.id}/events", headers=auth_headers).status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_open_stream_releases_connection(self, db, active_contest, test_user):
+        """Test that a stream that stays open does not hold a database connection"""
+        pool = db.get_bind().pool
+        
+        async def run():
+            response = await stream_contest_events(str(active_contest.id), Request({"type": "http"}), test_user, db)
+            try:
+                first = await response.body_iterator.__anext__()
+                return first, db.in_transaction(), pool.checkedout()
+            finally:
+                await response.body_iterator.aclose()
+        
+        first, in_transaction, checked_out = asyncio.run(run())
+        assert first.startswith("event: snapshot")
+        assert not in_transaction
+        assert checked_out == 0
+        assert not contest_events.has_subscribers(active_contest.id)
+    
+    def test_event_published_while_snapshot_loads(self, db, active_contest, test_user, monkeypatch):
+        """Test that an event published while the snapshot is being built still reaches the stream"""
+        import app.routers.contests as contests_router
+        
+        def build_then_complete(contest, *args, **kwargs):
+            snapshot = build_contest_response(contest, *args, **kwargs)
+            # The checker completes the contest after the snapshot was read
+            contest_events.publish(contest.id, "status", {"status": "completed"})
+            return snapshot
+        
+        monkeypatch.setattr(contests_router, "build_contest_response", build_then_complete)
+        
+        async def run():
+            response = await stream_contest_events(str(active_contest.id), Request({"type": "http"}), test_user, db)
+            
+            async def read_all():
+                return [frame async for frame in response.body_iterator]
+            
+            return await asyncio.wait_for(read_all(), timeout=5)
+        
+        frames = asyncio.run(run())
+        assert frames[0].startswith("event: snapshot") and '"status":"active"' in frames[0]
+        assert frames[1:] == ['event: status\ndata: {"status":"completed"}\n\n']
+        assert not contest_events.has_subscribers(active_contest.id)
@@ -0,0 +1,96 @@
+"""
+Tests for composite indexes on hot query shapes and the index migrations
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from app.migrations import INDEX_MIGRATIONS, run_index_migrations
+from app.models import Challenge, ChallengeStatus, ContestStatus
+
+
+# name -> (query, fragment expected in the SQLite query plan)
+HOT_QUERIES = {
+    "contest_scores": (
+        "SELECT total_points FROM contest_scores WHERE contest_id = :id AND user_id = :id",
+        "USING INDEX ix_contest_scores_contest_user"),
+    "contest_problems": (
+        "SELECT id FROM contest_problems WHERE contest_id = :id AND solved_by IS NULL",
+        "USING INDEX ix_contest_problems_contest_solved_by"),
+    "contests_due_to_start": (
+        "SELECT id FROM contests WHERE status = 'SCHEDULED' AND start_time <= :now",
+        "USING INDEX ix_contests_status_start_time"),
+    "contests_recently_completed": (
+        "SELECT id FROM contests WHERE status = 'COMPLETED' AND end_time >= :now ORDER BY end_time DESC",
+        "USING INDEX ix_contests_status_end_time"),
+    "contests_as_user1": (
+        "SELECT id FROM contests WHERE user1_id = :id AND status = 'ACTIVE'",
+        "USING INDEX ix_contests_user1_status"),
+    "contests_as_user2": (
+        "SELECT id FROM contests WHERE user2_id = :id AND status = 'ACTIVE'",
+        "USING INDEX ix_contests_user2_status"),
+    # Backed by the uq_rating_history_contest_user constraint (an autoindex on SQLite)
+    "rating_history": (
+        "SELECT rating_change FROM rating_history WHERE contest_id = :id AND user_id = :id",
+        "(contest_id=? AND user_id=?)"),
+    "pending_challenges": (
+        "SELECT id FROM challenges WHERE challenged_id = :id AND status = 'PENDING'",
+        "USING INDEX ix_challenges_challenged_status"),
+    "busy_interval_conflicts": (
+        "SELECT contest_id FROM user_busy_intervals WHERE user_id IN (:id) AND start_time < :now AND end_time > :now",
+        "USING INDEX ix_user_busy_intervals_user_range"),
+}
+
+
+class TestHotQueryIndexes:
+    """Test that each hot query shape is answered with an index scan"""
+
+    @pytest.fixture
+    def seeded(self, db, make_contest, test_user, test_user2, test_user3):
+        now = datetime.utcnow()
+        users = [test_user, test_user2, test_user3]
+        statuses = [ContestStatus.SCHEDULED, ContestStatus.ACTIVE, ContestStatus.COMPLETED]
+        for i in range(60):
+            user1, user2 = users[i % 3], users[(i + 1) % 3]
+            start = now + timedelta(hours=i - 30)
+            make_contest(user1, user2, start, start + timedelta(hours=2),
+                         status=statuses[i % 3], solved=[user1, None])
+            db.add(Challenge(challenger_id=user1.id, challenged_id=user2.id, difficulty=2,
+                             suggested_start_time=start, status=ChallengeStatus.PENDING))
+        db.commit()
+        db.execute(text("ANALYZE"))
+        return str(test_user.id), now
+    
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_query_uses_index(self, db, seeded, name):
+        """Test the query plan searches the expected index"""
+        query, expected = HOT_QUERIES[name]
+        some_id, now = seeded
+        plan = db.execute(text("EXPLAIN QUERY PLAN " + query), {"id": some_id, "now": now}).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert details.startswith("SEARCH"), details
+        assert expected in details, details
+
+
+class TestIndexMigrations:
+    """Test the versioned index migration runner"""
+    
+    def test_applies_pending_versions_once(self, db):
+        """Test that missing indexes are created and versions recorded exactly once"""
+        engine = db.get_bind()
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_contests_status_end_time"))
+        
+        try:
+            run_index_migrations(engine)
+            run_index_migrations(engine)
+            
+            with engine.connect() as conn:
+                versions = [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+                indexes = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+            assert versions == [version for version, _, _, _ in INDEX_MIGRATIONS]
+            assert {name for _, name, _, _ in INDEX_MIGRATIONS} <= indexes
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
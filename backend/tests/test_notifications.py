@@ -0,0 +1,151 @@
+"""
+Tests for the per-user notification WebSocket
+"""
+import asyncio
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from starlette.websockets import WebSocketDisconnect
+
+from app.auth import create_access_token
+from app.notifications import InMemoryBackend, NotificationBackend, NotificationHub, PostgresBackend, notification_hub
+
+
+def connect(client, user):
+    """Open an authenticated notification socket and consume its ready event"""
+    socket = client.websocket_connect("/api/notifications/ws")
+    ws = socket.__enter__()
+    ws.send_json({"token": create_access_token(data={"sub": str(user.id)})})
+    ready = ws.receive_json()
+    assert ready["event"] == "ready"
+    return socket, ws, ready
+
+
+class TestNotificationSocket:
+    """Test authentication and delivery of notifications"""
+
+    def test_rejects_invalid_token(self, client):
+        """Test that a socket without a valid token is closed with a policy violation"""
+        with client.websocket_connect("/api/notifications/ws") as ws:
+            ws.send_json({"token": "not-a-token"})
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+        assert closed.value.code == 1008
+
+    @pytest.mark.parametrize("token", [123, {}, None])
+    def test_rejects_non_string_token(self, client, token):
+        """Test that a token of the wrong JSON type is refused like an invalid one"""
+        with client.websocket_connect("/api/notifications/ws") as ws:
+            ws.send_json({"token": token})
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+        assert closed.value.code == 1008
+
+    def test_challenge_events(self, client, auth_headers, test_user, test_user2):
+        """Test that challenges notify the challenged user and acceptance notifies the challenger"""
+        challenger_socket, challenger_ws, _ = connect(client, test_user)
+        challenged_socket, challenged_ws, _ = connect(client, test_user2)
+        try:
+            start = datetime.utcnow() + timedelta(days=1)
+            challenge = client.post(
+                "/api/challenges/",
+                json={"challenged_user_id": str(test_user2.id), "difficulty": 2, "suggested_start_time": start.isoformat()},
+                headers=auth_headers
+            ).json()
+
+            received = challenged_ws.receive_json()
+            assert received["event"] == "challenge_received"
+            assert received["data"]["challenge_id"] == challenge["id"]
+            assert received["data"]["challenger_handle"] == test_user.handle
+            assert received["data"]["pending_count"] == 1
+
+            client.current_user_ref[0] = test_user2
+            client.post(f"/api/challenges/{challenge['id']}/accept", headers=auth_headers)
+
+            accepted = challenger_ws.receive_json()
+            assert accepted["event"] == "challenge_accepted"
+            assert accepted["data"]["challenge_id"] == challenge["id"]
+            assert accepted["data"]["opponent_handle"] == test_user2.handle
+            assert challenged_ws.receive_json() == {"event": "pending_challenges", "data": {"count": 0}}
+        finally:
+            challenged_socket.__exit__(None, None, None)
+            challenger_socket.__exit__(None, None, None)
+
+        # The socket handler finishes on the app's event loop after the client has closed
+        deadline = time.monotonic() + 2
+        while notification_hub.connections.has_subscribers(test_user.id) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not notification_hub.connections.has_subscribers(test_user.id)
+
+    def test_unconfirmed_user_receives_confirmation(self, client, db, test_user):
+        """Test that unconfirmed users can connect and are told when they are confirmed"""
+        test_user.is_confirmed = False
+        db.commit()
+
+        socket, ws, ready = connect(client, test_user)
+        try:
+            assert ready["data"]["is_confirmed"] is False
+            notification_hub.notify([test_user.id], "confirmed")
+            assert ws.receive_json() == {"event": "confirmed", "data": {}}
+        finally:
+            socket.__exit__(None, None, None)
+
+
+class TestNotificationBackend:
+    """Test that notifications fan out through the configured backend"""
+
+    def test_messages_go_through_backend(self):
+        """Test that notify publishes to the backend and only delivered messages reach connections"""
+        class RecordingBackend(InMemoryBackend):
+            def __init__(self):
+                self.published = []
+
+            def publish(self, message):
+                self.published.append(message)
+
+        backend = RecordingBackend()
+        hub = NotificationHub(backend)
+
+        async def run():
+            queue = hub.connections.subscribe("user-1")
+            hub.notify(["user-1", "user-2"], "contest_starting", {"contest_id": "c1"})
+            assert queue.empty()
+            # What another instance (or the LISTEN thread) hands back is delivered locally
+            backend.deliver(backend.published[0])
+            return queue.get_nowait()
+
+        assert asyncio.run(run()) == ("contest_starting", {"contest_id": "c1"})
+        assert backend.published == [
+            {"user_ids": ["user-1", "user-2"], "event": "contest_starting", "data": {"contest_id": "c1"}}
+        ]
+        hub.notify([], "contest_starting")
+        assert len(backend.published) == 1
+
+    def test_backend_must_implement_publish(self):
+        """Test that a backend without publish cannot be created"""
+        class Incomplete(NotificationBackend):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_postgres_publish_does_not_block_the_caller(self):
+        """Test that pg_notify runs on the publisher thread, in publish order"""
+        release = threading.Event()
+        sent = []
+
+        class BlockedBackend(PostgresBackend):
+            def _send(self, payload):
+                release.wait(5)
+                sent.append((threading.current_thread().name, payload))
+
+        backend = BlockedBackend(engine=None)
+        backend.publish({"n": 1})
+        backend.publish({"n": 2})
+        assert sent == []
+
+        release.set()
+        backend.stop()
+        assert [payload for _, payload in sent] == ['{"n": 1}', '{"n": 2}']
+        assert all(name.startswith("notification-publisher") for name, _ in sent)
@@ -0,0 +1,197 @@
+"""
+Tests for Elo rating application
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from app.models import ContestStatus, RatingHistory, User
+from app.rating import calculate_elo_rating
+from app.submission_checker import apply_ratings_batch
+
+
+def get_rating(db, user):
+    return db.query(User.rating).filter(User.id == user.id).scalar()
+
+
+class TestBatchRatings:
+    """Test batched rating updates for many completed contests"""
+    
+    def test_sequential_updates_in_end_time_order(self, db, make_contest, test_user, test_user2, test_user3):
+        """Test that a player in two contests gets sequential updates ordered by end time"""
+        now = datetime.utcnow()
+        # Passed in reverse order: the batch must still rate the earlier contest first
+        later = make_contest(test_user, test_user3, now - timedelta(hours=2), now - timedelta(minutes=10),
+                             status=ContestStatus.COMPLETED, points=(0, 300))
+        earlier = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1),
+                               status=ContestStatus.COMPLETED, points=(500, 100))
+        
+        assert apply_ratings_batch([str(later.id), earlier.id], db) == 2
+        
+        r1, r2, _, _ = calculate_elo_rating(1500, 1400, 1.0, 0.0)
+        r1, r3, _, _ = calculate_elo_rating(r1, 1300, 0.0, 1.0)
+        assert get_rating(db, test_user) == r1
+        assert get_rating(db, test_user2) == r2
+        assert get_rating(db, test_user3) == r3
+        
+        history = db.query(RatingHistory).filter(
+            RatingHistory.user_id == test_user.id
+        ).order_by(RatingHistory.rating_before).all()
+        assert [h.contest_id for h in history] == [earlier.id, later.id]
+        assert history[1].rating_before == history[0].rating_after
+    
+    def test_skips_rated_and_unfinished_contests(self, db, make_contest, test_user, test_user2):
+        """Test that already rated and non-completed contests are left alone"""
+        now = datetime.utcnow()
+        completed = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1),
+                                 status=ContestStatus.COMPLETED, points=(100, 0))
+        active = make_contest(test_user, test_user2, now - timedelta(hours=1), now + timedelta(hours=1))
+        
+        assert apply_ratings_batch([completed.id, active.id], db) == 1
+        rating_after_first = get_rating(db, test_user)
+        
+        assert apply_ratings_batch([completed.id, active.id], db) == 0
+        assert get_rating(db, test_user) == rating_after_first
+        assert db.query(RatingHistory).count() == 2
+    
+    def test_constant_query_count(self, db, captured_sql, make_contest, test_user, test_user2, test_user3):
+        """Test that the number of SELECTs does not grow with the batch size"""
+        now = datetime.utcnow()
+        contests = []
+        for i in range(10):
+            opponent = test_user2 if i % 2 else test_user3
+            contests.append(make_contest(
+                test_user, opponent,
+                now - timedelta(hours=30 - i), now - timedelta(hours=28 - i),
+                status=ContestStatus.COMPLETED, points=(100 * (i % 3), 100)
+            ))
+        
+        contest_ids = [c.id for c in contests]
+        with captured_sql("SELECT") as selects:
+            assert apply_ratings_batch(contest_ids, db) == 10
+        
+        assert len(selects) == 5
+        assert db.query(RatingHistory).count() == 20
+
+
+class TestRatingReplay:
+    """Test the vectorized full rating replay"""
+    
+    def test_replay_elo_matches_sequential(self):
+        """Test that wave-vectorized replay equals contest-by-contest calculate_elo_rating"""
+        import numpy as np
+        from app.rating import determine_contest_scores
+        from app.rating_replay import replay_elo
+        
+        rng = np.random.default_rng(7)
+        num_users = 40
+        user1 = rng.integers(0, num_users, 2000)
+        user2 = (user1 + rng.integers(1, num_users, 2000)) % num_users
+        points1 = rng.integers(0, 4, 2000) * 100
+        points2 = rng.integers(0, 4, 2000) * 100
+        
+        replay = replay_elo(user1, user2, points1, points2, num_users)
+        
+        ratings = [1000] * num_users
+        for i in range(len(user1)):
+            a, b = int(user1[i]), int(user2[i])
+            s1, s2 = determine_contest_scores(int(points1[i]), int(points2[i]))
+            ratings[a], ratings[b], _, _ = calculate_elo_rating(ratings[a], ratings[b], s1, s2)
+            assert replay["after1"][i] == ratings[a]
+            assert replay["after2"][i] == ratings[b]
+        assert replay["ratings"].tolist() == ratings
+    
+    def test_replay_rewrites_ratings_and_history(self, db, make_contest, test_user, test_user2, test_user3):
+        """Test that a replay recomputes ratings from the initial rating and rebuilds history"""
+        from app.rating import INITIAL_RATING
+        from app.rating_replay import replay_ratings
+        
+        now = datetime.utcnow()
+        first = make_contest(test_user, test_user2, now - timedelta(hours=5), now - timedelta(hours=3),
+                             status=ContestStatus.COMPLETED, points=(300, 100))
+        second = make_contest(test_user2, test_user3, now - timedelta(hours=2), now - timedelta(hours=1),
+                              status=ContestStatus.COMPLETED, points=(200, 200))
+        apply_ratings_batch([first.id, second.id], db)
+        
+        r1, r2, _, _ = calculate_elo_rating(INITIAL_RATING, INITIAL_RATING, 1.0, 0.0)
+        r2, r3, _, _ = calculate_elo_rating(r2, INITIAL_RATING, 0.5, 0.5)
+        
+        report = replay_ratings(db, dry_run=True)
+        assert report["contests"] == 2
+        assert report["users_changed"] == 3
+        assert {row["handle"]: row["replayed"] for row in report["largest_changes"]} == {
+            "testuser": r1, "testuser2": r2, "testuser3": r3
+        }
+        # Dry run leaves ratings untouched
+        assert get_rating(db, test_user) != r1
+        
+        replay_ratings(db)
+        assert get_rating(db, test_user) == r1
+        assert get_rating(db, test_user2) == r2
+        assert get_rating(db, test_user3) == r3
+        
+        history = db.query(RatingHistory).filter(RatingHistory.user_id == test_user2.id).all()
+        assert sorted((h.rating_before, h.rating_after) for h in history) == sorted([
+            (INITIAL_RATING, calculate_elo_rating(INITIAL_RATING, INITIAL_RATING, 1.0, 0.0)[1]),
+            (calculate_elo_rating(INITIAL_RATING, INITIAL_RATING, 1.0, 0.0)[1], r2),
+        ])
+        assert db.query(RatingHistory).count() == 4
+        
+        # Replaying again is a no-op
+        assert replay_ratings(db, dry_run=True)["users_changed"] == 0
+
+
+class TestCompletionIdempotency:
+    """Test that contest completion and rating application cannot run twice"""
+    
+    def test_complete_contest_transitions_once(self, db, make_contest, test_user, test_user2):
+        """Test that only the first caller completes a contest"""
+        from app.submission_checker import complete_contest
+        
+        now = datetime.utcnow()
+        contest = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1))
+        
+        assert complete_contest(contest.id, db)
+        assert not complete_contest(contest.id, db)
+        db.refresh(contest)
+        assert contest.status == ContestStatus.COMPLETED
+    
+    def test_rating_history_unique_per_contest_user(self, db, make_contest, test_user, test_user2):
+        """Test that a duplicate rating history entry is rejected by the database"""
+        from sqlalchemy.exc import IntegrityError
+        
+        now = datetime.utcnow()
+        contest = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1),
+                               status=ContestStatus.COMPLETED, points=(100, 0))
+        apply_ratings_batch([contest.id], db)
+        
+        db.add(RatingHistory(
+            user_id=test_user.id, contest_id=contest.id,
+            rating_before=1500, rating_after=1516, rating_change=16
+        ))
+        with pytest.raises(IntegrityError):
+            db.commit()
+        db.rollback()
+    
+    def test_parallel_completion_rates_once(self, db, make_contest, test_user, test_user2, monkeypatch):
+        """Test that the bulk pass and the per-contest job together apply Elo once"""
+        import asyncio
+        import app.submission_checker as checker
+        from tests.conftest import TestingSessionLocal
+        
+        now = datetime.utcnow()
+        contest = make_contest(test_user, test_user2, now - timedelta(hours=3), now - timedelta(hours=1),
+                               solved=[test_user, None], points=(100, 0))
+        monkeypatch.setattr(checker, "SessionLocal", TestingSessionLocal)
+        
+        async def run_workers():
+            await asyncio.gather(
+                checker.check_all_active_contests(),
+                checker.check_contest_submissions(str(contest.id)),
+            )
+            await checker.check_all_active_contests()
+        
+        asyncio.run(run_workers())
+        
+        assert db.query(RatingHistory).filter(RatingHistory.contest_id == contest.id).count() == 2
+        r1, _, _, _ = calculate_elo_rating(1500, 1400, 1.0, 0.0)
+        assert get_rating(db, test_user) == r1
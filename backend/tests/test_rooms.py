@@ -0,0 +1,125 @@
+"""
+Tests for free-for-all room contests
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from fastapi import status
+from sqlalchemy import insert
+
+from app import rooms as room_engine
+from app.models import ContestStatus, Room, RoomParticipant, RoomProblem, User
+
+
+def make_room(db, users, start_time, codes=("1900A", "1900B")):
+    """Active-ready room with the given participants (joined in order) and problems"""
+    room = Room(id=uuid.uuid4(), creator_id=users[0].id, difficulty=2, start_time=start_time,
+                end_time=start_time + room_engine.ROOM_DURATION, status=ContestStatus.SCHEDULED)
+    db.add(room)
+    for offset, user in enumerate(users):
+        db.add(RoomParticipant(room_id=room.id, user_id=user.id, joined_at=start_time - timedelta(hours=1, seconds=-offset)))
+    for n, code in enumerate(codes):
+        db.add(RoomProblem(room_id=room.id, problem_index=code[-1], problem_code=code,
+                           problem_url=f"https://codeforces.com/problemset/problem/{code[:-1]}/{code[-1]}",
+                           points=100 * (n + 1), division=3))
+    db.commit()
+    return room
+
+
+def make_users(db, count, prefix="room"):
+    rows = [{"id": uuid.uuid4(), "handle": f"{prefix}_{i}", "password_hash": "x", "rating": 1500, "is_confirmed": True}
+            for i in range(count)]
+    db.execute(insert(User), rows)
+    db.commit()
+    return db.query(User).filter(User.handle.like(f"{prefix}_%")).order_by(User.handle).all()
+
+
+class TestRoomEndpoints:
+    """Test creating, joining and viewing rooms"""
+
+    def test_create_join_and_view(self, client, auth_headers, test_user, test_user2):
+        """Test that the creator joins automatically, others can join once, and problems stay hidden"""
+        start = datetime.utcnow() + timedelta(hours=1)
+        response = client.post("/api/rooms/", json={"difficulty": 2, "start_time": start.isoformat()}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        room = response.json()
+        assert [p["user_handle"] for p in room["participants"]] == [test_user.handle]
+
+        client.current_user_ref[0] = test_user2
+        joined = client.post(f"/api/rooms/{room['id']}/join", headers=auth_headers)
+        assert joined.status_code == status.HTTP_200_OK
+        assert len(joined.json()["participants"]) == 2
+        assert client.post(f"/api/rooms/{room['id']}/join", headers=auth_headers).status_code == status.HTTP_400_BAD_REQUEST
+
+        viewed = client.get(f"/api/rooms/{room['id']}", headers=auth_headers)
+        assert viewed.status_code == status.HTTP_200_OK
+        assert viewed.json()["problems"] == []
+
+        listed = client.get("/api/rooms/", headers=auth_headers).json()
+        assert [r["id"] for r in listed] == [room["id"]]
+        assert listed[0]["problems"] == []
+
+    def test_only_participants_can_view(self, client, auth_headers, db, test_user, test_user2):
+        """Test that non-participants get a 403 for a room's standings and problems"""
+        room = make_room(db, [test_user], datetime.utcnow() - timedelta(minutes=5))
+        assert client.get(f"/api/rooms/{room.id}", headers=auth_headers).status_code == status.HTTP_200_OK
+
+        client.current_user_ref[0] = test_user2
+        assert client.get(f"/api/rooms/{room.id}", headers=auth_headers).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_rejects_past_start_and_late_join(self, client, auth_headers, db, test_user, test_user2):
+        """Test that rooms must start in the future and cannot be joined once started"""
+        past = datetime.utcnow() - timedelta(minutes=5)
+        response = client.post("/api/rooms/", json={"difficulty": 2, "start_time": past.isoformat()}, headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        room = make_room(db, [test_user], past)
+        client.current_user_ref[0] = test_user2
+        assert client.post(f"/api/rooms/{room.id}/join", headers=auth_headers).status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestRoomPolling:
+    """Test first-solver scoring across all participants"""
+
+    def test_one_fetch_per_participant_and_first_solver_wins(self, db, monkeypatch):
+        """Test a 20-player room plus a second room sharing a player: one fetch per handle per tick"""
+        users = make_users(db, 20)
+        start = datetime.utcnow() - timedelta(minutes=30)
+        room = make_room(db, users, start)
+        other = make_room(db, [users[0], users[1]], start + timedelta(minutes=5), codes=("1800A",))
+        base = int(start.timestamp())
+
+        # 1900A: solved by players 7 and 3, player 3 first; 1900B: players 2 and 5 at the same second
+        submissions = {
+            users[7].handle: {"1900A": {"creationTimeSeconds": base + 600}},
+            users[3].handle: {"1900A": {"creationTimeSeconds": base + 300}},
+            users[2].handle: {"1900B": {"creationTimeSeconds": base + 900}},
+            users[5].handle: {"1900B": {"creationTimeSeconds": base + 900}},
+            users[1].handle: {"1800A": {"creationTimeSeconds": base + 60}},  # Before the other room started
+        }
+        fetched = []
+
+        async def fake_accepted(handle, since):
+            fetched.append(handle)
+            return submissions.get(handle, {})
+
+        monkeypatch.setattr(room_engine.cf_api, "get_accepted_since", fake_accepted)
+        awarded = asyncio.run(room_engine.check_rooms(db))
+
+        assert awarded == 2
+        assert sorted(fetched) == sorted(u.handle for u in users)
+        db.expire_all()
+        solvers = {p.problem_code: p.solved_by for p in db.query(RoomProblem).filter(RoomProblem.room_id == room.id)}
+        assert solvers == {"1900A": users[3].id, "1900B": users[2].id}
+        points = dict(db.query(RoomParticipant.user_id, RoomParticipant.total_points).filter(
+            RoomParticipant.room_id == room.id, RoomParticipant.total_points > 0
+        ).all())
+        assert points == {users[3].id: 100, users[2].id: 200}
+
+        # All problems solved: the room completes, the other one keeps running
+        assert db.query(Room).filter(Room.id == room.id).one().status == ContestStatus.COMPLETED
+        assert db.query(Room).filter(Room.id == other.id).one().status == ContestStatus.ACTIVE
+
+        fetched.clear()
+        assert asyncio.run(room_engine.check_rooms(db)) == 0
+        assert sorted(fetched) == sorted([users[0].handle, users[1].handle])
@@ -1,6 +1,8 @@
 """
 Comprehensive tests for tournament functionality
 """
+import asyncio
+import os
 import pytest
 from datetime import datetime, timedelta
 from fastapi import status
@@ -61,6 +63,19 @@ class TestTournamentCreation:
             headers=auth_headers
         )
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_create_tournament_bulk_inserts_slots(self, client, auth_headers, db, captured_sql):
+        """Test that the tournament and all of its slots are written with two INSERTs"""
+        with captured_sql("INSERT") as inserts:
+            response = client.post(
+                "/api/tournaments/",
+                json={"num_participants": 64, "difficulty": 2},
+                headers=auth_headers
+            )
+        assert response.status_code == status.HTTP_200_OK
+        assert [slot["slot_number"] for slot in response.json()["slots"]] == list(range(1, 65))
+        assert len(inserts) == 2
+        assert db.query(TournamentSlot).filter(TournamentSlot.tournament_id == response.json()["id"]).count() == 64
 
 
 class TestRoundSchedules:
@@ -547,6 +562,7 @@ class TestOverlapChecking:
     def test_invite_overlap_check(self, client, auth_headers, auth_headers_user2, tournament_4_participants, test_user, test_user2, db):
         """Test that invites are rejected if user has overlapping contests"""
         from app.models import Contest, ContestScore
+        from app.busy_intervals import add_busy_intervals
         
         # Set tournament round schedules
         client.current_user_ref[0] = test_user  # Ensure user is set
@@ -579,6 +595,8 @@ class TestOverlapChecking:
             status=ContestStatus.SCHEDULED
         )
         db.add(overlapping_contest)
+        db.flush()
+        add_busy_intervals([overlapping_contest], db)  # Book test_user2 as contest creation does
         db.commit()
         db.refresh(overlapping_contest)  # Ensure it's persisted
         
@@ -650,3 +668,669 @@ class TestTournamentList:
         assert data["id"] == str(tournament_4_participants.id)
         assert data["num_participants"] == 4
         assert len(data["slots"]) == 4
+
+
+@pytest.fixture
+def populate(db):
+    """Fill every slot of a tournament with a new user and complete round 1 (slot 1, 3, ... win)"""
+    def _populate(tournament):
+        slots = db.query(TournamentSlot).filter(
+            TournamentSlot.tournament_id == tournament.id
+        ).order_by(TournamentSlot.slot_number).all()
+        for slot in slots:
+            user = User(id=uuid.uuid4(), handle=f"player_{tournament.num_participants}_{slot.slot_number}",
+                        password_hash="x", rating=1500, is_confirmed=True)
+            db.add(user)
+            slot.user_id = user.id
+            slot.status = "ACCEPTED"
+            db.add(TournamentInvite(tournament_id=tournament.id, slot_id=slot.id, invited_user_id=user.id,
+                                    status=TournamentInviteStatus.ACCEPTED))
+        for round_number in range(1, 3):
+            db.add(TournamentRoundSchedule(tournament_id=tournament.id, round_number=round_number,
+                                           start_time=datetime.utcnow() + timedelta(days=round_number)))
+        for first, second in zip(slots[::2], slots[1::2]):
+            db.add(TournamentMatch(tournament_id=tournament.id, round_number=1, slot1_id=first.id,
+                                   slot2_id=second.id, user1_id=first.user_id, user2_id=second.user_id,
+                                   winner_id=first.user_id, status=TournamentMatchStatus.COMPLETED))
+        db.commit()
+    return _populate
+
+
+class TestSeatedParticipantConflicts:
+    """Test that schedule changes are validated against seated participants"""
+    
+    def test_all_conflicts_reported_in_one_query(self, client, auth_headers, db, captured_sql, populate, make_contest, test_user):
+        """Test that every participant x round conflict is found with a single busy-interval query"""
+        response = client.post(
+            "/api/tournaments/",
+            json={"num_participants": 64, "difficulty": 2},
+            headers=auth_headers
+        )
+        tournament = db.query(Tournament).filter(Tournament.id == uuid.UUID(response.json()["id"])).first()
+        populate(tournament)
+        players = {u.handle: u for u in db.query(User).filter(User.handle.like("player_64_%")).all()}
+        
+        base = datetime.utcnow() + timedelta(days=3)
+        times = [base + timedelta(hours=3 * i) for i in range(6)]
+        make_contest(players["player_64_1"], test_user, times[0] + timedelta(hours=1), times[0] + timedelta(hours=3),
+                     status=ContestStatus.SCHEDULED)
+        make_contest(players["player_64_40"], test_user, times[2], times[2] + timedelta(hours=2),
+                     status=ContestStatus.SCHEDULED)
+        db.commit()
+        url = f"/api/tournaments/{tournament.id}/round-schedules"
+        payload = {"round_schedules": [
+            {"round_number": i + 1, "start_time": t.isoformat()} for i, t in enumerate(times)
+        ]}
+        
+        with captured_sql() as statements:
+            response = client.put(url, json=payload, headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        detail = response.json()["detail"]
+        assert "player_64_1 (round 1" in detail
+        assert "player_64_40 (round 3" in detail
+        assert len([s for s in statements if "FROM user_busy_intervals" in s]) == 1
+        # Conflicting handles come with the intervals, not from per-row lookups
+        busy_query = next(i for i, s in enumerate(statements) if "FROM user_busy_intervals" in s)
+        assert not [s for s in statements[busy_query:] if "FROM users" in s]
+        
+        # Shifting the schedule clear of both contests is accepted
+        later = [t + timedelta(days=1) for t in times]
+        response = client.put(url, json={"round_schedules": [
+            {"round_number": i + 1, "start_time": t.isoformat()} for i, t in enumerate(later)
+        ]}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestTournamentQueryCount:
+    """Test that tournament views load the whole graph with a fixed number of queries"""
+    
+    def count_selects(self, captured_sql, request):
+        with captured_sql("SELECT") as selects:
+            response = request()
+        assert response.status_code == status.HTTP_200_OK, response.json()
+        return len(selects), response.json()
+    
+    def test_views_do_not_grow_with_tournament_size(self, client, auth_headers, db, captured_sql, populate, test_user,
+                                                    tournament_4_participants, tournament_8_participants):
+        """Test get, bracket and list cost the same for 4 and 8 participants, and for one or two tournaments"""
+        populate(tournament_4_participants)
+        populate(tournament_8_participants)
+        small_url = f"/api/tournaments/{tournament_4_participants.id}"
+        large_url = f"/api/tournaments/{tournament_8_participants.id}"
+        db.refresh(test_user)
+        
+        small, small_data = self.count_selects(captured_sql, lambda: client.get(small_url, headers=auth_headers))
+        large, large_data = self.count_selects(captured_sql, lambda: client.get(large_url, headers=auth_headers))
+        assert small == large <= 6
+        assert [s["user_handle"] for s in large_data["slots"]] == [f"player_8_{i}" for i in range(1, 9)]
+        assert all(m["winner_handle"] == m["user1_handle"] for m in large_data["matches"])
+        assert large_data["invites"][0]["slot_number"] >= 1
+        
+        bracket, bracket_data = self.count_selects(captured_sql, lambda: client.get(large_url + "/bracket", headers=auth_headers))
+        assert bracket <= 6
+        assert [len(r["matches"]) for r in bracket_data["rounds"]] == [4, 0, 0]
+        
+        listed, list_data = self.count_selects(captured_sql, lambda: client.get("/api/tournaments/", headers=auth_headers))
+        assert listed == large
+        assert {t["id"] for t in list_data} == {str(tournament_4_participants.id), str(tournament_8_participants.id)}
+
+
+class TestBracketCache:
+    """Test versioned bracket snapshots and ETag revalidation"""
+    
+    def test_revalidation_and_version_bumps(self, client, auth_headers, db, captured_sql, populate, test_user, test_user2,
+                                           tournament_4_participants):
+        """Test 304s cost no queries, and match completion and schedule edits publish a new version"""
+        from app.models import ContestScore
+        from app.submission_checker import handle_tournament_match_completion
+        
+        populate(tournament_4_participants)
+        tournament_id = tournament_4_participants.id
+        url = f"/api/tournaments/{tournament_id}/bracket"
+        match = db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament_id).order_by(TournamentMatch.id).first()
+        match.status = TournamentMatchStatus.SCHEDULED
+        match.winner_id = None
+        contest = Contest(tournament_match_id=match.id, user1_id=match.user1_id, user2_id=match.user2_id, difficulty=2,
+                          start_time=datetime.utcnow() - timedelta(hours=2), end_time=datetime.utcnow(),
+                          status=ContestStatus.COMPLETED)
+        db.add(contest)
+        db.flush()
+        match.contest_id = contest.id
+        db.add(ContestScore(contest_id=contest.id, user_id=match.user1_id, total_points=0))
+        db.add(ContestScore(contest_id=contest.id, user_id=match.user2_id, total_points=300))
+        db.commit()
+        match_id, winner_id = match.id, match.user2_id
+        
+        client.current_user_ref[0] = test_user
+        first = client.get(url, headers=auth_headers)
+        assert first.status_code == status.HTTP_200_OK
+        assert first.json()["rounds"][0]["matches"][0]["winner_id"] is None
+        etag = first.headers["etag"]
+        
+        with captured_sql() as statements:
+            cached = client.get(url, headers=auth_headers)
+            not_modified = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert cached.content == first.content
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert statements == []
+        
+        # Cached snapshots still enforce who may view the bracket
+        client.current_user_ref[0] = test_user2
+        token = create_access_token(data={"sub": str(test_user2.id)})
+        assert client.get(url, headers={"Authorization": f"Bearer {token}"}).status_code == status.HTTP_403_FORBIDDEN
+        
+        # Completing the match bumps the version
+        asyncio.run(handle_tournament_match_completion(match_id, db))
+        client.current_user_ref[0] = test_user
+        refreshed = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert refreshed.status_code == status.HTTP_200_OK
+        assert refreshed.json()["rounds"][0]["matches"][0]["winner_id"] == str(winner_id)
+        
+        # So does a schedule edit, even though the bracket body is unchanged
+        tournament_4_participants.status = TournamentStatus.PENDING
+        db.commit()
+        schedule_start = datetime.utcnow() + timedelta(days=3)
+        edited = client.put(
+            f"/api/tournaments/{tournament_id}/round-schedules",
+            json={"round_schedules": [
+                {"round_number": 1, "start_time": schedule_start.isoformat()},
+                {"round_number": 2, "start_time": (schedule_start + timedelta(hours=3)).isoformat()}
+            ]},
+            headers=auth_headers
+        )
+        assert edited.status_code == status.HTTP_200_OK
+        after_edit = client.get(url, headers={**auth_headers, "If-None-Match": refreshed.headers["etag"]})
+        assert after_edit.status_code == status.HTTP_200_OK
+        assert after_edit.content == refreshed.content
+        assert after_edit.headers["etag"] != refreshed.headers["etag"]
+    
+    def test_expired_tournaments_are_forgotten(self, monkeypatch):
+        """Test that versions and snapshots of idle tournaments are dropped, not kept forever"""
+        from starlette.requests import Request
+        from app import bracket_cache as cache_module
+        
+        clock = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: clock[0])
+        cache = cache_module.BracketCache(ttl=60)
+        request = Request({"type": "http", "headers": []})
+        viewed, written = uuid.uuid4(), uuid.uuid4()
+        
+        cache.bump(viewed)
+        cache.respond(request, viewed, "viewer", lambda: ({"rounds": []}, ["viewer"]))
+        cache.bump(written)
+        assert cache.version(viewed) == 1 and cache.version(written) == 1
+        
+        # Nothing is dropped while a snapshot is live or a bump is recent
+        clock[0] += 59
+        cache.bump(uuid.uuid4())
+        assert cache.version(viewed) == 1 and cache.version(written) == 1
+        
+        clock[0] += 60
+        latest = uuid.uuid4()
+        cache.bump(latest)
+        assert cache.version(viewed) == 0 and cache.version(written) == 0
+        assert cache._snapshots == {}
+        assert set(cache._versions) == {str(latest)}
+
+
+class TestBracketEngine:
+    """Test bracket positions, parent-index advancement and bulk round creation"""
+    
+    def test_winners_advance_to_parent_positions(self):
+        """Test that next-round pairings follow bracket positions, not match order"""
+        from app.bracket import next_round_pairings
+        
+        matches = []
+        for position in [3, 0, 2, 1]:
+            user1, user2 = uuid.uuid4(), uuid.uuid4()
+            matches.append(TournamentMatch(
+                bracket_position=position, slot1_id=uuid.uuid4(), slot2_id=uuid.uuid4(),
+                user1_id=user1, user2_id=user2, winner_id=user1 if position % 2 else user2
+            ))
+        by_position = {m.bracket_position: m for m in matches}
+        
+        pairings = next_round_pairings(matches)
+        
+        assert [p[0] for p in pairings] == [0, 1]
+        assert pairings[0][2] == by_position[0].user2_id and pairings[0][4] == by_position[1].user1_id
+        assert pairings[1][2] == by_position[2].user2_id and pairings[1][4] == by_position[3].user1_id
+        assert pairings[0][1] == by_position[0].slot2_id
+    
+    def test_1024_player_tournament(self, client, auth_headers, db, captured_sql, test_user):
+        """Test that a 1024-player round is created in a few statements and advances by position"""
+        from sqlalchemy import insert
+        from app.models import ContestScore
+        from app.submission_checker import handle_tournament_match_completion
+        
+        created = client.post("/api/tournaments/", json={"num_participants": 1024, "difficulty": 2}, headers=auth_headers)
+        assert created.status_code == status.HTTP_200_OK
+        tournament_id = uuid.UUID(created.json()["id"])
+        
+        user_rows = [{"id": uuid.uuid4(), "handle": f"bulk_{i}", "password_hash": "x", "rating": 1500, "is_confirmed": True}
+                     for i in range(1024)]
+        db.execute(insert(User), user_rows)
+        slots = db.query(TournamentSlot).filter(TournamentSlot.tournament_id == tournament_id).all()
+        for slot in slots:
+            slot.user_id = user_rows[slot.slot_number - 1]["id"]
+            slot.status = "ACCEPTED"
+        start = datetime.utcnow() + timedelta(days=1)
+        for round_number in range(1, 11):
+            db.add(TournamentRoundSchedule(tournament_id=tournament_id, round_number=round_number,
+                                           start_time=start + timedelta(hours=3 * (round_number - 1))))
+        db.commit()
+        
+        with captured_sql() as statements:
+            started = client.post(f"/api/tournaments/{tournament_id}/start", headers=auth_headers)
+        assert started.status_code == status.HTTP_200_OK, started.json()
+        writes = [s for s in statements if not s.lstrip().upper().startswith("SELECT")]
+        assert len(writes) <= 6  # tournament update + bulk match/contest/link/score/interval statements
+        
+        round1 = db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament_id).all()
+        assert sorted(m.bracket_position for m in round1) == list(range(512))
+        contests = dict(db.query(Contest.tournament_match_id, Contest.id).all())
+        assert all(contests[m.id] == m.contest_id for m in round1)
+        assert db.query(ContestScore).count() == 1024
+        
+        # Complete round 1 with the player from the even slot winning every match
+        last = max(round1, key=lambda m: m.bracket_position)
+        for match in round1:
+            if match is not last:
+                match.winner_id = match.user2_id
+                match.status = TournamentMatchStatus.COMPLETED
+        db.query(Contest).filter(Contest.id == last.contest_id).update({"status": ContestStatus.COMPLETED})
+        db.query(ContestScore).filter(
+            ContestScore.contest_id == last.contest_id, ContestScore.user_id == last.user2_id
+        ).update({"total_points": 100})
+        db.commit()
+        
+        asyncio.run(handle_tournament_match_completion(last.id, db))
+        
+        round2 = db.query(TournamentMatch).filter(
+            TournamentMatch.tournament_id == tournament_id, TournamentMatch.round_number == 2
+        ).order_by(TournamentMatch.bracket_position).all()
+        assert len(round2) == 256
+        slot_user = {slot.slot_number: slot.user_id for slot in slots}
+        assert [(m.user1_id, m.user2_id) for m in round2[:2]] == [
+            (slot_user[2], slot_user[4]), (slot_user[6], slot_user[8])
+        ]
+        assert round2[-1].bracket_position == 255 and round2[-1].contest_id is not None
+
+
+class TestSwiss:
+    """Test the Swiss format and its pairing engine"""
+    
+    def test_pairing_backtracks_instead_of_rematching(self):
+        """Test that a dead end left by greedy pairing is resolved by backtracking"""
+        from app.swiss import pair_players
+        
+        # Greedy pairs a-c, leaving b-d, who have already met
+        opponents = {"a": {"b"}, "b": {"a", "d"}, "d": {"b"}}
+        assert pair_players(["a", "b", "c", "d"], opponents) == [(0, 3), (1, 2)]
+        # Everyone has met everyone: no rematch-free pairing exists
+        everyone = {p: {"a", "b", "c", "d"} - {p} for p in "abcd"}
+        assert pair_players(["a", "b", "c", "d"], everyone) is None
+    
+    def test_1024_players_pair_fast_without_rematches(self):
+        """Test ten simulated rounds of 1024 players: no rematches and each round paired well under a second"""
+        import random
+        import time
+        from types import SimpleNamespace
+        from app.swiss import swiss_pairings, tally
+        
+        rng = random.Random(7)
+        slots = [SimpleNamespace(id=i, slot_number=i + 1, user_id=f"u{i}") for i in range(1024)]
+        matches = []
+        for round_number in range(1, 11):
+            scores, _ = tally(matches)
+            started = time.perf_counter()
+            pairings = swiss_pairings(slots, matches)
+            assert time.perf_counter() - started < 0.5
+            
+            assert len(pairings) == 512
+            seen = {p for pairing in pairings for p in (pairing[2], pairing[4])}
+            assert len(seen) == 1024
+            met = {frozenset((m.user1_id, m.user2_id)) for m in matches}
+            assert not any(frozenset((p[2], p[4])) in met for p in pairings)
+            # Only players floating out of odd-sized score groups meet a different score
+            same_score = sum(scores.get(p[2], 0) == scores.get(p[4], 0) for p in pairings)
+            assert same_score >= 480
+            
+            for board, _, user1, _, user2 in pairings:
+                outcome = rng.random()
+                winner = None if outcome < 0.1 else (user1 if outcome < 0.55 else user2)
+                matches.append(SimpleNamespace(user1_id=user1, user2_id=user2, winner_id=winner,
+                                               status=TournamentMatchStatus.COMPLETED))
+    
+    def test_create_swiss_tournament(self, client, auth_headers):
+        """Test Swiss sizes, default and explicit round counts, and rejected configurations"""
+        response = client.post("/api/tournaments/", json={"num_participants": 6, "difficulty": 2, "format": "swiss"},
+                               headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["format"] == "swiss"
+        assert response.json()["num_rounds"] == 3
+        assert len(response.json()["slots"]) == 6
+        
+        response = client.post("/api/tournaments/", json={"num_participants": 100, "difficulty": 2, "format": "swiss",
+                                                          "num_rounds": 9}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["num_rounds"] == 9
+        
+        for payload in (
+            {"num_participants": 7, "format": "swiss"},
+            {"num_participants": 6, "format": "swiss", "num_rounds": 6},
+            {"num_participants": 8, "num_rounds": 3},
+            {"num_participants": 8, "format": "round_robin"},
+        ):
+            response = client.post("/api/tournaments/", json={"difficulty": 2, **payload}, headers=auth_headers)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST, payload
+    
+    def test_swiss_rounds_repair_by_score(self, client, auth_headers, db, populate):
+        """Test that after a round every player is re-paired by score and standings are reported"""
+        from app.models import ContestScore
+        from app.submission_checker import handle_tournament_match_completion
+        
+        created = client.post("/api/tournaments/", json={"num_participants": 6, "difficulty": 2, "format": "swiss"},
+                              headers=auth_headers)
+        tournament = db.query(Tournament).filter(Tournament.id == uuid.UUID(created.json()["id"])).first()
+        populate(tournament)
+        # populate plays a round 1 of its own; start from a clean slate with 3 rounds scheduled
+        db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament.id).delete()
+        db.add(TournamentRoundSchedule(tournament_id=tournament.id, round_number=3,
+                                       start_time=datetime.utcnow() + timedelta(days=3)))
+        db.commit()
+        
+        started = client.post(f"/api/tournaments/{tournament.id}/start", headers=auth_headers)
+        assert started.status_code == status.HTTP_200_OK, started.json()
+        round1 = db.query(TournamentMatch).filter(TournamentMatch.tournament_id == tournament.id).order_by(
+            TournamentMatch.bracket_position).all()
+        slots = {slot.user_id: slot.slot_number for slot in tournament.slots}
+        assert [(slots[m.user1_id], slots[m.user2_id]) for m in round1] == [(1, 2), (3, 4), (5, 6)]
+        
+        # Board 0 is a draw, the lower seeds win boards 1 and 2
+        for match, points in zip(round1, [(50, 50), (0, 100), (0, 100)]):
+            db.query(Contest).filter(Contest.id == match.contest_id).update({"status": ContestStatus.COMPLETED})
+            for user_id, total in zip((match.user1_id, match.user2_id), points):
+                db.query(ContestScore).filter(
+                    ContestScore.contest_id == match.contest_id, ContestScore.user_id == user_id
+                ).update({"total_points": total})
+        db.commit()
+        for match in round1:
+            asyncio.run(handle_tournament_match_completion(match.id, db))
+        
+        db.expire_all()
+        assert db.query(TournamentMatch).filter(TournamentMatch.id == round1[0].id).one().winner_id is None
+        round2 = db.query(TournamentMatch).filter(
+            TournamentMatch.tournament_id == tournament.id, TournamentMatch.round_number == 2
+        ).order_by(TournamentMatch.bracket_position).all()
+        # Winners 4 and 6 meet; drawn 1 and 2 cannot rematch, so each meets a loser
+        assert [(slots[m.user1_id], slots[m.user2_id]) for m in round2] == [(4, 6), (1, 3), (2, 5)]
+        
+        bracket = client.get(f"/api/tournaments/{tournament.id}/bracket", headers=auth_headers).json()
+        assert bracket["format"] == "swiss"
+        assert [len(r["matches"]) for r in bracket["rounds"]] == [3, 3, 0]
+        standings = bracket["standings"]
+        assert [row["points"] for row in standings] == [1, 1, 0.5, 0.5, 0, 0]
+        assert standings[0]["user_handle"] == "player_6_4" and standings[0]["wins"] == 1
+
+
+class TestSharedRoundProblems:
+    """Test round-level problem sets"""
+    
+    def test_solved_cache_drops_expired_entries(self, monkeypatch):
+        """Test that caching a handle's solved set evicts entries past their TTL"""
+        from app import codeforces_api
+        
+        api = codeforces_api.CodeforcesAPI()
+        clock = [1000.0]
+        monkeypatch.setattr(codeforces_api.time, "monotonic", lambda: clock[0])
+        
+        async def submissions(handle):
+            return [{"verdict": "OK", "problem": {"contestId": 1, "index": "A"}}]
+        
+        monkeypatch.setattr(api, "get_user_submissions", submissions)
+        asyncio.run(api.get_user_solved_problems("old"))
+        clock[0] += codeforces_api.SOLVED_CACHE_SECONDS - 1
+        asyncio.run(api.get_user_solved_problems("recent"))
+        assert set(api._solved_cache) == {"old", "recent"}
+        
+        clock[0] += 1
+        asyncio.run(api.get_user_solved_problems("new"))
+        assert set(api._solved_cache) == {"recent", "new"}
+    
+    def test_selection_excludes_every_players_solves(self, monkeypatch):
+        """Test that a round set avoids problems solved by any of the players"""
+        from app import problem_selector
+        
+        solved = {"a": {"100A"}, "b": {"101A"}, "c": set()}
+        
+        async def fake_solved(handle):
+            return solved[handle]
+        
+        async def fake_problems():
+            return {"problems": [{"contestId": c, "index": "A", "rating": 900} for c in (100, 101, 102)],
+                    "problemStatistics": []}
+        
+        async def fake_contests():
+            return [{"id": c, "name": f"Codeforces Round {c} (Div. 3)"} for c in (100, 101, 102)]
+        
+        monkeypatch.setattr(problem_selector.cf_api, "get_user_solved_problems", fake_solved)
+        monkeypatch.setattr(problem_selector.cf_api, "get_problems", fake_problems)
+        monkeypatch.setattr(problem_selector.cf_api, "get_contest_list", fake_contests)
+        
+        problems = asyncio.run(problem_selector.get_problems_unsolved_by(["a", "b", "c"], 2))
+        assert [p["problem_code"] for p in problems] == ["102A"]
+    
+    def test_round_selects_one_set_for_all_contests(self, client, auth_headers, db, monkeypatch):
+        """Test that a round's set is selected once and copied into every contest of the round"""
+        from sqlalchemy import insert
+        from app import submission_checker
+        from app.models import ContestProblem, TournamentRoundProblem
+        
+        created = client.post("/api/tournaments/", json={"num_participants": 8, "difficulty": 2, "shared_problems": True},
+                              headers=auth_headers)
+        assert created.status_code == status.HTTP_200_OK
+        assert created.json()["shared_problems"] is True
+        tournament_id = uuid.UUID(created.json()["id"])
+        
+        user_rows = [{"id": uuid.uuid4(), "handle": f"shared_{i}", "password_hash": "x", "rating": 1500, "is_confirmed": True}
+                     for i in range(8)]
+        db.execute(insert(User), user_rows)
+        for slot in db.query(TournamentSlot).filter(TournamentSlot.tournament_id == tournament_id).all():
+            slot.user_id = user_rows[slot.slot_number - 1]["id"]
+            slot.status = "ACCEPTED"
+        start = datetime.utcnow() + timedelta(days=1)
+        for round_number in range(1, 4):
+            db.add(TournamentRoundSchedule(tournament_id=tournament_id, round_number=round_number,
+                                           start_time=start + timedelta(hours=3 * (round_number - 1))))
+        db.commit()
+        assert client.post(f"/api/tournaments/{tournament_id}/start", headers=auth_headers).status_code == status.HTTP_200_OK
+        
+        calls = []
+        
+        async def fake_select(handles, difficulty):
+            calls.append(sorted(handles))
+            return [
+                {"problem_index": index, "problem_code": f"1900{index}", "problem_url": f"https://codeforces.com/problemset/problem/1900/{index}",
+                 "points": 100 * (n + 1), "division": 3}
+                for n, index in enumerate("ABCDEF")
+            ]
+        
+        monkeypatch.setattr(submission_checker, "get_problems_unsolved_by", fake_select)
+        served = asyncio.run(submission_checker.select_round_problems(tournament_id, 1, db))
+        db.commit()
+        
+        assert len(served) == 4
+        assert calls == [sorted(row["handle"] for row in user_rows)]
+        round_problems = {p.id: p.problem_code for p in db.query(TournamentRoundProblem).all()}
+        assert len(round_problems) == 6
+        contest_problems = db.query(ContestProblem).filter(ContestProblem.contest_id.in_(served)).all()
+        assert len(contest_problems) == 24
+        assert all(round_problems[p.round_problem_id] == p.problem_code for p in contest_problems)
+        
+        # Already served: nothing is selected or copied again
+        assert asyncio.run(submission_checker.select_round_problems(tournament_id, 1, db)) == []
+        assert len(calls) == 1
+
+
+def complete_round_one_with_conflict(db):
+    """
+    Start a 4-player elimination tournament, book a round 1 winner into an
+    ordinary contest overlapping round 2, then complete round 1. Returns the
+    round 1 winner and the conflicting contest.
+    """
+    from app.bracket import create_round, round_one_pairings
+    from app.busy_intervals import add_busy_intervals
+    from app.submission_checker import handle_tournament_match_completion
+    
+    users = [User(id=uuid.uuid4(), handle=f"round_two_{i}", password_hash="x", rating=1500, is_confirmed=True)
+             for i in range(5)]
+    db.add_all(users)
+    tournament = Tournament(id=uuid.uuid4(), creator_id=users[0].id, num_participants=4, difficulty=2,
+                            status=TournamentStatus.ACTIVE)
+    db.add(tournament)
+    db.flush()
+    slots = [TournamentSlot(id=uuid.uuid4(), tournament_id=tournament.id, slot_number=i + 1, user_id=user.id,
+                            status="ACCEPTED") for i, user in enumerate(users[:4])]
+    db.add_all(slots)
+    round1_start = datetime.utcnow() - timedelta(hours=3)
+    round2_start = datetime.utcnow() + timedelta(days=1)
+    db.add(TournamentRoundSchedule(tournament_id=tournament.id, round_number=1, start_time=round1_start))
+    db.add(TournamentRoundSchedule(tournament_id=tournament.id, round_number=2, start_time=round2_start))
+    db.flush()
+    round1 = create_round(tournament, 1, round_one_pairings(slots), round1_start, db)
+    
+    # Booked while round 1 was being played: overlaps the second hour of round 2
+    winner = users[0]
+    conflicting = Contest(id=uuid.uuid4(), user1_id=winner.id, user2_id=users[4].id, difficulty=2,
+                          start_time=round2_start + timedelta(hours=1), end_time=round2_start + timedelta(hours=3),
+                          status=ContestStatus.SCHEDULED)
+    db.add(conflicting)
+    db.flush()
+    add_busy_intervals([conflicting], db)
+    db.query(Contest).filter(Contest.tournament_match_id.in_(round1)).update(
+        {"status": ContestStatus.COMPLETED}, synchronize_session=False
+    )
+    db.commit()
+    
+    # Nobody scored, so slot 1 and slot 3 win
+    for match_id in round1:
+        asyncio.run(handle_tournament_match_completion(match_id, db))
+    return tournament, winner, conflicting
+
+
+class TestRoundReservations:
+    """Test that tournament rounds and other contests cannot double-book a player"""
+    
+    def test_round_two_generated_despite_conflict(self, db):
+        """Test that a booking overlapping round 2 does not stop round 2 from being created"""
+        from app.models import UserBusyInterval
+        
+        tournament, winner, conflicting = complete_round_one_with_conflict(db)
+        
+        round2 = db.query(TournamentMatch).filter(
+            TournamentMatch.tournament_id == tournament.id, TournamentMatch.round_number == 2
+        ).all()
+        assert len(round2) == 1
+        assert round2[0].user1_id == winner.id
+        booked = {row[0] for row in db.query(UserBusyInterval.contest_id).filter(UserBusyInterval.user_id == winner.id)}
+        assert {round2[0].contest_id, conflicting.id} <= booked
+    
+    def test_challenges_avoid_scheduled_rounds(self, client, auth_headers, db, tournament_4_participants,
+                                               test_user, test_user2, test_user3):
+        """Test that a seat holds every scheduled round until its player is knocked out"""
+        slots = db.query(TournamentSlot).filter(
+            TournamentSlot.tournament_id == tournament_4_participants.id
+        ).order_by(TournamentSlot.slot_number).all()
+        slots[0].user_id, slots[1].user_id = test_user2.id, test_user3.id
+        round2_start = datetime.utcnow() + timedelta(days=2)
+        db.add(TournamentRoundSchedule(tournament_id=tournament_4_participants.id, round_number=1,
+                                       start_time=datetime.utcnow() + timedelta(days=1)))
+        db.add(TournamentRoundSchedule(tournament_id=tournament_4_participants.id, round_number=2,
+                                       start_time=round2_start))
+        db.commit()
+        
+        challenge = {"challenged_user_id": str(test_user2.id), "difficulty": 2,
+                     "suggested_start_time": (round2_start + timedelta(hours=1)).isoformat()}
+        response = client.post("/api/challenges/", json=challenge, headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "testuser2 has tournament round 2 scheduled" in response.json()["detail"]
+        
+        # Right after the round ends is fine
+        client.current_user_ref[0] = test_user3
+        after = {**challenge, "suggested_start_time": (round2_start + timedelta(hours=2)).isoformat()}
+        assert client.post("/api/challenges/", json=after, headers=auth_headers).status_code == status.HTTP_200_OK
+        
+        # Losing round 1 frees the later rounds of an elimination tournament; winning keeps them
+        tournament_4_participants.status = TournamentStatus.ACTIVE
+        db.add(TournamentMatch(tournament_id=tournament_4_participants.id, round_number=1, slot1_id=slots[0].id,
+                               slot2_id=slots[1].id, user1_id=test_user2.id, user2_id=test_user3.id,
+                               winner_id=test_user3.id, status=TournamentMatchStatus.COMPLETED))
+        db.commit()
+        winner_busy = {**challenge, "challenged_user_id": str(test_user.id)}
+        response = client.post("/api/challenges/", json=winner_busy, headers=auth_headers)
+        assert "testuser3 has tournament round 2 scheduled" in response.json()["detail"]
+        
+        client.current_user_ref[0] = test_user
+        assert client.post("/api/challenges/", json=challenge, headers=auth_headers).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+class TestPostgresBusyIntervals:
+    """Test the busy-interval exclusion constraint on a real PostgreSQL database"""
+    
+    @pytest.fixture
+    def pg_db(self):
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.orm import sessionmaker
+        from app.database import Base
+        from app.migrations import BUSY_INTERVAL_CONSTRAINT, ensure_busy_interval_constraint
+        
+        pg_engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+        Base.metadata.create_all(bind=pg_engine)
+        # Start from the constraint as it was before tournament rows were exempt
+        with pg_engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+            conn.execute(text(f"""
+                ALTER TABLE user_busy_intervals
+                ADD CONSTRAINT {BUSY_INTERVAL_CONSTRAINT}
+                EXCLUDE USING gist (user_id WITH =, tsrange(start_time, end_time) WITH &&)
+            """))
+        ensure_busy_interval_constraint(pg_engine)
+        ensure_busy_interval_constraint(pg_engine)
+        session = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)()
+        try:
+            yield session
+        finally:
+            session.close()
+            Base.metadata.drop_all(bind=pg_engine)
+            pg_engine.dispose()
+    
+    def test_round_two_generated_despite_conflict(self, pg_db):
+        """Test that the constraint does not reject a round overlapping an earlier booking"""
+        tournament, winner, _ = complete_round_one_with_conflict(pg_db)
+        round2 = pg_db.query(TournamentMatch).filter(
+            TournamentMatch.tournament_id == tournament.id, TournamentMatch.round_number == 2
+        ).all()
+        assert [m.user1_id for m in round2] == [winner.id]
+    
+    def test_overlapping_contests_still_rejected(self, pg_db):
+        """Test that two overlapping non-tournament bookings of one user are rejected"""
+        from sqlalchemy.exc import IntegrityError
+        from app.busy_intervals import add_busy_intervals
+        
+        users = [User(id=uuid.uuid4(), handle=f"overlap_{i}", password_hash="x", rating=1500, is_confirmed=True)
+                 for i in range(3)]
+        pg_db.add_all(users)
+        start = datetime.utcnow() + timedelta(days=1)
+        first = Contest(id=uuid.uuid4(), user1_id=users[0].id, user2_id=users[1].id, difficulty=2,
+                        start_time=start, end_time=start + timedelta(hours=2), status=ContestStatus.SCHEDULED)
+        second = Contest(id=uuid.uuid4(), user1_id=users[0].id, user2_id=users[2].id, difficulty=2,
+                         start_time=start + timedelta(hours=1), end_time=start + timedelta(hours=3),
+                         status=ContestStatus.SCHEDULED)
+        pg_db.add_all([first, second])
+        pg_db.flush()
+        add_busy_intervals([first], pg_db)
+        with pytest.raises(IntegrityError):
+            add_busy_intervals([second], pg_db)
+            pg_db.flush()
+        pg_db.rollback()
@@ -0,0 +1,227 @@
+"""
+Tests for user profiles, materialized user statistics, head-to-head records, the leaderboard and handle search
+"""
+import random
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from fastapi import status
+
+from app.handle_search import HandleIndex, handle_index
+from app.leaderboard import RankIndex
+from app.models import ContestStatus, User, UserStats
+from app.submission_checker import apply_ratings_batch
+from app.user_stats import backfill_user_stats, backfill_head_to_head, load_user_stats
+
+
+class TestUserStats:
+    """Test incremental maintenance and backfill of user_stats"""
+    
+    @pytest.fixture
+    def history(self, db, make_contest, test_user, test_user2, test_user3):
+        """Four completed contests for test_user: W, W, D, L (oldest first)"""
+        now = datetime.utcnow()
+        results = [(test_user2, (300, 100)), (test_user3, (200, 0)), (test_user2, (100, 100)), (test_user3, (0, 500))]
+        contests = []
+        for i, (opponent, points) in enumerate(results):
+            start = now - timedelta(days=10 - i)
+            contests.append(make_contest(test_user, opponent, start, start + timedelta(hours=2),
+                                         status=ContestStatus.COMPLETED, points=points))
+        return contests
+    
+    def test_incremental_updates(self, db, history, test_user, test_user2):
+        """Test that rating each contest folds its result into user_stats"""
+        for contest in history:
+            apply_ratings_batch([contest.id], db)
+        
+        stats = load_user_stats([test_user.id, test_user2.id], db)
+        mine = stats[test_user.id]
+        assert (mine["total_contests"], mine["wins"], mine["losses"], mine["draws"]) == (4, 2, 1, 1)
+        assert mine["longest_win_streak"] == 2
+        assert mine["current_win_streak"] == 0
+        assert mine["best_rating"] > 1500
+        assert (stats[test_user2.id]["losses"], stats[test_user2.id]["draws"]) == (1, 1)
+    
+    def test_backfill_matches_incremental(self, db, history, test_user, test_user2, test_user3):
+        """Test that the backfill rebuilds the same rows as incremental maintenance"""
+        apply_ratings_batch([c.id for c in history], db)
+        user_ids = [test_user.id, test_user2.id, test_user3.id]
+        incremental = load_user_stats(user_ids, db)
+        
+        db.query(UserStats).delete()
+        db.commit()
+        assert backfill_user_stats(db) == 3
+        assert load_user_stats(user_ids, db) == incremental
+    
+    def test_profile_reads_stats_in_one_query(self, client, db, captured_sql, history, test_user):
+        """Test that the profile endpoint no longer scans contest history"""
+        apply_ratings_batch([c.id for c in history], db)
+        url = f"/api/users/{test_user.handle}/profile"
+        db.expire_all()
+        
+        with captured_sql("SELECT") as selects:
+            response = client.get(url)
+        
+        assert response.status_code == status.HTTP_200_OK
+        profile = response.json()
+        assert (profile["total_contests"], profile["wins"], profile["losses"], profile["draws"]) == (4, 2, 1, 1)
+        assert profile["win_rate"] == 50.0
+        assert profile["longest_win_streak"] == 2
+        assert len(selects) == 1
+    
+    def test_profile_without_contests(self, client, test_user3):
+        """Test that users without a stats row get zeroed stats"""
+        response = client.get(f"/api/users/{test_user3.handle}/profile")
+        
+        assert response.status_code == status.HTTP_200_OK
+        profile = response.json()
+        assert profile["total_contests"] == 0
+        assert profile["best_rating"] == 1300
+
+
+class TestHeadToHead:
+    """Test materialized head-to-head records"""
+    
+    def test_records_maintained_and_batched(self, client, db, captured_sql, auth_headers, make_contest, test_user, test_user2, test_user3):
+        """Test that rated contests update the pair record and the endpoint answers a batch in one query"""
+        now = datetime.utcnow()
+        results = [(test_user, test_user2, (300, 0)), (test_user2, test_user, (200, 100)),
+                   (test_user, test_user2, (100, 100)), (test_user3, test_user, (0, 400))]
+        for i, (user1, user2, points) in enumerate(results):
+            start = now - timedelta(days=10 - i)
+            contest = make_contest(user1, user2, start, start + timedelta(hours=2),
+                                   status=ContestStatus.COMPLETED, points=points)
+            apply_ratings_batch([contest.id], db)
+        db.refresh(test_user)  # the authenticated user is already loaded in a real request
+        
+        url = f"/api/users/me/head-to-head?opponent_ids={test_user2.id}&opponent_ids={test_user3.id}"
+        with captured_sql("SELECT") as selects:
+            response = client.get(url, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        vs_user2, vs_user3 = response.json()
+        assert (vs_user2["wins"], vs_user2["losses"], vs_user2["draws"]) == (1, 1, 1)
+        assert (vs_user3["wins"], vs_user3["losses"], vs_user3["draws"]) == (1, 0, 0)
+        assert vs_user2["total_contests"] == 3
+        assert len(selects) == 1
+    
+    def test_backfill_and_unplayed_opponents(self, client, db, auth_headers, make_contest, test_user, test_user2, test_user3):
+        """Test the backfill rebuild and zero records for opponents never played"""
+        now = datetime.utcnow()
+        make_contest(test_user2, test_user, now - timedelta(days=2), now - timedelta(days=2) + timedelta(hours=2),
+                     status=ContestStatus.COMPLETED, points=(0, 100))
+        
+        assert backfill_head_to_head(db) == 1
+        
+        response = client.get(
+            f"/api/users/me/head-to-head?opponent_ids={test_user3.id}&opponent_ids={test_user2.id}",
+            headers=auth_headers
+        )
+        vs_user3, vs_user2 = response.json()
+        assert vs_user3["total_contests"] == 0
+        assert vs_user3["last_played_at"] is None
+        assert (vs_user2["wins"], vs_user2["losses"]) == (1, 0)
+
+
+class TestLeaderboard:
+    """Test the rank-indexed leaderboard"""
+    
+    def test_index_matches_sorted_order(self):
+        """Test pages and ranks against a plain sort after random rating moves"""
+        index = RankIndex()
+        rng = random.Random(7)
+        users = [(str(uuid.uuid4()), f"user{i}", rng.randint(800, 2000)) for i in range(500)]
+        index._build(users)
+        index._loaded_at = 0
+        for _ in range(200):
+            key = rng.choice(list(index.rating_of))
+            index.upsert(uuid.UUID(key), index.handle_of[key], rng.randint(-1500, 4500))
+        
+        expected = sorted(index.rating_of.items(), key=lambda kv: (-kv[1], kv[0]))
+        for offset in (0, 37, 250, 490, 500):
+            page = index.page(offset, 20)
+            assert [(str(user_id), rating) for _, user_id, _, rating in page] == expected[offset:offset + 20]
+            assert [rank for rank, _, _, _ in page] == list(range(offset + 1, offset + 1 + len(page)))
+        for position, (key, _) in enumerate(expected, start=1):
+            assert index.rank_of(key) == position
+    
+    def test_endpoints_follow_rating_updates(self, client, db, auth_headers_user3, make_contest, test_user, test_user2, test_user3):
+        """Test page, rank-of-user and around-me before and after ratings change"""
+        board = client.get("/api/users/leaderboard").json()
+        assert [e["handle"] for e in board] == ["testuser", "testuser2", "testuser3"]
+        
+        rank = client.get("/api/users/testuser3/rank").json()
+        assert (rank["rank"], rank["total_users"]) == (3, 3)
+        
+        # testuser3 (1300) beats testuser (1500) twice
+        now = datetime.utcnow()
+        for i in range(2):
+            contest = make_contest(test_user3, test_user, now - timedelta(days=3 - i), now - timedelta(days=3 - i) + timedelta(hours=2),
+                                   status=ContestStatus.COMPLETED, points=(500, 0))
+            apply_ratings_batch([contest.id], db)
+        ratings = {u.handle: u.rating for u in db.query(User).all()}
+        expected = sorted(ratings, key=lambda h: -ratings[h])
+        
+        assert client.get("/api/users/testuser3/rank").json()["rank"] == expected.index("testuser3") + 1
+        around = client.get("/api/users/leaderboard/around-me?radius=1", headers=auth_headers_user3).json()
+        assert "testuser3" in [e["handle"] for e in around]
+        assert [e["rating"] for e in around] == sorted((e["rating"] for e in around), reverse=True)
+        
+        assert client.get("/api/users/nobody/rank").status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_registration_refreshes_cached_pages(self, client, monkeypatch, test_user, test_user2):
+        """Test that a newly registered user appears on a leaderboard page that was already cached"""
+        first = client.get("/api/users/leaderboard")
+        assert [e["handle"] for e in first.json()] == ["testuser", "testuser2"]
+        
+        async def valid_handle(handle):
+            return True
+        
+        monkeypatch.setattr("app.routers.auth.cf_api.validate_handle", valid_handle)
+        registered = client.post("/api/auth/register", json={"handle": "newcomer", "password": "secret123"})
+        assert registered.status_code == status.HTTP_200_OK
+        
+        second = client.get("/api/users/leaderboard")
+        assert "newcomer" in [e["handle"] for e in second.json()]
+        assert second.headers["etag"] != first.headers["etag"]
+
+
+class TestHandleSearch:
+    """Test the handle search index behind /api/users/search"""
+    
+    def test_index_ranks_prefix_matches_first(self):
+        """Test prefix-first ordering, substring matching and exclusion"""
+        index = HandleIndex()
+        index._loaded_at = 0
+        handles = ["tourist", "Petr", "the_tourist", "touristic", "xtou", "ecnerwala", "tou"]
+        ids = {handle: uuid.uuid4() for handle in handles}
+        for handle in handles:
+            index.add(ids[handle], handle, 1000)
+        
+        assert [u["handle"] for u in index.search("TOU", 10)] == ["tou", "tourist", "touristic", "the_tourist", "xtou"]
+        assert [u["handle"] for u in index.search("tou", 2)] == ["tou", "tourist"]
+        assert [u["handle"] for u in index.search("tou", 10, exclude_id=ids["tou"])][:1] == ["tourist"]
+        # Substring matches need at least three characters
+        assert [u["handle"] for u in index.search("ou", 10)] == []
+        assert [u["handle"] for u in index.search("p", 10)] == ["Petr"]
+        assert index.search("rwal", 10)[0]["id"] == ids["ecnerwala"]
+    
+    def test_search_endpoint_and_registration(self, client, db, auth_headers, test_user, test_user2, test_user3):
+        """Test that the endpoint excludes the caller and sees users added after loading"""
+        response = client.get("/api/users/search?q=testuser", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert [u["handle"] for u in response.json()] == ["testuser2", "testuser3"]
+        
+        newcomer = User(id=uuid.uuid4(), handle="xtestuser", password_hash="x", rating=1000, is_confirmed=True)
+        db.add(newcomer)
+        db.commit()
+        handle_index.add(newcomer.id, newcomer.handle, newcomer.rating)
+        
+        handles = [u["handle"] for u in client.get("/api/users/search?q=testuser", headers=auth_headers).json()]
+        assert handles == ["testuser2", "testuser3", "xtestuser"]
+    
+    def test_blank_query_matches_nobody(self, client, auth_headers, test_user, test_user2):
+        """Test that a whitespace-only query returns no users instead of every handle"""
+        response = client.get("/api/users/search", params={"q": "   "}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
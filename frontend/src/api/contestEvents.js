@@ -0,0 +1,78 @@
+import { API_BASE_URL } from '../utils/constants';
+
+const RECONNECT_DELAY_MS = 3000;
+
+// Parse one SSE frame ("event: x\ndata: {...}") into { event, data }; comments are skipped
+const parseFrame = (frame) => {
+  let event = 'message';
+  const data = [];
+  for (const line of frame.split('\n')) {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trim());
+    }
+  }
+  return data.length ? { event, data: JSON.parse(data.join('\n')) } : null;
+};
+
+/**
+ * Stream live updates of a contest from GET /api/contests/{id}/events.
+ *
+ * EventSource cannot send the Authorization header, so the stream is read
+ * with fetch. onEvent(event, data) receives "snapshot", "solve", "scores",
+ * "problems" and "status" events; a dropped connection is reopened (and
+ * starts again with a fresh snapshot) until the contest completes.
+ * Returns a function that closes the stream.
+ */
+export const subscribeContestEvents = (contestId, onEvent, onError) => {
+  let closed = false;
+  let controller = null;
+  let retry = null;
+
+  const connect = async () => {
+    controller = new AbortController();
+    let completed = false;
+    try {
+      const token = localStorage.getItem('token');
+      const response = await fetch(`${API_BASE_URL}/api/contests/${contestId}/events`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+        signal: controller.signal,
+      });
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        closed = true;
+        onError?.(body.detail || 'Failed to load contest', response.status);
+        return;
+      }
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const parsed = parseFrame(buffer.slice(0, boundary));
+          buffer = buffer.slice(boundary + 2);
+          if (!parsed) continue;
+          onEvent(parsed.event, parsed.data);
+          if (parsed.data?.status === 'completed') completed = true;
+        }
+      }
+    } catch (err) {
+      if (err.name === 'AbortError') return;
+    }
+    if (!closed && !completed) {
+      retry = setTimeout(connect, RECONNECT_DELAY_MS);
+    }
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    controller?.abort();
+  };
+};
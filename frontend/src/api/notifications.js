@@ -0,0 +1,44 @@
+import { API_BASE_URL } from '../utils/constants';
+
+const RECONNECT_DELAY_MS = 5000;
+
+/**
+ * Receive per-user notifications from the /api/notifications/ws WebSocket.
+ *
+ * The socket cannot carry the Authorization header, so the token is sent as
+ * the first message. onEvent(event, data) gets "ready" on every (re)connect,
+ * then challenge_received, pending_challenges, challenge_accepted,
+ * tournament_invite, confirmed and contest_starting. Dropped connections are
+ * reopened; a rejected token is not retried. Returns a function that closes
+ * the socket.
+ */
+export const subscribeNotifications = (onEvent) => {
+  let closed = false;
+  let socket = null;
+  let retry = null;
+
+  const connect = () => {
+    const token = localStorage.getItem('token');
+    if (!token) return;
+
+    socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/api/notifications/ws`);
+    socket.onopen = () => socket.send(JSON.stringify({ token }));
+    socket.onmessage = (message) => {
+      const { event, data } = JSON.parse(message.data);
+      onEvent(event, data);
+    };
+    socket.onclose = (close) => {
+      // 1008: the token was rejected
+      if (!closed && close.code !== 1008) {
+        retry = setTimeout(connect, RECONNECT_DELAY_MS);
+      }
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    socket?.close();
+  };
+};
@@ -1,7 +1,8 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
 import apiClient from '../../api/client';
+import { subscribeNotifications } from '../../api/notifications';
 import './Auth.css';
 import './ConfirmationScreen.css';
 
@@ -14,27 +15,33 @@ const ConfirmationScreen = ({ registrationData }) => {
   const [checking, setChecking] = useState(true);
   
   const problemLink = registrationData?.problem_link || 'https://codeforces.com/problemset/problem/4/A';
-  const deadline = registrationData?.deadline ? new Date(registrationData.deadline) : null;
+  // Memoized so the effect below (and its socket) isn't recreated on every countdown tick
+  const deadline = useMemo(
+    () => (registrationData?.deadline ? new Date(registrationData.deadline) : null),
+    [registrationData?.deadline]
+  );
 
   useEffect(() => {
     if (!deadline) return;
 
+    const handleConfirmed = () => {
+      setChecking(false);
+      setIsConfirmed(true);
+      // Redirect to login with success message after showing success state
+      setTimeout(() => {
+        navigate('/login', { 
+          state: { message: 'Account confirmed successfully! Please log in with your credentials.' } 
+        });
+      }, 3000);
+    };
+
     const checkStatus = async () => {
       try {
         const response = await apiClient.get('/api/auth/confirmation-status');
         const data = response.data;
         
-        setIsConfirmed(data.is_confirmed);
-        
         if (data.is_confirmed) {
-          setChecking(false);
-          setIsConfirmed(true);
-          // Redirect to login with success message after showing success state
-          setTimeout(() => {
-            navigate('/login', { 
-              state: { message: 'Account confirmed successfully! Please log in with your credentials.' } 
-            });
-          }, 3000);
+          handleConfirmed();
           return;
         }
 
@@ -59,8 +66,12 @@ const ConfirmationScreen = ({ registrationData }) => {
     // Check immediately
     checkStatus();
 
-    // Poll every 5 seconds
-    const interval = setInterval(checkStatus, 5000);
+    // The server pushes "confirmed"; "ready" carries the status on every (re)connect
+    const closeNotifications = isConfirmed ? null : subscribeNotifications((event, data) => {
+      if (event === 'confirmed' || (event === 'ready' && data.is_confirmed)) {
+        handleConfirmed();
+      }
+    });
 
     // Update countdown every second
     const countdownInterval = setInterval(() => {
@@ -76,7 +87,7 @@ const ConfirmationScreen = ({ registrationData }) => {
     }, 1000);
 
     return () => {
-      clearInterval(interval);
+      closeNotifications?.();
       clearInterval(countdownInterval);
     };
   }, [deadline, isConfirmed, navigate]);
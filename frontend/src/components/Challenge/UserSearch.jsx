@@ -8,8 +8,28 @@ const UserSearch = ({ onSelect, selectedUser }) => {
   const [loading, setLoading] = useState(false);
   const [showDropdown, setShowDropdown] = useState(false);
   const [error, setError] = useState('');
+  const [records, setRecords] = useState({});
   const dropdownRef = useRef(null);
 
+  // Fetch the current user's record against every search result in one request
+  const fetchHeadToHead = async (found) => {
+    if (found.length === 0) {
+      return;
+    }
+    try {
+      const params = new URLSearchParams();
+      found.forEach((user) => params.append('opponent_ids', user.id));
+      const response = await apiClient.get(`/api/users/me/head-to-head?${params.toString()}`);
+      const byOpponent = {};
+      response.data.forEach((record) => {
+        byOpponent[record.opponent_id] = record;
+      });
+      setRecords(byOpponent);
+    } catch (err) {
+      console.error('Error fetching head-to-head records:', err);
+    }
+  };
+
   const searchUsers = useCallback(async (searchQuery) => {
     if (searchQuery.length < 1) {
       setUsers([]);
@@ -23,8 +43,10 @@ const UserSearch = ({ onSelect, selectedUser }) => {
       const response = await apiClient.get('/api/users/search', {
         params: { q: searchQuery },
       });
-      setUsers(response.data || []);
+      const found = response.data || [];
+      setUsers(found);
       setShowDropdown(true);
+      fetchHeadToHead(found);
     } catch (err) {
       console.error('Error searching users:', err);
       setError(err.response?.data?.detail || 'Failed to search users');
@@ -114,6 +136,11 @@ const UserSearch = ({ onSelect, selectedUser }) => {
                   {user.rating && (
                     <span className="user-rating">Rating: {user.rating}</span>
                   )}
+                  {records[user.id]?.total_contests > 0 && (
+                    <span className="user-rating">
+                      You: {records[user.id].wins}W {records[user.id].losses}L {records[user.id].draws}D
+                    </span>
+                  )}
                 </div>
               </div>
             ))
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
-import apiClient from '../../api/client';
+import { subscribeContestEvents } from '../../api/contestEvents';
 import ProblemCard from './ProblemCard';
 import Leaderboard from './Leaderboard';
 import { formatLocalDateTime, getTimeRemaining, utcToLocal } from '../../utils/dateUtils';
@@ -16,25 +16,45 @@ const ContestView = () => {
   const [currentTime, setCurrentTime] = useState(new Date());
 
   useEffect(() => {
-    fetchContest();
-    // Poll every 10 seconds if contest is active, or if contest is scheduled and less than 2 minutes before start
-    const interval = setInterval(() => {
-      if (contest) {
-        const now = new Date();
-        const startTime = utcToLocal(contest.start_time);
-        const timeUntilStart = startTime - now;
-        const twoMinutes = 2 * 60 * 1000; // 2 minutes in milliseconds
-        
-        // Poll if contest is active, or if scheduled and less than 2 minutes before start
-        if (contest.status === 'active' || 
-            (contest.status === 'scheduled' && timeUntilStart <= twoMinutes && timeUntilStart > 0)) {
-          fetchContest();
+    // Live updates are pushed by the server; no polling
+    const close = subscribeContestEvents(
+      contestId,
+      (event, data) => {
+        if (event === 'snapshot') {
+          setContest(data);
+          setError('');
+          setLoading(false);
+          return;
         }
+        setContest((current) => {
+          if (!current) return current;
+          switch (event) {
+            case 'solve':
+              return {
+                ...current,
+                problems: current.problems.map((problem) =>
+                  problem.id === data.problem_id
+                    ? { ...problem, solved_by: data.solved_by, solved_at: data.solved_at }
+                    : problem
+                ),
+              };
+            case 'scores':
+            case 'problems':
+            case 'status':
+              return { ...current, ...data };
+            default:
+              return current;
+          }
+        });
+      },
+      (detail) => {
+        setError(detail);
+        setLoading(false);
       }
-    }, 10000);
+    );
 
-    return () => clearInterval(interval);
-  }, [contestId, contest?.status, contest?.start_time]);
+    return close;
+  }, [contestId]);
 
   // Update current time every second for time remaining display or when contest is about to start
   useEffect(() => {
@@ -56,18 +76,6 @@ const ContestView = () => {
     }
   }, [contest?.status, contest?.start_time]);
 
-  const fetchContest = async () => {
-    try {
-      const response = await apiClient.get(`/api/contests/${contestId}`);
-      setContest(response.data);
-      setError('');
-    } catch (err) {
-      setError(err.response?.data?.detail || 'Failed to load contest');
-    } finally {
-      setLoading(false);
-    }
-  };
-
   if (loading) {
     return <div className="loading">Loading contest...</div>;
   }
@@ -10,6 +10,7 @@ const Dashboard = () => {
   const { user } = useAuth();
   const [challenges, setChallenges] = useState([]);
   const [contests, setContests] = useState([]);
+  const [contestsCursor, setContestsCursor] = useState(null);
   const [tournaments, setTournaments] = useState([]);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState('challenges');
@@ -26,7 +27,8 @@ const Dashboard = () => {
         apiClient.get('/api/tournaments/'),
       ]);
       setChallenges(challengesRes.data);
-      setContests(contestsRes.data);
+      setContests(contestsRes.data.items);
+      setContestsCursor(contestsRes.data.next_cursor);
       setTournaments(tournamentsRes.data);
     } catch (error) {
       console.error('Error fetching data:', error);
@@ -35,6 +37,18 @@ const Dashboard = () => {
     }
   };
 
+  const loadMoreContests = async () => {
+    try {
+      const response = await apiClient.get('/api/contests/', {
+        params: { cursor: contestsCursor },
+      });
+      setContests((prev) => [...prev, ...response.data.items]);
+      setContestsCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching more contests:', error);
+    }
+  };
+
   if (loading) {
     return <div className="loading">Loading...</div>;
   }
@@ -137,6 +151,11 @@ const Dashboard = () => {
               ))}
             </div>
           )}
+          {contestsCursor && (
+            <button className="btn-view" onClick={loadMoreContests}>
+              Load More
+            </button>
+          )}
         </div>
       )}
 
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
 import apiClient from '../../api/client';
+import { subscribeNotifications } from '../../api/notifications';
 import './Navbar.css';
 
 const Navbar = () => {
@@ -22,10 +23,16 @@ const Navbar = () => {
 
   useEffect(() => {
     if (user) {
-      fetchPendingCount();
-      // Poll every 30 seconds for updates
-      const interval = setInterval(fetchPendingCount, 30000);
-      return () => clearInterval(interval);
+      // The server pushes count changes; refetch on every (re)connect to catch up
+      return subscribeNotifications((event, data) => {
+        if (event === 'ready') {
+          fetchPendingCount();
+        } else if (event === 'challenge_received') {
+          setPendingCount(data.pending_count);
+        } else if (event === 'pending_challenges') {
+          setPendingCount(data.count);
+        }
+      });
     } else {
       setPendingCount(0);
     }
@@ -301,6 +301,14 @@ const UserProfile = () => {
           <div className="stat-value" style={{ color: '#667eea' }}>{((profile.win_rate ?? 0)).toFixed(1)}%</div>
           <div className="stat-label">Win Rate</div>
         </div>
+        <div className="stat-card">
+          <div className="stat-value" style={{ color: '#667eea' }}>{profile.best_rating ?? profile.rating}</div>
+          <div className="stat-label">Best Rating</div>
+        </div>
+        <div className="stat-card">
+          <div className="stat-value" style={{ color: '#28a745' }}>{profile.longest_win_streak ?? 0}</div>
+          <div className="stat-label">Longest Win Streak</div>
+        </div>
       </div>
 
       <div className="profile-section">
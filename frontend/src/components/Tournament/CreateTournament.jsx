@@ -6,6 +6,9 @@ import './CreateTournament.css';
 const CreateTournament = () => {
   const [numParticipants, setNumParticipants] = useState(8);
   const [difficulty, setDifficulty] = useState(2);
+  const [format, setFormat] = useState('single_elimination');
+  const [numRounds, setNumRounds] = useState('');
+  const [sharedProblems, setSharedProblems] = useState(false);
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const navigate = useNavigate();
@@ -20,6 +23,9 @@ const CreateTournament = () => {
       const response = await apiClient.post('/api/tournaments/', {
         num_participants: parseInt(numParticipants),
         difficulty: parseInt(difficulty),
+        format,
+        num_rounds: format === 'swiss' && numRounds ? parseInt(numRounds) : null,
+        shared_problems: sharedProblems,
       });
       navigate(`/tournaments/${response.data.id}`);
     } catch (err) {
@@ -35,6 +41,18 @@ const CreateTournament = () => {
       <form onSubmit={handleSubmit} className="tournament-form">
         {error && <div className="error-message">{error}</div>}
 
+        <div className="form-group">
+          <label>Format</label>
+          <select
+            value={format}
+            onChange={(e) => setFormat(e.target.value)}
+            required
+          >
+            <option value="single_elimination">Single Elimination</option>
+            <option value="swiss">Swiss</option>
+          </select>
+        </div>
+
         <div className="form-group">
           <label>Number of Participants</label>
           <select
@@ -47,9 +65,27 @@ const CreateTournament = () => {
             <option value={16}>16</option>
             <option value={32}>32</option>
             <option value={64}>64</option>
+            <option value={128}>128</option>
+            <option value={256}>256</option>
+            <option value={512}>512</option>
+            <option value={1024}>1024</option>
           </select>
         </div>
 
+        {format === 'swiss' && (
+          <div className="form-group">
+            <label>Number of Rounds</label>
+            <input
+              type="number"
+              min={1}
+              max={numParticipants - 1}
+              value={numRounds}
+              placeholder={`Default: ${Math.ceil(Math.log2(numParticipants))}`}
+              onChange={(e) => setNumRounds(e.target.value)}
+            />
+          </div>
+        )}
+
         <div className="form-group">
           <label>Difficulty (Division)</label>
           <select
@@ -64,6 +100,17 @@ const CreateTournament = () => {
           </select>
         </div>
 
+        <div className="form-group">
+          <label>
+            <input
+              type="checkbox"
+              checked={sharedProblems}
+              onChange={(e) => setSharedProblems(e.target.checked)}
+            />
+            {' '}Same problems for every match in a round
+          </label>
+        </div>
+
         <div className="form-actions">
           <button type="submit" disabled={loading} className="btn-primary">
             {loading ? 'Creating Tournament...' : 'Create Tournament'}
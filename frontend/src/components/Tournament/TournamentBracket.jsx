@@ -16,11 +16,17 @@ const TournamentBracket = ({ tournament }) => {
     matchesByRound[match.round_number].push(match);
   });
 
+  // Keep each round in bracket order so winners sit next to their next opponent
+  // (Swiss: board order, highest scores first)
+  Object.values(matchesByRound).forEach(roundMatches => {
+    roundMatches.sort((a, b) => (a.bracket_position ?? 0) - (b.bracket_position ?? 0));
+  });
+
   const rounds = Object.keys(matchesByRound).sort((a, b) => parseInt(a) - parseInt(b));
 
   return (
     <div className="tournament-bracket">
-      <h2>Tournament Bracket</h2>
+      <h2>{tournament.format === 'swiss' ? 'Swiss Rounds' : 'Tournament Bracket'}</h2>
       <div className="bracket-container">
         {rounds.map(roundNum => (
           <div key={roundNum} className="bracket-round">
@@ -45,6 +51,9 @@ const TournamentBracket = ({ tournament }) => {
                     {match.winner_handle && (
                       <p className="winner-info">Winner: {match.winner_handle}</p>
                     )}
+                    {match.status === 'completed' && !match.winner_id && (
+                      <p className="winner-info">Draw</p>
+                    )}
                     {match.contest_id && (
                       <Link to={`/contests/${match.contest_id}`} className="view-contest-link">
                         View Contest
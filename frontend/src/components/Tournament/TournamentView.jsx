@@ -31,9 +31,8 @@ const TournamentView = () => {
       
       // Initialize round schedules if tournament hasn't started
       if (response.data.status === 'pending' || response.data.status === 'registering') {
-        const numRounds = Math.log2(response.data.num_participants);
         const schedules = [];
-        for (let i = 1; i <= Math.floor(numRounds); i++) {
+        for (let i = 1; i <= response.data.num_rounds; i++) {
           const existing = response.data.round_schedules.find(rs => rs.round_number === i);
           schedules.push({
             round_number: i,
@@ -153,7 +152,7 @@ const TournamentView = () => {
   }
 
   const isCreator = user && tournament.creator_id === user.id;
-  const numRounds = Math.floor(Math.log2(tournament.num_participants));
+  const numRounds = tournament.num_rounds;
   const allSlotsFilled = tournament.slots.every(slot => slot.user_id);
   const allRoundsScheduled = tournament.round_schedules.length === numRounds;
   const canStart = allSlotsFilled && allRoundsScheduled && tournament.status === 'pending';
@@ -170,6 +169,7 @@ const TournamentView = () => {
         <div className="tournament-header-content">
           <h1>Tournament #{tournament.id.slice(0, 8)}</h1>
           <div className="tournament-info">
+            <p><strong>Format:</strong> {tournament.format === 'swiss' ? `Swiss (${tournament.num_rounds} rounds)` : 'Single Elimination'}</p>
             <p><strong>Participants:</strong> {tournament.num_participants}</p>
             <p><strong>Difficulty:</strong> {tournament.difficulty}</p>
             <p><strong>Status:</strong> {tournament.status}</p>